@@ -0,0 +1,332 @@
+import codecs
+import functools
+import inspect
+
+import numpy as np
+import pandas as pd
+
+import helper
+import mentions
+import preprocessor
+
+# Library API around a parsed chat for notebooks and services.
+#
+#   chat = ChatAnalyzer.from_file('chat.txt')
+#   chat.stats                        # (messages, words, media, links)
+#   chat.for_user('Priya').heatmap    # same result as the dashboard's user view
+#   chat.between('2023-01-01', '2023-06-30').sentiment_trend
+#
+# Every property is computed on first access and memoized per view. Views
+# (for_user / between) keep row positions into the parsed frame and only
+# materialize their rows when an analysis first needs them. Date ranges on a
+# chronological chat are plain slices of the shared columns; a user's rows
+# are scattered, and pandas cannot view scattered rows, so a user view's df
+# is a copy of that user's rows (made once per view).
+
+
+class ChatAnalyzer:
+
+    def __init__(self, df, user='Overall', positions=None, root=None, group=None):
+        self._df = df
+        self.user = user
+        # None = every row, a slice = a contiguous range, an array = row positions
+        self._positions = positions
+        self._root = self if root is None else root
+        # For a user view, the all-authors view it was taken from; analyses
+        # of interactions between members need the other authors' messages
+        self._group = group
+        self._memo = {}
+
+    @classmethod
+    def from_text(cls, data, workers=1):
+        return cls(preprocessor.preprocess(data, workers=workers))
+
+    @classmethod
+    def from_file(cls, path, encoding='utf-8', workers=1):
+        # UTF-8 .txt and .zip exports are parsed by byte range or streamed
+        # (see preprocessor.preprocess_path); other encodings are decoded whole
+        if codecs.lookup(encoding).name == 'utf-8':
+            return cls(preprocessor.preprocess_path(path, workers=workers))
+        with open(path, encoding=encoding) as f:
+            return cls.from_text(f.read(), workers)
+
+    def __repr__(self):
+        return f"ChatAnalyzer(user={self.user!r}, messages={len(self)})"
+
+    def __len__(self):
+        if self._positions is None:
+            return len(self._df)
+        if isinstance(self._positions, slice):
+            return len(range(*self._positions.indices(len(self._df))))
+        return len(self._positions)
+
+    # Views
+
+    @functools.cached_property
+    def _user_positions(self):
+        # Row positions of every author, computed once on the root chat
+        return self._df.groupby('user', sort=False).indices
+
+    @functools.cached_property
+    def _dates(self):
+        return self._df['date'].to_numpy()
+
+    @functools.cached_property
+    def _chronological(self):
+        dates = self._dates
+        return bool(len(dates) < 2 or (dates[1:] >= dates[:-1]).all())
+
+    def _row_positions(self):
+        if self._positions is None:
+            return np.arange(len(self._df))
+        if isinstance(self._positions, slice):
+            return np.arange(len(self._df))[self._positions]
+        return self._positions
+
+    def users(self):
+        return sorted(u for u in self._root._user_positions if u != 'group_notification')
+
+    def for_user(self, name):
+        if name == 'Overall':
+            return self
+        root = self._root
+        if name not in root._user_positions:
+            raise KeyError(f"No participant named {name!r}")
+        positions = root._user_positions[name]
+        if self._positions is not None:
+            positions = np.intersect1d(positions, self._row_positions(), assume_unique=True)
+        group = self if self._group is None else self._group
+        return ChatAnalyzer(root._df, name, positions, root, group)
+
+    def between(self, start=None, end=None):
+        # Inclusive date range; dates may be strings, dates or timestamps
+        root = self._root
+        low = pd.Timestamp(start).to_datetime64() if start is not None else None
+        high = None
+        if end is not None:
+            high = pd.Timestamp(end)
+            if high == high.normalize():
+                # A bare date includes the whole day
+                high += pd.Timedelta(days=1)
+            high = high.to_datetime64()
+        positions = self._row_positions()
+        dates = root._dates[positions]
+        if root._chronological:
+            a = 0 if low is None else int(np.searchsorted(dates, low, side='left'))
+            b = len(dates) if high is None else int(np.searchsorted(dates, high, side='left'))
+            if self._positions is None or isinstance(self._positions, slice):
+                offset = 0 if self._positions is None else self._positions.indices(len(root._df))[0]
+                selected = slice(offset + a, offset + b)
+            else:
+                selected = positions[a:b]
+        else:
+            mask = np.ones(len(dates), dtype=bool)
+            if low is not None:
+                mask &= dates >= low
+            if high is not None:
+                mask &= dates < high
+            selected = positions[mask]
+        group = self._group.between(start, end) if self._group is not None else None
+        return ChatAnalyzer(root._df, self.user, selected, root, group)
+
+    @property
+    def df(self):
+        # The rows of this view; a slice shares the parent's columns, row
+        # positions (user views) are copied by take
+        if 'df' not in self._memo:
+            if self._positions is None:
+                self._memo['df'] = self._df
+            elif isinstance(self._positions, slice):
+                self._memo['df'] = self._df.iloc[self._positions]
+            else:
+                self._memo['df'] = self._df.take(self._positions)
+        return self._memo['df']
+
+    def _run(self, name, *args):
+        key = (name,) + args
+        if key not in self._memo:
+            # The view is already filtered, so helpers run on it as 'Overall'
+            func = getattr(helper, name)
+            if 'selected_user' in inspect.signature(func).parameters:
+                self._memo[key] = func('Overall', self.df, *args)
+            else:
+                self._memo[key] = func(self.df, *args)
+        return self._memo[key]
+
+    # Chat analysis
+
+    @property
+    def stats(self):
+        return self._run('chat_fetch_stats')
+
+    @property
+    def summary(self):
+        return self._run('user_summary_table')
+
+    @property
+    def busy_users(self):
+        return helper.chat_most_busy_users(self.df, summary=self.summary)
+
+    @property
+    def timeline(self):
+        return self._run('chat_monthly_timeline')
+
+    @property
+    def daily_timeline(self):
+        return self._run('chat_daily_timeline')
+
+    @property
+    def calendar(self):
+        return self._run('calendar_heatmap')
+
+    @property
+    def hourly_activity(self):
+        return self._run('user_activity_timeline')
+
+    @property
+    def week_activity(self):
+        return self._run('chat_week_activity_map')
+
+    @property
+    def month_activity(self):
+        return self._run('chat_month_activity_map')
+
+    @property
+    def heatmap(self):
+        return self._run('chat_activity_heatmap')
+
+    @property
+    def response_times(self):
+        return self._run('response_time_analysis')
+
+    @property
+    def message_kinds(self):
+        return self._run('message_kind_breakdown')
+
+    @property
+    def message_kind_timeline(self):
+        return self._run('message_kind_timeline')
+
+    @property
+    def reply_interactions(self):
+        if self._group is None:
+            return self._run('reply_interactions')
+        pairs = self._group.reply_interactions
+        if pairs.empty:
+            return pairs
+        return pairs[(pairs['user'] == self.user) | (pairs['replied_to'] == self.user)].reset_index(drop=True)
+
+    @property
+    def reply_degrees(self):
+        group = self if self._group is None else self._group
+        return helper.reply_degrees(self.user, group.df, pairs=group.reply_interactions)
+
+    @functools.cached_property
+    def _mention_index(self):
+        # Built once on the root chat; views select their rows from it
+        return mentions.MentionIndex.build(self._df)
+
+    @property
+    def mentions(self):
+        # MentionIndex of this view: most_mentioned(), network(), timeline()
+        if 'mentions' not in self._memo:
+            index = self._root._mention_index
+            self._memo['mentions'] = index if self._positions is None else index.for_rows(self._row_positions())
+        return self._memo['mentions']
+
+    @property
+    def wordcloud(self):
+        return self._run('chat_create_wordcloud')
+
+    @property
+    def top_words(self):
+        return self._run('chat_most_common_words')
+
+    @property
+    def emoji_table(self):
+        return self._run('chat_emoji_helper')
+
+    @property
+    def emoji_contribution(self):
+        return helper.emoji_contribution(self.df, summary=self.summary)
+
+    # Sentiment analysis
+
+    @property
+    def sentiment_trend(self):
+        return self._run('sentiment_trend')
+
+    @property
+    def sentiment_intensity(self):
+        return self._run('sentiment_intensity_distribution')
+
+    @property
+    def sentiment_transitions(self):
+        return self._run('sentiment_transition_analysis')
+
+    @property
+    def sentiment_emojis(self):
+        return self._run('sentiment_emoji_correlation')
+
+    @property
+    def sentiment_lengths(self):
+        return self._run('sentiment_by_message_length')
+
+    def sentiment_share(self, k):
+        return helper.sentiment_percentage(self.df, k, summary=self.summary)
+
+    def sentiment_week_activity(self, k):
+        return self._run('sentiment_week_activity_map', k)
+
+    def sentiment_month_activity(self, k):
+        return self._run('sentiment_month_activity_map', k)
+
+    def sentiment_heatmap(self, k):
+        return self._run('sentiment_activity_heatmap', k)
+
+    def sentiment_daily_timeline(self, k):
+        return self._run('sentiment_daily_timeline', k)
+
+    def sentiment_calendar(self, k):
+        return self._run('calendar_heatmap', k)
+
+    def sentiment_timeline(self, k):
+        return self._run('sentiment_monthly_timeline', k)
+
+    def sentiment_wordcloud(self, k):
+        return self._run('sentiment_create_wordcloud', k)
+
+    def sentiment_top_words(self, k):
+        return self._run('sentiment_most_common_words', k)
+
+    # Keyword and message length analysis
+
+    def keyword_search(self, keyword):
+        return self._run('keyword_search', keyword)
+
+    def keyword_timeline(self, keyword):
+        return self._run('keyword_timeline', keyword)
+
+    @property
+    def length_by_user(self):
+        return helper.message_length_by_user('Overall', self.df, summary=self.summary)
+
+    @property
+    def length_timeline(self):
+        return self._run('message_length_timeline')
+
+    @property
+    def length_distribution(self):
+        return self._run('message_length_distribution')
+
+    @property
+    def length_by_sentiment(self):
+        return self._run('message_length_by_sentiment')
+
+    @property
+    def length_by_day_of_week(self):
+        return self._run('message_length_by_day_of_week')
+
+    @property
+    def extreme_messages(self):
+        return self._run('extreme_messages')
@@ -1,19 +1,23 @@
 import streamlit as st
 import preprocessor
 import helper
-import matplotlib.pyplot as plt
-import seaborn as sns
+import precompute
+import instrumentation
+import ingest
+import comparison
+import mentions
+import membership
+import sketches
+import hashlib
+import os
+import tempfile
+import time
 import pandas as pd
-import nltk
-import plotly.express as px
 from datetime import datetime
 import re
-import plotly.graph_objects as go
-import plotly.figure_factory as ff
 
-# Download NLTK data for VADER and WordCloud
-nltk.download('vader_lexicon', quiet=True)  # For SentimentIntensityAnalyzer in preprocessor.py
-nltk.download('punkt', quiet=True)          # For tokenization in WordCloud (used in helper.py)
+# No NLTK downloads here: the VADER lexicon is bundled under nltk_data/ and
+# loaded by preprocessor.py on first use, so startup makes no network calls.
 
 # Initialize session state for theme and analysis
 if 'theme' not in st.session_state:
@@ -174,16 +178,250 @@ except FileNotFoundError:
 # Sidebar
 st.sidebar.title("WhatsApp Chat & Sentiment Analyzer")
 
-# File uploader
-uploaded_file = st.sidebar.file_uploader(
-    "Choose a WhatsApp chat file (.txt)",
-    type="txt"
+# Optional performance instrumentation of every helper call and render block
+show_performance = st.sidebar.checkbox(
+    "Performance panel", value=instrumentation.enabled_by_env()
 )
+profiler = instrumentation.Profiler(enabled=show_performance)
+helper = profiler.wrap(helper)
 
-# Cache the preprocessing function
+# One chat in depth, or several groups side by side
+analysis_mode = st.sidebar.radio("Mode", ["Single chat", "Compare chats"], horizontal=True)
+
+if analysis_mode == "Compare chats":
+    comparison_files = st.sidebar.file_uploader(
+        "Choose the chats to compare (.txt or .zip)",
+        type=["txt", "zip"],
+        accept_multiple_files=True
+    )
+    uploaded_file = None
+    extra_files = []
+    approximate_mode = False
+    analysis_profile = "Full"
+else:
+    comparison_files = []
+    # File uploader
+    uploaded_file = st.sidebar.file_uploader(
+        "Choose a WhatsApp chat file (.txt or .zip export with media)",
+        type=["txt", "zip"]
+    )
+
+    # Other members' exports of the same group, merged into the main upload
+    extra_files = st.sidebar.file_uploader(
+        "Merge other exports of the same group (optional)",
+        type=["txt", "zip"],
+        accept_multiple_files=True
+    )
+
+    # Quick shows counts and activity charts from the structural parse only
+    analysis_profile = st.sidebar.radio(
+        "Analysis profile", ["Full", "Quick"], horizontal=True, key='analysis_profile',
+        help="Quick skips sentiment, links, emojis and word clouds and shows message counts and activity "
+             "charts; it can be upgraded to the full analysis in the background."
+    )
+
+    # Bounded-memory summaries for exports too large to analyze in full
+    approximate_mode = st.sidebar.checkbox(
+        "Approximate mode (very large chats)", value=False,
+        help="Reads the export once into fixed-size sketches: top words, emojis and link domains, "
+             "vocabulary size and length histograms, each with a stated error bound."
+    )
+
+# Re-exports of a remembered chat only parse the messages added since
+remember_chat = st.sidebar.checkbox(
+    "Remember chat for incremental updates", value=False,
+    help=f"Keeps a parsed copy in {ingest.default_store_dir()} so the next export of the same chat only parses new messages."
+)
+# Only an upload remembered under the same name continues a stored chat
+remembered_name = st.sidebar.text_input(
+    "Remember as", "", disabled=not remember_chat,
+    help="Name to store this chat under. Use the same name for its next export; other names never see it."
+).strip()
+
+# Uploads are spooled to disk and parsed from there, so neither the raw
+# bytes nor the decoded text of an export stay in memory. Each session
+# spools to its own uniquely named files (parses are cached by content
+# digest, never by path), listed in st.session_state.spools and deleted by
+# release_spools once their upload is removed.
+SPOOL_DIR = os.path.join(tempfile.gettempdir(), 'chat-analyzer-uploads')
+SPOOL_BLOCK = 2 ** 20
+# Spools left behind by sessions that ended are deleted after this long
+SPOOL_MAX_AGE = 24 * 3600
+
+def spool_upload(upload):
+    # (sha256, path): copies the upload to a new file in SPOOL_DIR block by
+    # block while hashing it
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    upload.seek(0)
+    extension = '.zip' if upload.name.lower().endswith('.zip') else '.txt'
+    with tempfile.NamedTemporaryFile('wb', dir=SPOOL_DIR, prefix='upload-', suffix=extension,
+                                     delete=False) as spool:
+        for block in iter(lambda: upload.read(SPOOL_BLOCK), b''):
+            digest.update(block)
+            spool.write(block)
+    return digest.hexdigest(), spool.name
+
+def upload_key(upload):
+    return getattr(upload, 'file_id', None) or (upload.name, upload.size)
+
+def spooled(upload):
+    # (digest, path) of an upload, spooled once per session
+    spools = st.session_state.setdefault('spools', {})
+    key = upload_key(upload)
+    if key not in spools or not os.path.exists(spools[key][1]):
+        spools[key] = spool_upload(upload)
+    return spools[key]
+
+def release_spools(uploads):
+    # Deletes this session's spools of files that are no longer uploaded, and
+    # any spool older than SPOOL_MAX_AGE (spooled() re-spools a live upload)
+    keep = {upload_key(upload) for upload in uploads}
+    spools = st.session_state.setdefault('spools', {})
+    for key in [key for key in spools if key not in keep]:
+        _, path = spools.pop(key)
+        if os.path.exists(path):
+            os.remove(path)
+    if os.path.isdir(SPOOL_DIR):
+        cutoff = time.time() - SPOOL_MAX_AGE
+        for entry in os.scandir(SPOOL_DIR):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+release_spools([f for f in [uploaded_file, *(extra_files or []), *(comparison_files or [])] if f is not None])
+
+# Cache the preprocessing function by content digest; large exports are
+# parsed on every core
+@st.cache_data
+def cached_preprocess(digest, _path):
+    if _path.endswith('.zip'):
+        # The chat member is streamed out of the archive, never extracted
+        return preprocessor.preprocess_zip(_path)
+    return preprocessor.preprocess_file(_path, workers=os.cpu_count())
+
+# Structural parse without sentiment scoring for the quick profile
+@st.cache_data
+def cached_quick_preprocess(digest, _path):
+    if _path.endswith('.zip'):
+        return preprocessor.preprocess_zip(_path, sentiment=False)
+    return preprocessor.preprocess_file(_path, workers=os.cpu_count(), sentiment=False)
+
+# Parse through the persisted store: (frame, stored summary, stored aggregates, ingest status)
+@st.cache_data
+def cached_ingest(digest, name, _path):
+    record, status = ingest.ChatStore().ingest_file(_path, name, workers=os.cpu_count())
+    return record['df'], ingest.summary_table(record), record['aggregates'], status
+
+# Several exports of one group, deduplicated into one frame
+@st.cache_data
+def cached_merge(digests, _paths):
+    return ingest.merge_files(list(_paths), workers=os.cpu_count())
+
+def spool_main_upload(upload):
+    # (digest, path) of the main upload; reruns reuse the digest and the
+    # cached frame
+    digest, path = spooled(upload)
+    st.session_state.upload_digest = digest
+    st.session_state.upload_path = path
+    return digest, path
+
+# Activity cubes of compared chats by content digest, shared across sessions
+@st.cache_resource
+def comparison_cache():
+    return comparison.CubeCache()
+
+# Streaming sketches of an export, built in one pass without a DataFrame
 @st.cache_data
-def cached_preprocess(chat_data):
-    return preprocessor.preprocess(chat_data)
+def cached_sketch(digest, _path):
+    return sketches.ChatSketch.from_file(_path)
+
+# Attachment index of a .zip export, read from its central directory
+@st.cache_data
+def cached_media_index(digest, _path):
+    if not _path.endswith('.zip'):
+        return None
+    return preprocessor.zip_media_index(_path)
+
+# Start one background warm-up of every participant's view per chat and date range
+@st.cache_resource(max_entries=4)
+def start_user_view_warmup(cache_key, _df):
+    return precompute.UserViewWarmup(_df).start()
+
+# @mention index of the whole chat; date ranges are selected from it
+@st.cache_resource(max_entries=4)
+def cached_mention_index(cache_key, _df):
+    return mentions.MentionIndex.build(_df)
+
+# Membership events, periods and active members per day of the whole chat
+@st.cache_resource(max_entries=4)
+def cached_membership(cache_key, _df):
+    events = membership.parse_events(_df)
+    intervals = membership.membership_intervals(_df, events)
+    return events, intervals, membership.active_members(_df, intervals)
+
+# Calendar denominators of the normalized activity views for one chat view
+@st.cache_resource(max_entries=4)
+def cached_activity_calendar(cache_key, _df, _intervals):
+    return helper._activity_calendar(_df, _intervals)
+
+# Users x days message counts behind the streak and silence views
+@st.cache_resource(max_entries=4)
+def cached_daily_activity(cache_key, _df):
+    return helper._daily_activity_matrix(_df)
+
+# One weekday x week heatmap per year, newest first
+def show_calendar_heatmap(calendar, label, colorscale):
+    import plotly.graph_objects as go
+    for year in sorted(calendar, reverse=True):
+        grid = calendar[year]
+        fig = go.Figure(data=go.Heatmap(
+            z=grid.values,
+            x=grid.columns,
+            y=grid.index,
+            customdata=helper.calendar_dates(year),
+            hovertemplate="%{customdata}: %{z}<extra></extra>",
+            colorscale=colorscale,
+            xgap=2,
+            ygap=2,
+            colorbar={'title': label}
+        ))
+        fig.update_layout(
+            title=str(year),
+            xaxis_title='Week',
+            yaxis={'autorange': 'reversed'},
+            height=220,
+            margin={'t': 40, 'b': 30}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+# Participant warm-up status in a sidebar placeholder
+def show_warmup_status(placeholder, warmup):
+    if warmup.error is not None:
+        placeholder.caption("Participant views will be computed on demand.")
+    elif not warmup.finished:
+        placeholder.progress(
+            warmup.progress(),
+            text=f"Preparing participant views: {warmup.done_users}/{warmup.total_users}"
+        )
+    else:
+        placeholder.caption(f"All {warmup.total_users} participant views ready.")
+
+# The warm-up thread never reruns the script. Where Streamlit has fragments,
+# only the indicator is redrawn every second; otherwise it is current as of
+# the last rerun (any widget interaction). The script itself never waits.
+def live_warmup_status(warmup):
+    show_warmup_status(st.empty(), warmup)
+
+if hasattr(st, 'fragment'):
+    live_warmup_status = st.fragment(run_every=1)(live_warmup_status)
+
+# Per-user summary table shared by all group-comparison charts
+@st.cache_resource(max_entries=4)
+def cached_user_summary(cache_key, _df):
+    return helper.user_summary_table(_df)
 
 # Date range filter and keyword search
 st.sidebar.subheader("Date Range Filter")
@@ -197,13 +435,334 @@ end_date = st.sidebar.date_input(
 )
 keyword = st.sidebar.text_input("Search for a keyword (optional)", "")
 
+# Comparison mode: every chat is parsed once into an activity cube and all
+# charts are drawn from the cubes
+if comparison_files:
+    import plotly.express as px
+
+    profiler.mark("Parse chats to compare")
+    try:
+        spools = [spooled(f) for f in comparison_files]
+        cubes = comparison_cache().load(spools, workers=os.cpu_count())
+    except (UnicodeDecodeError, ValueError) as e:
+        st.error(f"Error processing one of the chats: {str(e)}. Please upload WhatsApp chat exports.")
+        st.stop()
+    chats = {}
+    for upload, (digest, _) in zip(comparison_files, spools):
+        name = os.path.splitext(upload.name)[0]
+        while name in chats:
+            name += "'"
+        chat = cubes[digest]
+        if start_date and end_date:
+            chat = comparison.filter_chat(chat, start_date, end_date)
+        chats[name] = chat
+
+    profiler.mark("Chat Comparison")
+    st.title("Chat Comparison")
+    try:
+        st.dataframe(comparison.overview(chats), use_container_width=True)
+    except Exception as e:
+        st.error(f"Error generating comparison overview: {str(e)}")
+
+    st.header("Monthly Timeline")
+    try:
+        timeline = comparison.monthly_timeline(chats)
+        if not timeline.empty:
+            fig = px.line(timeline, x='month', y='messages', color='chat', markers=True)
+            fig.update_layout(xaxis_title='Month', yaxis_title='Messages')
+            st.plotly_chart(fig)
+        else:
+            st.info("No messages in the selected date range.")
+    except Exception as e:
+        st.error(f"Error generating comparison timeline: {str(e)}")
+
+    st.header("Activity by Hour of Day")
+    try:
+        profile = comparison.hourly_profile(chats)
+        if not profile.empty:
+            fig = px.line(profile, x='hour', y='percent', color='chat')
+            fig.update_layout(xaxis_title='Hour of Day', yaxis_title='% of Messages')
+            st.plotly_chart(fig)
+    except Exception as e:
+        st.error(f"Error generating hourly comparison: {str(e)}")
+
+    st.header("Sentiment Mix")
+    try:
+        mix = comparison.sentiment_mix(chats)
+        if not mix.empty:
+            fig = px.bar(
+                mix, x='chat', y='percent', color='sentiment', barmode='stack',
+                color_discrete_map={'Positive': 'green', 'Neutral': 'gray', 'Negative': 'red'}
+            )
+            fig.update_layout(xaxis_title='Chat', yaxis_title='% of Messages')
+            st.plotly_chart(fig)
+    except Exception as e:
+        st.error(f"Error generating sentiment comparison: {str(e)}")
+
+    st.header("Weekly Activity Heatmaps")
+    try:
+        columns = st.columns(min(len(chats), 3))
+        for i, (name, chat) in enumerate(chats.items()):
+            heatmap = comparison.weekly_heatmap(chat)
+            with columns[i % len(columns)]:
+                if heatmap.empty:
+                    st.info(f"No messages for {name} in the selected date range.")
+                    continue
+                fig = px.imshow(heatmap, color_continuous_scale='YlGnBu', aspect='auto', title=name,
+                                labels={'x': 'Hour', 'y': '', 'color': '% of Messages'})
+                st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error generating comparison heatmaps: {str(e)}")
+
+# Approximate mode: the export is streamed once into fixed-size sketches,
+# so memory stays bounded however large the chat is
+if uploaded_file is not None and approximate_mode:
+    import plotly.express as px
+
+    try:
+        profiler.mark("Sketch upload")
+        digest, path = spool_main_upload(uploaded_file)
+        sketch = cached_sketch(digest, path)
+    except UnicodeDecodeError as e:
+        st.error(
+            f"Error decoding file: {str(e)}. Please ensure the file is a "
+            "valid WhatsApp chat export in .txt format with UTF-8 encoding."
+        )
+        st.stop()
+    except ValueError as e:
+        st.error(
+            f"Error processing file: {str(e)}. Please ensure the file format "
+            "matches WhatsApp chat export format."
+        )
+        st.stop()
+
+    bounds = sketch.error_bounds()
+    st.header("Approximate Analysis")
+    st.caption(
+        "Computed from streaming sketches over the whole export (the date range filter does not apply). "
+        "Counts marked ± are estimates within the stated bound."
+    )
+    try:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Messages", f"{sketch.messages:,}")
+        with col2:
+            st.metric("Media Shared", f"{sketch.media:,}")
+        with col3:
+            st.metric("Links Shared", f"{sketch.links:,}")
+        with col4:
+            st.metric("Distinct Words", f"≈{sketch.vocabulary.estimate():,.0f}")
+            st.caption(f"± {bounds['vocabulary_relative']:.1%} (one standard error)")
+    except Exception as e:
+        st.error(f"Error displaying approximate statistics: {str(e)}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Most Common Words")
+        try:
+            st.dataframe(sketch.words.top(20).rename(columns={
+                'item': 'Word', 'estimate': 'Count (upper bound)', 'at_least': 'Count (lower bound)'}),
+                use_container_width=True)
+            st.caption(f"Each count is overestimated by at most {bounds['words']:,}.")
+        except Exception as e:
+            st.error(f"Error generating approximate common words: {str(e)}")
+    with col2:
+        st.subheader("Most Used Emojis")
+        try:
+            st.dataframe(sketch.emojis.top(20).rename(columns={
+                'item': 'Emoji', 'estimate': 'Count (upper bound)', 'at_least': 'Count (lower bound)'}),
+                use_container_width=True)
+            st.caption(f"Each count is overestimated by at most {bounds['emojis']:,}.")
+        except Exception as e:
+            st.error(f"Error generating approximate emoji counts: {str(e)}")
+
+    st.subheader("Most Shared Link Domains")
+    try:
+        domains = sketch.domains.top(20)
+        if domains.empty:
+            st.info("No links found in this chat.")
+        else:
+            st.dataframe(domains.rename(columns={'item': 'Domain', 'estimate': 'Links (estimate)'}),
+                         use_container_width=True)
+            st.caption(
+                f"Each count is overestimated by at most {bounds['domains']:,} "
+                f"with {bounds['domains_confidence']:.2%} probability."
+            )
+    except Exception as e:
+        st.error(f"Error generating approximate link domains: {str(e)}")
+
+    col1, col2 = st.columns(2)
+    for column, histogram, title, unit in ((col1, sketch.lengths, "Message Length Distribution", "characters"),
+                                           (col2, sketch.word_counts, "Words per Message", "words")):
+        with column:
+            st.subheader(title)
+            try:
+                fig = px.bar(histogram.to_frame(), x='bin', y='messages',
+                             labels={'bin': unit.capitalize(), 'messages': 'Messages'})
+                st.plotly_chart(fig, use_container_width=True)
+                median = histogram.quantile(0.5)
+                if median:
+                    low, high = median
+                    st.caption(f"Median between {low} and {high} {unit}." if high is not None
+                               else f"Median at least {low} {unit}.")
+            except Exception as e:
+                st.error(f"Error generating {title.lower()}: {str(e)}")
+
+# Quick profile: structural parse and activity-cube charts only; sentiment
+# can be added in the background to open the full analysis without re-parsing
+if uploaded_file is not None and not approximate_mode and analysis_profile == "Quick":
+    import plotly.express as px
+
+    try:
+        profiler.mark("Quick parse")
+        digest, path = spool_main_upload(uploaded_file)
+        quick_df = cached_quick_preprocess(digest, path)
+    except UnicodeDecodeError as e:
+        st.error(
+            f"Error decoding file: {str(e)}. Please ensure the file is a "
+            "valid WhatsApp chat export in .txt format with UTF-8 encoding."
+        )
+        st.stop()
+    except ValueError as e:
+        st.error(
+            f"Error processing file: {str(e)}. Please ensure the file format "
+            "matches WhatsApp chat export format."
+        )
+        st.stop()
+
+    # Background upgrade to the full profile, one per export
+    upgrades = st.session_state.setdefault('upgrades', {})
+    upgrade = upgrades.get(digest)
+    if upgrade is None:
+        if st.sidebar.button("Upgrade to full analysis in the background"):
+            upgrade = upgrades[digest] = precompute.SentimentUpgrade(quick_df, workers=os.cpu_count()).start()
+    if upgrade is not None:
+        if upgrade.error is not None:
+            st.sidebar.error(f"Upgrade failed: {upgrade.error}")
+        elif upgrade.result is None:
+            st.sidebar.progress(upgrade.progress(), text="Scoring sentiment for the full analysis...")
+            st.sidebar.button("Refresh")
+        else:
+            def open_full_profile():
+                st.session_state.analysis_profile = "Full"
+            st.sidebar.button("Open full analysis", on_click=open_full_profile)
+
+    if start_date and end_date:
+        quick_df = quick_df[(quick_df['only_date'] >= start_date) & (quick_df['only_date'] <= end_date)]
+    chat = comparison.chat_cube(quick_df)
+    chats = {uploaded_file.name: chat}
+
+    st.header("Quick Look")
+    if not chat['messages']:
+        st.info("No messages available in the selected date range.")
+    try:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Messages", f"{chat['messages']:,}")
+        with col2:
+            st.metric("Participants", chat['participants'])
+        with col3:
+            st.metric("Active Days", chat['cube']['day'].nunique())
+    except Exception as e:
+        st.error(f"Error displaying quick statistics: {str(e)}")
+
+    if chat['messages']:
+        st.subheader("Most Busy Users")
+        try:
+            busy = quick_df.loc[quick_df['user'] != 'group_notification', 'user'].value_counts().head(10)
+            fig = px.bar(x=busy.index, y=busy.values, labels={'x': 'User', 'y': 'Messages'})
+            st.plotly_chart(fig, use_container_width=True)
+        except Exception as e:
+            st.error(f"Error generating most busy users: {str(e)}")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Monthly Timeline")
+            try:
+                fig = px.line(comparison.monthly_timeline(chats), x='month', y='messages',
+                              color_discrete_sequence=['green'])
+                st.plotly_chart(fig, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error generating monthly timeline: {str(e)}")
+        with col2:
+            st.subheader("Daily Activity")
+            try:
+                daily = chat['cube'].groupby('day')['messages'].sum()
+                show_calendar_heatmap(helper.calendar_grid(daily.index, daily.values), 'Messages', 'Greens')
+            except Exception as e:
+                st.error(f"Error generating daily timeline: {str(e)}")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Messages by Hour of Day")
+            try:
+                fig = px.bar(comparison.hourly_profile(chats), x='hour', y='percent',
+                             labels={'hour': 'Hour', 'percent': '% of Messages'})
+                st.plotly_chart(fig, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error generating hourly activity: {str(e)}")
+        with col2:
+            st.subheader("Weekly Activity Map")
+            try:
+                fig = px.imshow(comparison.weekly_heatmap(chat), color_continuous_scale='YlGnBu', aspect='auto',
+                                labels={'x': 'Hour', 'y': '', 'color': '% of Messages'})
+                st.plotly_chart(fig, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error generating weekly activity map: {str(e)}")
+
 # Main logic
 df = None
-if uploaded_file is not None:
+if uploaded_file is not None and not approximate_mode and analysis_profile == "Full":
+    # Plotting libraries are only needed once there is a chat to render,
+    # so the upload screen comes up without importing them
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     try:
-        bytes_data = uploaded_file.getvalue()
-        data = bytes_data.decode("utf-8")
-        df = cached_preprocess(data)
+        profiler.mark("Parse upload")
+        spool_main_upload(uploaded_file)
+        stored_summary = None
+        stored_aggregates = None
+        data_key = st.session_state.upload_digest
+        if extra_files:
+            extras = [spooled(f) for f in extra_files]
+            digests = (st.session_state.upload_digest,) + tuple(d for d, _ in extras)
+            paths = (st.session_state.upload_path,) + tuple(p for _, p in extras)
+            df, merge_stats = cached_merge(digests, paths)
+            data_key = hashlib.sha256(''.join(digests).encode()).hexdigest()
+            duplicates = sum(s['duplicates'] for s in merge_stats)
+            st.sidebar.caption(
+                f"Merged {len(paths)} exports into {len(df)} messages ({duplicates} duplicates dropped)."
+            )
+        elif remember_chat and remembered_name and not st.session_state.upload_path.endswith('.zip'):
+            df, stored_summary, stored_aggregates, ingest_status = cached_ingest(
+                st.session_state.upload_digest, remembered_name, st.session_state.upload_path)
+            # The stored chat may hold history this upload no longer has
+            data_key = hashlib.sha256((data_key + ingest_status['chat_id']).encode()).hexdigest()
+            if ingest_status['mode'] == 'appended':
+                st.sidebar.caption(
+                    f"Added {ingest_status['new_messages']} new messages to the remembered chat "
+                    f"({ingest_status['total_messages']} in total)."
+                )
+            elif ingest_status['mode'] == 'unchanged':
+                st.sidebar.caption("No new messages since this chat was last remembered.")
+            elif ingest_status['mode'] == 'replaced':
+                st.sidebar.caption(
+                    f"This export does not continue the chat remembered as \"{remembered_name}\"; "
+                    "it replaces it."
+                )
+        else:
+            if remember_chat and not remembered_name:
+                st.sidebar.caption("Enter a name under \"Remember as\" to remember this chat.")
+            upgrade = st.session_state.get('upgrades', {}).get(st.session_state.upload_digest)
+            if upgrade is not None and upgrade.result is not None:
+                # Scored in the background from the quick profile, no re-parse
+                df = upgrade.result
+            else:
+                df = cached_preprocess(st.session_state.upload_digest, st.session_state.upload_path)
+        media_index = cached_media_index(st.session_state.upload_digest, st.session_state.upload_path)
     except UnicodeDecodeError as e:
         st.error(
             f"Error decoding file: {str(e)}. Please ensure the file is a "
@@ -218,7 +777,12 @@ if uploaded_file is not None:
         st.stop()
 
     # Apply date range filter
+    total_rows = len(df)
+    mention_index = cached_mention_index(data_key, df)
+    membership_events, membership_periods, active_members = cached_membership(data_key, df)
+    chat_end = df['date'].max()
     if start_date and end_date:
+        mention_index = mention_index.between(start_date, end_date)
         df = df[(df['only_date'] >= start_date) & (df['only_date'] <= end_date)]
         if df.empty:
             st.warning("No messages found in the selected date range. Please adjust the dates.")
@@ -231,6 +795,29 @@ if uploaded_file is not None:
     user_list.insert(0, "Overall")
 
     selected_user = st.sidebar.selectbox("Show analysis for", user_list)
+    normalization = st.sidebar.selectbox(
+        "Activity maps and timelines", list(helper.NORMALIZATIONS), format_func=helper.NORMALIZATIONS.get,
+        help="Divide message counts by how often each weekday, month or hour occurs in the chat, "
+             "or by the members in the group each day"
+    )
+    activity_unit = helper.NORMALIZATION_UNITS[normalization]
+
+    # Precompute per-user views in the background so switching users is a lookup
+    profiler.mark("Participant warm-up and summary")
+    view_key = (data_key, str(start_date), str(end_date))
+    warmup = start_user_view_warmup(view_key, df)
+    activity_calendar = None
+    if normalization != 'count':
+        activity_calendar = cached_activity_calendar(view_key, df, membership_periods)
+    if stored_summary is not None and len(df) == total_rows:
+        # No rows were filtered out, so the incrementally merged summary and
+        # aggregates apply
+        user_summary = stored_summary
+    else:
+        user_summary = cached_user_summary(view_key, df)
+        stored_aggregates = None
+    with st.sidebar:
+        live_warmup_status(warmup)
 
     # Show Analysis button
     if st.sidebar.button("Show Analysis"):
@@ -245,9 +832,10 @@ if uploaded_file is not None:
     # Chat Analysis Tab
     with tab1:
         if st.session_state.show_analysis:
+            profiler.mark("Top Statistics")
             st.title("Top Statistics")
             try:
-                num_messages, words, num_media_messages, num_links = helper.chat_fetch_stats(selected_user, df)
+                num_messages, words, num_media_messages, num_links = precompute.user_view(warmup, 'chat_fetch_stats', selected_user, df, source=helper)
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
                     st.header("Total Messages")
@@ -266,9 +854,10 @@ if uploaded_file is not None:
                 num_messages, words, num_media_messages, num_links = 0, 0, 0, 0
 
             # User Activity Timeline
+            profiler.mark("User Activity Timeline")
             st.title("User Activity Timeline")
             try:
-                activity_timeline = helper.user_activity_timeline(selected_user, df)
+                activity_timeline = precompute.user_view(warmup, 'user_activity_timeline', selected_user, df, source=helper)
                 if not activity_timeline.empty:
                     fig = px.bar(
                         activity_timeline, x='hour_12', y='message',
@@ -283,6 +872,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating user activity timeline: {str(e)}")
 
             # Response Time Analysis
+            profiler.mark("Response Time Analysis")
             st.title("Response Time Analysis")
             st.markdown("This shows the average time (in minutes) between responses for each user, indicating their responsiveness.")
             try:
@@ -326,11 +916,129 @@ if uploaded_file is not None:
             except Exception as e:
                 st.error(f"Error generating response time analysis: {str(e)}")
 
+            # Reply Interactions
+            profiler.mark("Reply Interactions")
+            st.title("Reply Interactions")
+            st.markdown(
+                f"Who replies to whom: a message counts as a reply to the previous author when it follows "
+                f"within {helper.SESSION_GAP_MINUTES} minutes."
+            )
+            try:
+                # Replies need every author's messages, so pairs are built
+                # for the whole group and then narrowed to the selected user
+                all_pairs = helper.reply_interactions('Overall', df)
+                if not all_pairs.empty:
+                    degrees = helper.reply_degrees(selected_user, df, pairs=all_pairs)
+                    reply_pairs = all_pairs
+                    if selected_user != 'Overall':
+                        reply_pairs = all_pairs[(all_pairs['user'] == selected_user) |
+                                                (all_pairs['replied_to'] == selected_user)]
+                    top_pairs = reply_pairs.head(15).copy()
+                    top_pairs['pair'] = top_pairs['user'] + ' → ' + top_pairs['replied_to']
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.header("Top Reply Pairs")
+                        fig = px.bar(
+                            top_pairs.iloc[::-1],
+                            x='replies',
+                            y='pair',
+                            orientation='h',
+                            color='median_reply_minutes',
+                            color_continuous_scale='Blues',
+                            labels={'replies': 'Replies', 'pair': '', 'median_reply_minutes': 'Median Minutes'}
+                        )
+                        st.plotly_chart(fig, use_container_width=True)
+                    with col2:
+                        st.header("Who Replies to Whom")
+                        # Dense only for the most connected members
+                        members = helper.reply_degrees('Overall', df, pairs=all_pairs)['user'].head(15).tolist()
+                        matrix = helper.reply_matrix(all_pairs, members)
+                        fig = px.imshow(matrix, color_continuous_scale='YlGnBu', aspect='auto',
+                                        labels={'x': 'Replied To', 'y': 'Replier', 'color': 'Replies'})
+                        st.plotly_chart(fig, use_container_width=True)
+                    st.subheader("Reply Degrees")
+                    st.dataframe(degrees, use_container_width=True)
+                else:
+                    st.info("No replies found in the selected date range.")
+            except Exception as e:
+                st.error(f"Error generating reply interactions: {str(e)}")
+
+            # Mentions
+            profiler.mark("Mentions")
+            st.title("Mentions")
+            try:
+                most_mentioned = mention_index.most_mentioned(selected_user)
+                if not most_mentioned.empty:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.header("Most Mentioned")
+                        top = most_mentioned.head(15)
+                        fig = px.bar(top.iloc[::-1], x='mentions', y='user', orientation='h',
+                                     color='mentions', color_continuous_scale='Purples',
+                                     labels={'mentions': 'Mentions', 'user': ''})
+                        st.plotly_chart(fig, use_container_width=True)
+                    with col2:
+                        st.header("Mentions Over Time")
+                        fig = px.line(mention_index.timeline(selected_user), x='month', y='mentions',
+                                      color_discrete_sequence=['purple'])
+                        fig.update_layout(xaxis_title='Month', yaxis_title='Mentions')
+                        st.plotly_chart(fig, use_container_width=True)
+                    st.header("Who Mentions Whom")
+                    network = mention_index.network(selected_user)
+                    st.dataframe(network.head(50), use_container_width=True)
+                else:
+                    st.info("No @mentions of participants in the selected messages.")
+            except Exception as e:
+                st.error(f"Error generating mention analysis: {str(e)}")
+
+            # Group Membership
+            profiler.mark("Group Membership")
+            st.title("Group Membership")
+            try:
+                events = membership_events
+                if start_date and end_date:
+                    events = events[(events['date'].dt.date >= start_date) & (events['date'].dt.date <= end_date)]
+                if membership_events['event'].isin(membership.STARTS + membership.ENDS).any():
+                    days = df['date'].dt.normalize()
+                    active = active_members[days.min():days.max()]
+                    activity = membership.activity_per_member(df, active)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.header("Active Members")
+                        fig = px.line(activity, x='day', y='active_members', color_discrete_sequence=['teal'])
+                        fig.update_layout(xaxis_title='Date', yaxis_title='Members in the group')
+                        st.plotly_chart(fig, use_container_width=True)
+                    with col2:
+                        st.header("Messages per Active Member")
+                        fig = px.line(activity, x='day', y='messages_per_member', color_discrete_sequence=['darkorange'])
+                        fig.update_layout(xaxis_title='Date', yaxis_title='Messages per member')
+                        st.plotly_chart(fig, use_container_width=True)
+                    timeline = membership.event_timeline(events)
+                    if not timeline.empty:
+                        st.header("Membership Changes per Month")
+                        fig = px.bar(timeline, x='month', y='members', color='event', barmode='group')
+                        fig.update_layout(xaxis_title='Month', yaxis_title='Members')
+                        st.plotly_chart(fig, use_container_width=True)
+                    st.header("Membership Periods")
+                    if selected_user == 'Overall':
+                        st.dataframe(membership.member_table(membership_periods, chat_end), use_container_width=True)
+                    else:
+                        st.dataframe(membership_periods[membership_periods['member'] == selected_user],
+                                     use_container_width=True)
+                else:
+                    st.info("No join or leave notifications found in this chat.")
+            except Exception as e:
+                st.error(f"Error generating membership analysis: {str(e)}")
+
             # Activity Maps
+            profiler.mark("Activity Maps")
             st.title('Activity Maps')
             st.header("Weekly Activity Chart")
             try:
-                busy_day, most_active_day = helper.chat_week_activity_map(selected_user, df)
+                if activity_calendar is None:
+                    busy_day, most_active_day = precompute.user_view(warmup, 'chat_week_activity_map', selected_user, df, source=helper)
+                else:
+                    busy_day, most_active_day = helper.normalized_week_activity_map(selected_user, df, activity_calendar, normalization)
                 if not busy_day.empty:
                     fig = go.Figure()
                     colors = ['#FF9999' if day != most_active_day else '#FF3333' for day in busy_day.index]
@@ -344,7 +1052,7 @@ if uploaded_file is not None:
                     fig.update_layout(
                         title=f'Most Active Day: {most_active_day}',
                         xaxis_title='Day of Week',
-                        yaxis_title='Message Count',
+                        yaxis_title=activity_unit,
                         xaxis_tickangle=45
                     )
                     st.plotly_chart(fig)
@@ -355,7 +1063,10 @@ if uploaded_file is not None:
 
             st.header("Monthly Activity Chart")
             try:
-                busy_month, most_active_month = helper.chat_month_activity_map(selected_user, df)
+                if activity_calendar is None:
+                    busy_month, most_active_month = precompute.user_view(warmup, 'chat_month_activity_map', selected_user, df, source=helper)
+                else:
+                    busy_month, most_active_month = helper.normalized_month_activity_map(selected_user, df, activity_calendar, normalization)
                 if not busy_month.empty:
                     fig = go.Figure()
                     colors = ['#99CCFF' if month != most_active_month else '#3366CC' for month in busy_month.index]
@@ -369,7 +1080,7 @@ if uploaded_file is not None:
                     fig.update_layout(
                         title=f'Most Active Month: {most_active_month}',
                         xaxis_title='Month',
-                        yaxis_title='Message Count',
+                        yaxis_title=activity_unit,
                         xaxis_tickangle=45
                     )
                     st.plotly_chart(fig)
@@ -379,9 +1090,13 @@ if uploaded_file is not None:
                 st.error(f"Error generating monthly activity chart: {str(e)}")
 
             # Weekly Activity Heatmap
+            profiler.mark("Weekly Activity Heatmap")
             st.header("Weekly Activity Heatmap")
             try:
-                user_heatmap, most_active_day, most_active_period, most_busy_hours = helper.chat_activity_heatmap(selected_user, df)
+                if activity_calendar is None:
+                    user_heatmap, most_active_day, most_active_period, most_busy_hours = precompute.user_view(warmup, 'chat_activity_heatmap', selected_user, df, source=helper, stored=stored_aggregates)
+                else:
+                    user_heatmap, most_active_day, most_active_period, most_busy_hours = helper.normalized_activity_heatmap(selected_user, df, activity_calendar, normalization)
                 if not user_heatmap.empty:
                     fig = go.Figure(data=go.Heatmap(
                         z=user_heatmap.values,
@@ -403,7 +1118,7 @@ if uploaded_file is not None:
 
                     # Display Most Busy Hour for Each Day
                     st.subheader("Most Active Hour for Each Day")
-                    most_busy_hours_df = pd.DataFrame(most_busy_hours, columns=['Day', 'Most Active Hour', 'Message Count'])
+                    most_busy_hours_df = pd.DataFrame(most_busy_hours, columns=['Day', 'Most Active Hour', activity_unit])
                     most_busy_hours_df.index = most_busy_hours_df.index + 1
                     st.dataframe(most_busy_hours_df, use_container_width=True)
                 else:
@@ -412,13 +1127,14 @@ if uploaded_file is not None:
                 st.error(f"Error generating weekly activity heatmap: {str(e)}")
 
             # Busiest Users (Group Level)
+            profiler.mark("Busiest Users (Group Level)")
             if selected_user == 'Overall':
                 st.markdown(
                     '<div class="emoji-section-title">Most Busy Users</div>',
                     unsafe_allow_html=True
                 )
                 try:
-                    x, _ = helper.chat_most_busy_users(df)
+                    x, _ = helper.chat_most_busy_users(df, summary=user_summary)
                     if not x.empty:
                         total_messages = x.sum()
                         percentages = (x / total_messages * 100).round(2)
@@ -481,13 +1197,14 @@ if uploaded_file is not None:
                     st.error(f"Error generating most busy users: {str(e)}")
 
             # Emoji Contribution
+            profiler.mark("Emoji Contribution")
             if selected_user == 'Overall':
                 st.markdown(
                     '<div class="emoji-section-title">Emoji Contribution by User</div>',
                     unsafe_allow_html=True
                 )
                 try:
-                    emoji_contribution_df = helper.emoji_contribution(df)
+                    emoji_contribution_df = helper.emoji_contribution(df, summary=user_summary)
                     if not emoji_contribution_df.empty:
                         total_emojis = emoji_contribution_df['emoji_count'].sum()
                         emoji_contribution_df['percentage'] = (emoji_contribution_df['emoji_count'] / total_emojis * 100).round(2)
@@ -541,6 +1258,7 @@ if uploaded_file is not None:
                     st.error(f"Error generating emoji contribution: {str(e)}")
 
             # WordCloud
+            profiler.mark("WordCloud")
             st.title("Wordcloud")
             try:
                 df_wc = helper.chat_create_wordcloud(selected_user, df)
@@ -555,9 +1273,10 @@ if uploaded_file is not None:
                 st.error(f"Error generating wordcloud: {str(e)}")
 
             # Most Common Words
+            profiler.mark("Most Common Words")
             st.title('Most Common Words')
             try:
-                most_common_df = helper.chat_most_common_words(selected_user, df)
+                most_common_df = precompute.user_view(warmup, 'chat_most_common_words', selected_user, df, source=helper, stored=stored_aggregates)
                 if not most_common_df.empty:
                     most_common_df.index = most_common_df.index + 1
                     fig, ax_common_words = plt.subplots()
@@ -570,9 +1289,10 @@ if uploaded_file is not None:
                 st.error(f"Error generating most common words: {str(e)}")
 
             # Emoji Analysis
+            profiler.mark("Emoji Analysis")
             st.title("Emoji Analysis")
             try:
-                emoji_df = helper.chat_emoji_helper(selected_user, df)
+                emoji_df = precompute.user_view(warmup, 'chat_emoji_helper', selected_user, df, source=helper, stored=stored_aggregates)
                 if not emoji_df.empty:
                     emoji_df.index = emoji_df.index + 1
                     col1, col2 = st.columns(2)
@@ -588,13 +1308,17 @@ if uploaded_file is not None:
                 st.error(f"Error generating emoji analysis: {str(e)}")
 
             # Monthly Timeline
+            profiler.mark("Monthly Timeline")
             st.title("Monthly Timeline")
             try:
-                timeline = helper.chat_monthly_timeline(selected_user, df)
+                if activity_calendar is None:
+                    timeline = precompute.user_view(warmup, 'chat_monthly_timeline', selected_user, df, source=helper, stored=stored_aggregates)
+                else:
+                    timeline = helper.normalized_monthly_timeline(selected_user, df, activity_calendar, normalization)
                 if not timeline.empty:
                     fig = px.line(
                         timeline, x='time', y='message', title='Messages Over Time',
-                        color_discrete_sequence=['green']
+                        color_discrete_sequence=['green'], labels={'message': activity_unit}
                     )
                     fig.update_layout(xaxis_tickangle=45)
                     st.plotly_chart(fig)
@@ -604,20 +1328,125 @@ if uploaded_file is not None:
                 st.error(f"Error generating monthly timeline: {str(e)}")
 
             # Daily Timeline
+            profiler.mark("Daily Timeline")
             st.title("Daily Timeline")
             try:
-                daily_timeline = helper.chat_daily_timeline(selected_user, df)
-                if not daily_timeline.empty:
-                    fig, ax_daily = plt.subplots()
-                    ax_daily.plot(daily_timeline['only_date'], daily_timeline['message'], color='black')
-                    plt.xticks(rotation='vertical')
-                    st.pyplot(fig)
+                if activity_calendar is None:
+                    calendar = precompute.user_view(warmup, 'calendar_heatmap', selected_user, df, source=helper)
+                else:
+                    daily_timeline = helper.normalized_daily_timeline(selected_user, df, activity_calendar, normalization)
+                    calendar = {} if daily_timeline.empty else helper.calendar_grid(
+                        daily_timeline['only_date'], daily_timeline['message'])
+                if calendar:
+                    show_calendar_heatmap(calendar, activity_unit, 'Greens')
                 else:
                     st.info("No daily timeline data available.")
             except Exception as e:
                 st.error(f"Error generating daily timeline: {str(e)}")
 
+            # Streaks and Silences
+            profiler.mark("Streaks and Silences")
+            st.title("Streaks and Silences")
+            try:
+                daily_activity = cached_daily_activity(view_key, df)
+                streaks = helper.activity_streaks(selected_user, df, activity=daily_activity)
+                if not streaks.empty:
+                    if selected_user == 'Overall':
+                        st.header("Daily Streaks by Participant")
+                        st.dataframe(streaks, use_container_width=True)
+                    else:
+                        row = streaks.iloc[0]
+                        col1, col2, col3, col4 = st.columns(4)
+                        col1.metric("Longest Streak", f"{row['longest_streak']} days")
+                        col2.metric("Current Streak", f"{row['current_streak']} days")
+                        col3.metric("Longest Gap", f"{row['longest_gap']} days")
+                        col4.metric("Days Since Last Message", row['days_since_last'])
+                        if row['longest_streak']:
+                            st.caption(f"Longest streak: {row['streak_start']} to {row['streak_end']}")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.header("Longest Silences")
+                        silences = helper.silence_gaps(selected_user, df, activity=daily_activity)
+                        if not silences.empty:
+                            st.dataframe(silences, use_container_width=True)
+                        else:
+                            st.info("No full days without messages in the selected range.")
+                    with col2:
+                        st.header("Gaps Between Active Days")
+                        distribution = helper.gap_distribution(selected_user, df, activity=daily_activity)
+                        fig = px.bar(distribution, x='gap_days', y='gaps', color_discrete_sequence=['slategray'])
+                        fig.update_layout(xaxis_title='Gap length (days)', yaxis_title='Gaps')
+                        st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.info("No activity data available for streaks.")
+            except Exception as e:
+                st.error(f"Error generating streaks and silences: {str(e)}")
+
+            # Message Types
+            profiler.mark("Message Types")
+            st.title("Message Types")
+            st.markdown("Media by type, deleted and edited messages, polls and shared locations, "
+                        "as classified when the chat was parsed.")
+            try:
+                kinds_by_user = helper.message_kind_breakdown(selected_user, df)
+                if not kinds_by_user.empty:
+                    totals = kinds_by_user.drop(columns='messages').sum()
+                    other_kinds = totals.drop('text', errors='ignore')
+                    other_kinds = other_kinds[other_kinds > 0]
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.header("Breakdown")
+                        if not other_kinds.empty:
+                            fig = px.pie(values=other_kinds.values, names=other_kinds.index,
+                                         title='Non-text Messages by Type')
+                            st.plotly_chart(fig, use_container_width=True)
+                        else:
+                            st.info("All messages in this range are plain text.")
+                    with col2:
+                        st.header("Over Time")
+                        kind_timeline = helper.message_kind_timeline(selected_user, df)
+                        if not kind_timeline.empty:
+                            fig = px.bar(kind_timeline, x='month', y='messages', color='kind',
+                                         title='Non-text Messages per Month')
+                            fig.update_layout(xaxis_title='Month', yaxis_title='Messages')
+                            st.plotly_chart(fig, use_container_width=True)
+                    st.subheader("Message Types per User")
+                    st.dataframe(kinds_by_user, use_container_width=True)
+                else:
+                    st.info("No messages available for the selected user.")
+            except Exception as e:
+                st.error(f"Error generating message type analysis: {str(e)}")
+
+            # Media in a .zip export
+            if media_index is not None:
+                profiler.mark("Media in Export")
+                st.title("Media in Export")
+                try:
+                    media_table = helper.media_summary(media_index)
+                    if not media_table.empty:
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.header("Attachments")
+                            st.title(int(media_table['files'].sum()))
+                        with col2:
+                            st.header("Size (MB)")
+                            st.title(round(float(media_table['size_mb'].sum()), 1))
+                        st.dataframe(media_table, use_container_width=True)
+                        media_by_month = helper.media_timeline(media_index)
+                        if not media_by_month.empty:
+                            fig = px.bar(
+                                media_by_month, x='month', y='files', color='kind',
+                                title='Attachments per Month'
+                            )
+                            fig.update_layout(xaxis_title='Month', yaxis_title='Files')
+                            st.plotly_chart(fig)
+                    else:
+                        st.info("The export contains no media files.")
+                except Exception as e:
+                    st.error(f"Error generating media analysis: {str(e)}")
+
             # Export Chat Analysis
+            profiler.mark("Export Chat Analysis")
             st.title("Export Chat Analysis")
             try:
                 chat_stats = pd.DataFrame({
@@ -642,9 +1471,10 @@ if uploaded_file is not None:
     with tab2:
         if st.session_state.show_analysis:
             # Sentiment Trend Over Time
+            profiler.mark("Sentiment Trend Over Time")
             st.title("Sentiment Trend Over Time")
             try:
-                sentiment_trend = helper.sentiment_trend(selected_user, df)
+                sentiment_trend = precompute.user_view(warmup, 'sentiment_trend', selected_user, df, source=helper)
                 if not sentiment_trend.empty:
                     fig = px.area(
                         sentiment_trend, x='time', y=['Positive', 'Neutral', 'Negative'],
@@ -659,6 +1489,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating sentiment trend: {str(e)}")
 
             # Sentiment Intensity Distribution
+            profiler.mark("Sentiment Intensity Distribution")
             st.title("Sentiment Intensity Distribution")
             st.markdown("This shows the distribution of sentiment intensity scores (0 to 1) for each sentiment category.")
             try:
@@ -683,6 +1514,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating sentiment intensity distribution: {str(e)}")
 
             # Sentiment Transition Analysis
+            profiler.mark("Sentiment Transition Analysis")
             st.title("Sentiment Transition Analysis")
             st.markdown("This shows how sentiment changes between consecutive messages (e.g., Positive to Negative).")
             try:
@@ -711,6 +1543,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating sentiment transition analysis: {str(e)}")
 
             # Sentiment by Message Length
+            profiler.mark("Sentiment by Message Length")
             st.title("Sentiment by Message Length")
             st.markdown("This shows the average message length for each sentiment category.")
             try:
@@ -735,6 +1568,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating sentiment by message length: {str(e)}")
 
             # Sentiment and Emoji Correlation
+            profiler.mark("Sentiment and Emoji Correlation")
             st.title("Sentiment and Emoji Correlation")
             st.markdown("This shows the top emojis associated with each sentiment category.")
             try:
@@ -765,6 +1599,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating sentiment and emoji correlation: {str(e)}")
 
             # Monthly Activity Maps
+            profiler.mark("Monthly Activity Maps")
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.markdown(
@@ -819,6 +1654,7 @@ if uploaded_file is not None:
                     st.error(f"Error generating negative monthly activity map: {str(e)}")
 
             # Daily Activity Maps
+            profiler.mark("Daily Activity Maps")
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.markdown(
@@ -873,6 +1709,7 @@ if uploaded_file is not None:
                     st.error(f"Error generating negative daily activity map: {str(e)}")
 
             # Weekly Activity Heatmaps
+            profiler.mark("Weekly Activity Heatmaps")
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.markdown(
@@ -924,60 +1761,27 @@ if uploaded_file is not None:
                     st.error(f"Error generating negative weekly activity heatmap: {str(e)}")
 
             # Daily Timelines
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.markdown(
-                    "<h3 style='text-align: center; color: var(--text-color);'>"
-                    "Daily Timeline (Positive)</h3>",
-                    unsafe_allow_html=True
-                )
-                try:
-                    daily_timeline = helper.sentiment_daily_timeline(selected_user, df, 1)
-                    if not daily_timeline.empty:
-                        fig, ax_daily_pos = plt.subplots()
-                        ax_daily_pos.plot(daily_timeline['only_date'], daily_timeline['message'], color='green')
-                        plt.xticks(rotation='vertical')
-                        st.pyplot(fig)
-                    else:
-                        st.info("No positive daily timeline data available.")
-                except Exception as e:
-                    st.error(f"Error generating positive daily timeline: {str(e)}")
-            with col2:
-                st.markdown(
-                    "<h3 style='text-align: center; color: var(--text-color);'>"
-                    "Daily Timeline (Neutral)</h3>",
-                    unsafe_allow_html=True
-                )
-                try:
-                    daily_timeline = helper.sentiment_daily_timeline(selected_user, df, 0)
-                    if not daily_timeline.empty:
-                        fig, ax_daily_neu = plt.subplots()
-                        ax_daily_neu.plot(daily_timeline['only_date'], daily_timeline['message'], color='grey')
-                        plt.xticks(rotation='vertical')
-                        st.pyplot(fig)
-                    else:
-                        st.info("No neutral daily timeline data available.")
-                except Exception as e:
-                    st.error(f"Error generating neutral daily timeline: {str(e)}")
-            with col3:
-                st.markdown(
-                    "<h3 style='text-align: center; color: var(--text-color);'>"
-                    "Daily Timeline (Negative)</h3>",
-                    unsafe_allow_html=True
+            profiler.mark("Daily Timelines")
+            st.markdown(
+                "<h3 style='text-align: center; color: var(--text-color);'>"
+                "Daily Timeline by Sentiment</h3>",
+                unsafe_allow_html=True
+            )
+            try:
+                sentiment_label = st.radio(
+                    "Sentiment", ["Positive", "Neutral", "Negative"], horizontal=True, key='calendar_sentiment'
                 )
-                try:
-                    daily_timeline = helper.sentiment_daily_timeline(selected_user, df, -1)
-                    if not daily_timeline.empty:
-                        fig, ax_daily_neg = plt.subplots()
-                        ax_daily_neg.plot(daily_timeline['only_date'], daily_timeline['message'], color='red')
-                        plt.xticks(rotation='vertical')
-                        st.pyplot(fig)
-                    else:
-                        st.info("No negative daily timeline data available.")
-                except Exception as e:
-                    st.error(f"Error generating negative daily timeline: {str(e)}")
+                k = {'Positive': 1, 'Neutral': 0, 'Negative': -1}[sentiment_label]
+                calendar = helper.calendar_heatmap(selected_user, df, k)
+                if calendar:
+                    show_calendar_heatmap(calendar, 'Messages', {1: 'Greens', 0: 'Greys', -1: 'Reds'}[k])
+                else:
+                    st.info(f"No {sentiment_label.lower()} daily timeline data available.")
+            except Exception as e:
+                st.error(f"Error generating sentiment daily timeline: {str(e)}")
 
             # Monthly Timelines
+            profiler.mark("Monthly Timelines")
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.markdown(
@@ -1041,6 +1845,7 @@ if uploaded_file is not None:
                     st.error(f"Error generating negative monthly timeline: {str(e)}")
 
             # Sentiment Contribution
+            profiler.mark("Sentiment Contribution")
             if selected_user == 'Overall':
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -1050,7 +1855,7 @@ if uploaded_file is not None:
                         unsafe_allow_html=True
                     )
                     try:
-                        x = helper.sentiment_percentage(df, 1)
+                        x = helper.sentiment_percentage(df, 1, summary=user_summary)
                         if not x.empty:
                             x.index = x.index + 1
                             st.dataframe(x)
@@ -1065,7 +1870,7 @@ if uploaded_file is not None:
                         unsafe_allow_html=True
                     )
                     try:
-                        x = helper.sentiment_percentage(df, 0)
+                        x = helper.sentiment_percentage(df, 0, summary=user_summary)
                         if not x.empty:
                             x.index = x.index + 1
                             st.dataframe(x)
@@ -1080,7 +1885,7 @@ if uploaded_file is not None:
                         unsafe_allow_html=True
                     )
                     try:
-                        x = helper.sentiment_percentage(df, -1)
+                        x = helper.sentiment_percentage(df, -1, summary=user_summary)
                         if not x.empty:
                             x.index = x.index + 1
                             st.dataframe(x)
@@ -1090,6 +1895,7 @@ if uploaded_file is not None:
                         st.error(f"Error generating negative contribution: {str(e)}")
 
             # Sentiment WordClouds
+            profiler.mark("Sentiment WordClouds")
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.markdown(
@@ -1144,6 +1950,7 @@ if uploaded_file is not None:
                     st.error(f"Error generating negative wordcloud: {str(e)}")
 
             # Most Common Words by Sentiment
+            profiler.mark("Most Common Words by Sentiment")
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.markdown(
@@ -1207,6 +2014,7 @@ if uploaded_file is not None:
     with tab3:
         if st.session_state.show_analysis:
             if keyword:
+                profiler.mark("Keyword Search")
                 st.title(f"Keyword Search: '{keyword}'")
                 try:
                     keyword_df = helper.keyword_search(selected_user, df, keyword)
@@ -1218,6 +2026,7 @@ if uploaded_file is not None:
                 except Exception as e:
                     st.error(f"Error performing keyword search: {str(e)}")
 
+                profiler.mark("Keyword Timeline")
                 st.title(f"Keyword Timeline: '{keyword}'")
                 try:
                     keyword_timeline = helper.keyword_timeline(selected_user, df, keyword)
@@ -1242,10 +2051,11 @@ if uploaded_file is not None:
     with tab4:
         if st.session_state.show_analysis:
             # Average Message Length by User
+            profiler.mark("Average Message Length by User")
             st.title("Average Message Length by User")
             st.markdown("This shows the average length of messages (in characters) sent by each user.")
             try:
-                length_df = helper.message_length_by_user(selected_user, df)
+                length_df = helper.message_length_by_user(selected_user, df, summary=user_summary)
                 if not length_df.empty:
                     length_df.index = length_df.index + 1
                     fig = px.bar(
@@ -1270,6 +2080,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating average message length by user: {str(e)}")
 
             # Message Length Over Time
+            profiler.mark("Message Length Over Time")
             st.title("Message Length Over Time")
             st.markdown("This shows the average message length over time (by month).")
             try:
@@ -1294,6 +2105,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating message length timeline: {str(e)}")
 
             # Message Length Distribution
+            profiler.mark("Message Length Distribution")
             st.title("Message Length Distribution")
             st.markdown("This shows the distribution of message lengths (in characters).")
             try:
@@ -1317,6 +2129,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating message length distribution: {str(e)}")
 
             # Message Length by Sentiment
+            profiler.mark("Message Length by Sentiment")
             st.title("Message Length by Sentiment")
             st.markdown("This shows the average message length for each sentiment category.")
             try:
@@ -1341,6 +2154,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating message length by sentiment: {str(e)}")
 
             # Message Length by Day of Week
+            profiler.mark("Message Length by Day of Week")
             st.title("Message Length by Day of Week")
             st.markdown("This shows the average message length for each day of the week.")
             try:
@@ -1366,6 +2180,7 @@ if uploaded_file is not None:
                 st.error(f"Error generating message length by day of week: {str(e)}")
 
             # Longest and Shortest Messages
+            profiler.mark("Longest and Shortest Messages")
             st.title("Longest and Shortest Messages")
             st.markdown("This shows the top 5 longest and shortest messages by character count.")
             try:
@@ -1391,5 +2206,24 @@ if uploaded_file is not None:
         else:
             st.info("Click 'Show Analysis' to view the message length analysis.")
 
-else:
+elif not comparison_files and uploaded_file is None:
     st.info("Please upload a WhatsApp chat file to begin analysis.")
+
+# Performance panel
+profiler.finish()
+if show_performance:
+    with st.expander("Performance", expanded=False):
+        timings = profiler.to_frame()
+        if not timings.empty:
+            st.caption(
+                f"{len(timings)} measurements, "
+                f"{timings.loc[timings['kind'] == 'section', 'wall_ms'].sum():.0f} ms in render blocks"
+            )
+            st.dataframe(timings, use_container_width=True)
+        else:
+            st.info("No measurements recorded in this run.")
+    profiler.write_log(
+        file=getattr(uploaded_file, 'name', None),
+        selected_user=locals().get('selected_user'),
+        rows=None if df is None else len(df)
+    )
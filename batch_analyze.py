@@ -0,0 +1,426 @@
+import argparse
+import base64
+import glob
+import hashlib
+import html
+import inspect
+import io
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import benchmark
+import comparison
+import helper
+import ingest
+import preprocessor
+
+# Headless batch analyzer: runs preprocess and every helper.py analysis on
+# one or many exported chats without a Streamlit server. Each chat produces
+# <name>.json and, with --html, a static <name>.html report (<name> gets a
+# short path hash when several inputs share a file name).
+#
+# Examples:
+#   python batch_analyze.py exports/*.txt --out-dir reports --html --workers 8
+#   python batch_analyze.py chat.txt --user "Priya" --keyword party
+#   python batch_analyze.py alice_export.txt bob_export.zip --merge --html
+#   python batch_analyze.py huge_chat.txt --profile quick
+
+SENTIMENTS = {1: 'positive', 0: 'neutral', -1: 'negative'}
+
+
+def to_jsonable(value):
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient='split', date_format='iso', force_ascii=False))
+    if isinstance(value, pd.Series):
+        return json.loads(value.to_json(orient='split', date_format='iso', force_ascii=False))
+    if isinstance(value, (tuple, list)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if hasattr(value, 'words_'):
+        # WordCloud: keep the relative word frequencies it was drawn from
+        return {'words': value.words_}
+    if isinstance(value, pd.Index):
+        return to_jsonable(value.to_numpy())
+    if isinstance(value, np.ndarray):
+        if value.ndim > 1:
+            return [to_jsonable(row) for row in value]
+        # Through pandas so that NaN becomes null and datetimes ISO strings
+        return json.loads(pd.Series(value).to_json(orient='values', date_format='iso', force_ascii=False))
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    return value
+
+
+def run_analyses(df, selected_user='Overall', keyword=None):
+    # Calls every public helper function; sentiment variants run for each k
+    # and normalized views for each normalization
+    results = {}
+    # The per-user summary feeds several group comparisons, the activity
+    # calendar every normalized view and the activity matrix the streak and
+    # gap views; build them once
+    overrides = dict(benchmark.chat_arguments(df), selected_user=selected_user,
+                     summary=helper.user_summary_table(df))
+    if keyword:
+        overrides['keyword'] = keyword
+    for name, func in benchmark.helper_functions():
+        params = inspect.signature(func).parameters
+        if 'keyword' in params and not keyword:
+            continue
+        variants = [(name, {})]
+        if 'k' in params:
+            # k=None (when allowed) is the unfiltered view
+            variants = variants if params['k'].default is None else []
+            variants += [(f"{name}[{label}]", {'k': k}) for k, label in SENTIMENTS.items()]
+        if 'normalization' in params:
+            variants = [(f"{name}[{normalization}]", {'normalization': normalization})
+                        for normalization in helper.NORMALIZATIONS]
+        for key, extra in variants:
+            args = benchmark.call_arguments(func, df, dict(overrides, **extra))
+            if args is None:
+                continue
+            try:
+                results[key] = func(*args)
+            except Exception as e:
+                logging.warning(f"{key} failed: {e}")
+                results[key] = e
+    return results
+
+
+def run_quick_analyses(df, selected_user='Overall'):
+    # Quick profile: message counts and activity charts from the structural
+    # parse and its activity cube; no sentiment, URL, emoji or word scans
+    if selected_user != 'Overall':
+        df = df[df['user'] == selected_user]
+    chat = comparison.chat_cube(df)
+    cube = chat['cube']
+    monthly = comparison.monthly_timeline({'chat': chat})
+    hourly = comparison.hourly_profile({'chat': chat})
+    return {
+        'most_busy_users': df.loc[df['user'] != 'group_notification', 'user'].value_counts(),
+        'monthly_timeline': monthly.drop(columns='chat'),
+        'daily_timeline': cube.groupby('day', as_index=False)['messages'].sum(),
+        'hourly_profile': hourly.drop(columns='chat'),
+        'weekly_heatmap': comparison.weekly_heatmap(chat),
+    }
+
+
+def analyze_text(data, selected_user='Overall', keyword=None):
+    # Returns (parsed DataFrame, raw helper results, JSON metrics bundle)
+    start = time.perf_counter()
+    df = preprocessor.preprocess(data)
+    return analyze_frame(df, selected_user, keyword, parse_seconds=time.perf_counter() - start)
+
+
+def analyze_frame(df, selected_user='Overall', keyword=None, parse_seconds=None, profile='full'):
+    start = time.perf_counter()
+    if profile == 'quick':
+        results = run_quick_analyses(df, selected_user)
+    else:
+        results = run_analyses(df, selected_user, keyword)
+    bundle = {
+        'summary': {
+            'profile': profile,
+            'messages': int((df['user'] != 'group_notification').sum()),
+            'participants': int(df.loc[df['user'] != 'group_notification', 'user'].nunique()),
+            'first_message': str(df['date'].min()) if not df.empty else None,
+            'last_message': str(df['date'].max()) if not df.empty else None,
+            'selected_user': selected_user,
+            'keyword': keyword,
+            'parse_seconds': round(parse_seconds, 3) if parse_seconds is not None else None,
+            'analysis_seconds': round(time.perf_counter() - start, 3),
+        },
+        'analyses': {
+            key: {'error': str(value)} if isinstance(value, Exception) else to_jsonable(value)
+            for key, value in results.items()
+        },
+    }
+    return df, results, bundle
+
+
+# HTML report: plotly equivalents of the dashboard charts
+
+def _ok(results, key):
+    value = results.get(key)
+    if value is None or isinstance(value, Exception):
+        return None
+    if isinstance(value, (pd.DataFrame, pd.Series)) and value.empty:
+        return None
+    return value
+
+
+def report_figures(results):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    colors = {'Positive': 'green', 'Neutral': 'grey', 'Negative': 'red'}
+    figures = []
+
+    def add(title, fig):
+        fig.update_layout(title=title)
+        figures.append((title, fig))
+
+    def add_calendar(title, calendar, colorscale):
+        # One heatmap per year, most recent first, as in the dashboard
+        for year in sorted(calendar, reverse=True):
+            grid = calendar[year]
+            fig = go.Figure(go.Heatmap(z=grid.values, x=grid.columns, y=grid.index,
+                                       customdata=helper.calendar_dates(year),
+                                       hovertemplate="%{customdata}: %{z}<extra></extra>",
+                                       colorscale=colorscale, xgap=2, ygap=2))
+            fig.update_layout(xaxis_title='Week', yaxis={'autorange': 'reversed'}, height=260)
+            add(f'{title} {year}', fig)
+
+    if (value := _ok(results, 'user_activity_timeline')) is not None:
+        add('Messages by Hour of Day', px.bar(value, x='hour_12', y='message', color='message',
+                                              color_continuous_scale='Blues'))
+    if (value := _ok(results, 'response_time_analysis')) is not None and not value[0].empty:
+        add('Average Response Time per User', px.bar(value[0], x='user', y='avg_response_time_minutes',
+                                                     color='avg_response_time_minutes', color_continuous_scale='Reds'))
+        add('Average Response Time Over Time', px.line(value[1], x='only_date', y='avg_response_time_minutes'))
+    if (value := _ok(results, 'reply_interactions')) is not None:
+        top = value.head(15)
+        add('Top Reply Pairs', px.bar(x=top['replies'][::-1], y=(top['user'] + ' → ' + top['replied_to'])[::-1],
+                                      orientation='h'))
+    if (value := _ok(results, 'chat_week_activity_map')) is not None and not value[0].empty:
+        add(f'Most Active Day: {value[1]}', go.Figure(go.Bar(x=value[0].index, y=value[0].values)))
+    if (value := _ok(results, 'chat_month_activity_map')) is not None and not value[0].empty:
+        add(f'Most Active Month: {value[1]}', go.Figure(go.Bar(x=value[0].index, y=value[0].values)))
+    if (value := _ok(results, 'chat_activity_heatmap')) is not None and not value[0].empty:
+        heatmap = value[0]
+        add(f'Most Active Time: {value[1]} {value[2]}', go.Figure(go.Heatmap(
+            z=heatmap.values, x=heatmap.columns, y=heatmap.index, colorscale='Viridis')))
+    if (value := _ok(results, 'chat_most_busy_users')) is not None and not value[0].empty:
+        add('Top 10 Most Busy Users', px.bar(x=value[0].head(10).index, y=value[0].head(10).values))
+    if (value := _ok(results, 'emoji_contribution')) is not None:
+        add('Number of Emojis Sent by Each User', px.pie(value.head(10), values='emoji_count', names='user'))
+    if (value := _ok(results, 'chat_most_common_words')) is not None:
+        add('Most Common Words', px.bar(value, x=1, y=0, orientation='h'))
+    if (value := _ok(results, 'chat_emoji_helper')) is not None:
+        add('Emoji Analysis', px.pie(value.head(), values=1, names=0))
+    if (value := _ok(results, 'chat_monthly_timeline')) is not None:
+        add('Messages Over Time', px.line(value, x='time', y='message', color_discrete_sequence=['green']))
+    if value := _ok(results, 'calendar_heatmap'):
+        add_calendar('Daily Timeline', value, 'Greens')
+    if (value := _ok(results, 'sentiment_trend')) is not None:
+        add('Sentiment Distribution Over Time', px.area(value, x='time', y=['Positive', 'Neutral', 'Negative'],
+                                                        color_discrete_map=colors))
+    if (value := _ok(results, 'sentiment_transition_analysis')) is not None:
+        add('Sentiment Transitions Between Consecutive Messages',
+            px.bar(value, x='Count', y='Transition', orientation='h', color='Count', color_continuous_scale='Blues'))
+    if (value := _ok(results, 'sentiment_by_message_length')) is not None:
+        add('Average Message Length by Sentiment', px.bar(value, x='sentiment_label', y='msg_length'))
+    if (value := _ok(results, 'sentiment_emoji_correlation')) is not None:
+        add('Top Emojis by Sentiment Category', px.bar(value, x='Count', y='Emoji', color='Sentiment',
+                                                       orientation='h', color_discrete_map=colors))
+    for k, label in SENTIMENTS.items():
+        color = colors[label.capitalize()]
+        if (value := _ok(results, f'sentiment_month_activity_map[{label}]')) is not None:
+            add(f'Monthly Activity Map ({label.capitalize()})',
+                px.bar(x=value.index, y=value.values, color_discrete_sequence=[color]))
+        if (value := _ok(results, f'sentiment_week_activity_map[{label}]')) is not None:
+            add(f'Daily Activity Map ({label.capitalize()})',
+                px.bar(x=value.index, y=value.values, color_discrete_sequence=[color]))
+        if (value := _ok(results, f'sentiment_activity_heatmap[{label}]')) is not None:
+            add(f'Weekly Activity Map ({label.capitalize()})',
+                go.Figure(go.Heatmap(z=value.values, x=value.columns, y=value.index)))
+        if (value := _ok(results, f'sentiment_monthly_timeline[{label}]')) is not None:
+            add(f'{label.capitalize()} Messages Over Time',
+                px.line(value, x='time', y='message', color_discrete_sequence=[color]))
+        if value := _ok(results, f'calendar_heatmap[{label}]'):
+            add_calendar(f'Daily Timeline ({label.capitalize()})', value,
+                         {'positive': 'Greens', 'neutral': 'Greys', 'negative': 'Reds'}[label])
+    if (value := _ok(results, 'message_length_by_user')) is not None:
+        add('Average Message Length per User', px.bar(value, x='user', y='avg_length', color='avg_length',
+                                                      color_continuous_scale='Blues'))
+    if (value := _ok(results, 'message_length_timeline')) is not None:
+        add('Average Message Length Over Time', px.line(value, x='time', y='avg_length',
+                                                        color_discrete_sequence=['purple']))
+    if (value := _ok(results, 'message_length_distribution')) is not None:
+        add('Distribution of Message Lengths', px.histogram(x=value, nbins=30, color_discrete_sequence=['teal']))
+    if (value := _ok(results, 'message_length_by_day_of_week')) is not None:
+        add('Average Message Length by Day of Week', px.bar(value, x='day_name', y='msg_length', color='msg_length',
+                                                            color_continuous_scale='Oranges'))
+    if (value := _ok(results, 'keyword_timeline')) is not None:
+        add('Keyword Occurrences Over Time', px.line(value, x='time', y='count'))
+    # Quick profile
+    if (value := _ok(results, 'most_busy_users')) is not None:
+        add('Top 10 Most Busy Users', px.bar(x=value.head(10).index, y=value.head(10).values))
+    if (value := _ok(results, 'monthly_timeline')) is not None:
+        add('Messages Over Time', px.line(value, x='month', y='messages', color_discrete_sequence=['green']))
+    if (value := _ok(results, 'daily_timeline')) is not None:
+        add_calendar('Daily Timeline', helper.calendar_grid(value['day'], value['messages']), 'Greens')
+    if (value := _ok(results, 'hourly_profile')) is not None:
+        add('Messages by Hour of Day (%)', px.bar(value, x='hour', y='percent'))
+    if (value := _ok(results, 'weekly_heatmap')) is not None:
+        add('Weekly Activity Map (% of Messages)', go.Figure(go.Heatmap(
+            z=value.values, x=value.columns, y=value.index, colorscale='Viridis')))
+    return figures
+
+
+def _wordcloud_images(results):
+    images = []
+    for key in ['chat_create_wordcloud'] + [f'sentiment_create_wordcloud[{label}]' for label in SENTIMENTS.values()]:
+        value = results.get(key)
+        if value is None or isinstance(value, Exception):
+            continue
+        buffer = io.BytesIO()
+        value.to_image().save(buffer, format='PNG')
+        images.append((key, base64.b64encode(buffer.getvalue()).decode('ascii')))
+    return images
+
+
+def write_html_report(path, title, bundle, results, plotlyjs='inline'):
+    summary = bundle['summary']
+    stats = results.get('chat_fetch_stats')
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8">',
+        f'<title>{html.escape(title)}</title>',
+        '<style>body{font-family:Arial,sans-serif;margin:24px;color:#2c3e50}'
+        'table{border-collapse:collapse}td,th{padding:6px 12px;border-bottom:1px solid #ddd;text-align:left}'
+        '.chart{margin-bottom:32px}</style></head><body>',
+        f'<h1>WhatsApp Chat &amp; Sentiment Analysis: {html.escape(title)}</h1>',
+        '<table>',
+    ]
+    rows = [('Participants', summary['participants']), ('First message', summary['first_message']),
+            ('Last message', summary['last_message'])]
+    if isinstance(stats, tuple):
+        rows = list(zip(['Total Messages', 'Total Words', 'Media Shared', 'Links Shared'], stats)) + rows
+    elif summary.get('profile') == 'quick':
+        rows = [('Total Messages', summary['messages'])] + rows
+    parts += [f'<tr><th>{html.escape(str(k))}</th><td>{html.escape(str(v))}</td></tr>' for k, v in rows]
+    parts.append('</table>')
+    include = True if plotlyjs == 'inline' else 'cdn'
+    for title_text, fig in report_figures(results):
+        parts.append('<div class="chart">' + fig.to_html(full_html=False, include_plotlyjs=include) + '</div>')
+        include = False
+    for key, image in _wordcloud_images(results):
+        parts.append(f'<div class="chart"><h3>{html.escape(key)}</h3>'
+                     f'<img alt="{html.escape(key)}" src="data:image/png;base64,{image}"></div>')
+    parts.append('</body></html>')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(parts))
+
+
+def process_file(path, out_dir, make_html=False, selected_user='Overall', keyword=None, plotlyjs='inline',
+                 profile='full', name=None):
+    # Runs in a worker process; returns a small status record for the parent
+    start = time.perf_counter()
+    name = name or report_names([path])[path]
+    try:
+        df = preprocessor.preprocess_path(path, sentiment=profile != 'quick')
+        df, results, bundle = analyze_frame(df, selected_user, keyword, time.perf_counter() - start, profile)
+        bundle['summary']['source'] = os.path.abspath(path)
+        json_path = os.path.join(out_dir, name + '.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(bundle, f, ensure_ascii=False)
+        html_path = None
+        if make_html:
+            html_path = os.path.join(out_dir, name + '.html')
+            write_html_report(html_path, name, bundle, results, plotlyjs)
+        return {'file': path, 'json': json_path, 'html': html_path, 'messages': bundle['summary']['messages'],
+                'seconds': round(time.perf_counter() - start, 2), 'error': None}
+    except (UnicodeDecodeError, ValueError, OSError) as e:
+        return {'file': path, 'error': f"{type(e).__name__}: {e}", 'seconds': round(time.perf_counter() - start, 2)}
+
+
+def process_merged(paths, out_dir, make_html=False, selected_user='Overall', keyword=None, plotlyjs='inline',
+                   workers=1, name='merged', profile='full'):
+    # Merges several exports of one group and writes a single report
+    start = time.perf_counter()
+    df, merge_stats = ingest.merge_files(paths, workers=workers, sentiment=profile != 'quick')
+    _, results, bundle = analyze_frame(df, selected_user, keyword, time.perf_counter() - start, profile)
+    bundle['summary']['sources'] = [dict(stats, file=os.path.abspath(path)) for path, stats in zip(paths, merge_stats)]
+    json_path = os.path.join(out_dir, name + '.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(bundle, f, ensure_ascii=False)
+    if make_html:
+        write_html_report(os.path.join(out_dir, name + '.html'), name, bundle, results, plotlyjs)
+    return bundle, json_path
+
+
+def expand_inputs(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, '*.txt')) + glob.glob(os.path.join(item, '*.zip'))))
+        else:
+            paths.extend(sorted(glob.glob(item)) or [item])
+    # A file matched by several inputs is analyzed once
+    seen = set()
+    return [path for path in paths if not (os.path.abspath(path) in seen or seen.add(os.path.abspath(path)))]
+
+
+def report_names(paths):
+    # {path: report name}: the file name without extension, plus a short hash
+    # of the full path when several inputs share it (every export is called
+    # _chat.txt or "WhatsApp Chat with ....zip")
+    stems = {path: os.path.splitext(os.path.basename(path))[0] for path in paths}
+    counts = Counter(stems.values())
+    return {
+        path: f"{stem}-{hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]}" if counts[stem] > 1 else stem
+        for path, stem in stems.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze WhatsApp chat exports without Streamlit.")
+    parser.add_argument('inputs', nargs='+', help="Chat files, globs or directories of .txt and .zip exports")
+    parser.add_argument('--out-dir', default='reports', help="Directory for the JSON bundles and HTML reports")
+    parser.add_argument('--html', action='store_true', help="Also write a static HTML report per chat")
+    parser.add_argument('--plotlyjs', choices=['inline', 'cdn'], default='inline',
+                        help="Embed plotly.js in each report (works offline) or load it from the CDN")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument('--user', default='Overall', help="Participant to analyze (default: Overall)")
+    parser.add_argument('--keyword', help="Keyword for the keyword search and timeline")
+    parser.add_argument('--merge', action='store_true',
+                        help="Treat the inputs as overlapping exports of one group and write one merged report")
+    parser.add_argument('--name', default='merged', help="Report name for --merge")
+    parser.add_argument('--profile', choices=['full', 'quick'], default='full',
+                        help="quick: message counts and activity charts only, skipping sentiment, "
+                             "links, emojis and word clouds")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    paths = expand_inputs(args.inputs)
+    os.makedirs(args.out_dir, exist_ok=True)
+    if args.merge:
+        try:
+            bundle, json_path = process_merged(paths, args.out_dir, args.html, args.user, args.keyword,
+                                               args.plotlyjs, args.workers, args.name, args.profile)
+        except (UnicodeDecodeError, ValueError, OSError) as e:
+            print(f"FAILED merging {len(paths)} exports: {type(e).__name__}: {e}")
+            return 1
+        for source in bundle['summary']['sources']:
+            print(f"{source['file']}: {source['messages']} messages, {source['added']} added, "
+                  f"{source['duplicates']} duplicates")
+        print(f"Merged {bundle['summary']['messages']} messages -> {json_path}")
+        return 0
+    failures = 0
+    names = report_names(paths)
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers or 1, len(paths)))) as pool:
+        futures = [pool.submit(process_file, path, args.out_dir, args.html, args.user, args.keyword, args.plotlyjs,
+                               args.profile, names[path])
+                   for path in paths]
+        for future in as_completed(futures):
+            status = future.result()
+            if status['error']:
+                failures += 1
+                print(f"FAILED {status['file']}: {status['error']}")
+            else:
+                print(f"{status['file']}: {status['messages']} messages in {status['seconds']}s -> {status['json']}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
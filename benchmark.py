@@ -0,0 +1,397 @@
+import argparse
+import inspect
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+import chat_generator
+import helper
+import preprocessor
+
+# Benchmark suite for preprocess and every public function in helper.py.
+# Chats are generated with chat_generator, so runs are offline and repeatable.
+#
+# Examples:
+#   python benchmark.py --sizes 10000,100000 --output bench_results.json
+#   python benchmark.py --baseline bench_baseline.json --threshold 0.25
+#   python benchmark.py --cold-start 5
+#   python benchmark.py --scaling 1,2,4,8,16 --sizes 200000
+#   python benchmark.py --rss --sizes 50000,200000
+#   python benchmark.py --service-load 200 --concurrency 16 --distinct 8 --sizes 5000
+
+# Values passed to helper parameters by name
+BENCH_ARGUMENTS = {
+    'selected_user': 'Overall',
+    'k': 1,
+    'keyword': 'party',
+}
+
+
+def helper_functions():
+    # Every public function defined in helper.py, in source order
+    functions = []
+    for name, func in inspect.getmembers(helper, inspect.isfunction):
+        if name.startswith('_') or func.__module__ != helper.__name__:
+            continue
+        functions.append((inspect.getsourcelines(func)[1], name, func))
+    return [(name, func) for _, name, func in sorted(functions)]
+
+
+def chat_arguments(df):
+    # Values derived from the chat itself, built once per chat and passed to
+    # call_arguments as overrides
+    return {'calendar': helper._activity_calendar(df), 'activity': helper._daily_activity_matrix(df)}
+
+
+def call_arguments(func, df, overrides=None):
+    values = dict(BENCH_ARGUMENTS, **(overrides or {}))
+    args = []
+    for param in inspect.signature(func).parameters.values():
+        if param.name == 'df':
+            args.append(df)
+        elif param.name in values:
+            args.append(values[param.name])
+        elif param.default is inspect.Parameter.empty:
+            return None
+        else:
+            # Keeps the later positional arguments in place
+            args.append(param.default)
+    return args
+
+
+def measure(func, args, rows, repeat):
+    # Peak memory comes from one traced run; wall time is the best untraced run
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    wall = float('inf')
+    cpu = float('inf')
+    for _ in range(repeat):
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        func(*args)
+        wall = min(wall, time.perf_counter() - start_wall)
+        cpu = min(cpu, time.process_time() - start_cpu)
+    return {
+        'wall_s': round(wall, 6),
+        'cpu_s': round(cpu, 6),
+        'peak_mb': round(peak / 2 ** 20, 3),
+        'rows_per_s': round(rows / wall, 1) if wall > 0 else None,
+    }
+
+
+def run_suite(sizes, repeat=1, only=None, seed=0):
+    results = []
+    for size in sizes:
+        data = chat_generator.generate_chat_text(messages=size, seed=seed)
+        logging.info(f"Benchmarking {size} messages ({len(data) / 2 ** 20:.1f} MB)")
+        df = preprocessor.preprocess(data)
+        targets = [('preprocess', preprocessor.preprocess, [data])]
+        chat = chat_arguments(df)
+        for name, func in helper_functions():
+            args = call_arguments(func, df, chat)
+            if args is None:
+                logging.warning(f"Skipping {name}: no benchmark value for its parameters")
+                continue
+            targets.append((name, func, args))
+        for name, func, args in targets:
+            if only and name not in only:
+                continue
+            try:
+                result = measure(func, args, size, repeat)
+            except Exception as e:
+                tracemalloc.stop()
+                logging.error(f"{name} failed at {size} messages: {e}")
+                results.append({'name': name, 'size': size, 'error': str(e)})
+                continue
+            result.update({'name': name, 'size': size})
+            results.append(result)
+            logging.info(f"{name:<36} {size:>10} {result['wall_s']:>10.4f}s {result['peak_mb']:>10.2f} MB")
+    return results
+
+
+def core_scaling(sizes, worker_counts, repeat=1, seed=0):
+    # Wall time of the chunked parallel parse per worker count, with the
+    # speedup over a serial parse and a check that the output is identical
+    results = []
+    for size in sizes:
+        data = chat_generator.generate_chat_text(messages=size, seed=seed)
+        logging.info(f"Core scaling at {size} messages ({len(data) / 2 ** 20:.1f} MB)")
+        serial_df = None
+        serial_wall = None
+        for workers in worker_counts:
+            wall = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                if workers == 1:
+                    df = preprocessor.preprocess(data)
+                else:
+                    df = preprocessor.preprocess_parallel(data, workers)
+                wall = min(wall, time.perf_counter() - start)
+            if serial_df is None:
+                serial_df = df if workers == 1 else preprocessor.preprocess(data)
+                identical = True
+            else:
+                identical = serial_df.equals(df)
+            if workers == 1:
+                serial_wall = wall
+            result = {
+                'name': f"preprocess[workers={workers}]", 'size': size, 'workers': workers,
+                'wall_s': round(wall, 6), 'rows_per_s': round(size / wall, 1) if wall > 0 else None,
+                'speedup': round(serial_wall / wall, 2) if serial_wall else None,
+                'identical': bool(identical),
+            }
+            results.append(result)
+            logging.info(f"{workers:>3} workers {wall:>10.3f}s  speedup {result['speedup']}  identical {identical}")
+    return results
+
+
+# Peak resident memory allowed per MB of uploaded export when parsing from a
+# spooled file (the parsed frame itself accounts for most of it)
+RSS_TARGET_MB_PER_MB = 12
+
+# Runs in a fresh interpreter: parses one export either the old way (bytes,
+# then a decoded str, then preprocess) or from the spooled file, and reports
+# the growth of peak RSS over the interpreter with everything imported.
+RSS_SCRIPT = r'''
+import json, resource, sys
+import preprocessor
+preprocessor.sentiment_analyzer()
+def peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+base = peak_mb()
+mode, path = sys.argv[1], sys.argv[2]
+if mode == 'in_memory':
+    data = open(path, 'rb').read()
+    text = data.decode('utf-8')
+    df = preprocessor.preprocess(text)
+else:
+    df = preprocessor.preprocess_file(path)
+print(json.dumps({'rss_mb': peak_mb() - base, 'rows': len(df)}))
+'''
+
+
+def peak_rss(sizes, seed=0):
+    # Peak-RSS growth per MB uploaded for the in-memory and spooled parse paths
+    import tempfile
+    results = []
+    here = os.path.dirname(os.path.abspath(__file__))
+    for size in sizes:
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', encoding='utf-8', newline='', delete=False) as f:
+            for line in chat_generator.generate_lines(chat_generator.build_parser().parse_args(
+                    ['--messages', str(size), '--seed', str(seed)])):
+                f.write(line)
+        try:
+            upload_mb = os.path.getsize(f.name) / 2 ** 20
+            for mode in ('in_memory', 'spooled'):
+                output = subprocess.run([sys.executable, '-c', RSS_SCRIPT, mode, f.name],
+                                        capture_output=True, text=True, check=True, cwd=here).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                per_mb = result['rss_mb'] / upload_mb
+                results.append({
+                    'name': f"peak_rss[{mode}]", 'size': size, 'upload_mb': round(upload_mb, 2),
+                    'peak_mb': round(result['rss_mb'], 1), 'mb_per_upload_mb': round(per_mb, 2),
+                    'within_target': per_mb <= RSS_TARGET_MB_PER_MB,
+                })
+                logging.info(f"{mode:<10} {size:>10} messages ({upload_mb:.1f} MB): peak RSS +{result['rss_mb']:.0f} MB, "
+                             f"{per_mb:.1f} MB per MB (target {RSS_TARGET_MB_PER_MB})")
+        finally:
+            os.remove(f.name)
+    return results
+
+
+# Runs in a fresh interpreter: renders app.py once with Streamlit's test
+# runner and reports time-to-first-render, outgoing connections and which
+# heavy modules ended up imported.
+COLD_START_SCRIPT = r'''
+import json, socket, sys, time
+start = time.perf_counter()
+connections = []
+_connect = socket.socket.connect
+def connect(self, address):
+    connections.append(str(address))
+    return _connect(self, address)
+socket.socket.connect = connect
+_getaddrinfo = socket.getaddrinfo
+def getaddrinfo(host, *args, **kwargs):
+    if host not in ('localhost', '127.0.0.1', '::1', None):
+        connections.append(str(host))
+    return _getaddrinfo(host, *args, **kwargs)
+socket.getaddrinfo = getaddrinfo
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+print(json.dumps({
+    'first_render_s': time.perf_counter() - start,
+    'network_calls': connections,
+    'heavy_modules': [m for m in ('nltk', 'urlextract', 'wordcloud', 'matplotlib', 'seaborn', 'plotly.express')
+                      if m in sys.modules],
+    'exceptions': [str(e.value) for e in at.exception],
+}))
+'''
+
+
+def cold_start(runs):
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    results = []
+    for i in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', COLD_START_SCRIPT, app_path],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(app_path)
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result.update({'name': 'cold_start', 'size': 0, 'run': i,
+                       'wall_s': round(result.pop('first_render_s'), 4)})
+        results.append(result)
+        logging.info(f"cold start {i}: {result['wall_s']:.3f}s, "
+                     f"{len(result['network_calls'])} network calls, heavy modules: {result['heavy_modules']}")
+    return results
+
+
+def _post(url, body):
+    start = time.perf_counter()
+    request = urllib.request.Request(url, data=body, method='POST', headers={'Content-Type': 'text/plain'})
+    try:
+        with urllib.request.urlopen(request, timeout=600) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def service_load(requests, concurrency, distinct, size, seed=0, url=None, workers=None):
+    # Fires `requests` uploads drawn from `distinct` generated chats at the
+    # analysis service with `concurrency` clients. Without a URL a service is
+    # started on a free localhost port for the duration of the run.
+    server = None
+    if url is None:
+        import threading
+        import service
+        server = service.make_server('127.0.0.1', 0, service.AnalysisService(workers))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+    chats = [chat_generator.generate_chat_text(messages=size, seed=seed + i).encode('utf-8')
+             for i in range(distinct)]
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            outcomes = list(clients.map(lambda i: _post(url + '/analyze', chats[i % distinct]), range(requests)))
+        wall = time.perf_counter() - start
+        with urllib.request.urlopen(url + '/health', timeout=10) as response:
+            health = json.load(response)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            server.service.shutdown()
+
+    latencies = pd.Series([seconds for status, seconds in outcomes if status == 200], dtype='float64')
+    statuses = pd.Series([status for status, _ in outcomes]).value_counts()
+    result = {
+        'name': 'service_load', 'size': size, 'wall_s': round(wall, 4),
+        'requests': requests, 'concurrency': concurrency, 'distinct': distinct,
+        'statuses': {str(k): int(v) for k, v in statuses.items()},
+        'requests_per_s': round(requests / wall, 2) if wall else None,
+        'p50_s': round(latencies.quantile(0.5), 4) if not latencies.empty else None,
+        'p95_s': round(latencies.quantile(0.95), 4) if not latencies.empty else None,
+        'server': health,
+    }
+    logging.info(f"service load: {requests} requests in {wall:.2f}s, statuses {result['statuses']}, "
+                 f"p50 {result['p50_s']}s, p95 {result['p95_s']}s, server {health}")
+    return [result]
+
+
+def compare(results, baseline, threshold):
+    # Returns (name, size, metric, baseline, current) for each regression
+    previous = {(r['name'], r['size']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        base = previous.get((result['name'], result['size']))
+        if base is None or 'error' in result or 'error' in base:
+            continue
+        for metric in ('wall_s', 'peak_mb'):
+            if base.get(metric) and result.get(metric, 0) > base[metric] * (1 + threshold):
+                regressions.append((result['name'], result['size'], metric, base[metric], result[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark preprocess and the helper analyses.")
+    parser.add_argument('--sizes', default='10000,50000', help="Comma-separated chat sizes in messages")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per function (best is kept)")
+    parser.add_argument('--only', default='', help="Comma-separated function names to run")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the generated chats")
+    parser.add_argument('--output', default='bench_results.json', help="Where to write the JSON results")
+    parser.add_argument('--baseline', help="Baseline results JSON to compare against")
+    parser.add_argument('--cold-start', type=int, default=0, metavar='RUNS',
+                        help="Measure time-to-first-render of app.py in RUNS fresh interpreters instead")
+    parser.add_argument('--rss', action='store_true',
+                        help="Measure peak RSS per MB uploaded for the in-memory and spooled parse instead")
+    parser.add_argument('--scaling', metavar='WORKERS',
+                        help="Comma-separated worker counts for the parallel parse scaling run instead")
+    parser.add_argument('--service-load', type=int, default=0, metavar='REQUESTS',
+                        help="Load-test the HTTP analysis service with REQUESTS uploads instead")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients for --service-load")
+    parser.add_argument('--distinct', type=int, default=4, help="Different chats uploaded by --service-load")
+    parser.add_argument('--service-url', help="Running service to load-test (default: start one locally)")
+    parser.add_argument('--service-workers', type=int, help="Worker processes for the locally started service")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed slowdown/memory growth over the baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.INFO)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    only = {s for s in args.only.split(',') if s}
+    if args.cold_start:
+        results = cold_start(args.cold_start)
+    elif args.rss:
+        results = peak_rss(sizes, seed=args.seed)
+    elif args.scaling:
+        worker_counts = [int(s) for s in args.scaling.split(',') if s]
+        results = core_scaling(sizes, worker_counts, repeat=args.repeat, seed=args.seed)
+    elif args.service_load:
+        results = service_load(args.service_load, args.concurrency, args.distinct, sizes[0], args.seed,
+                               args.service_url, args.service_workers)
+    else:
+        results = run_suite(sizes, repeat=args.repeat, only=only, seed=args.seed)
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Wrote {len(results)} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, size, metric, before, after in regressions:
+            print(f"REGRESSION {name} @ {size}: {metric} {before} -> {after}")
+        if regressions:
+            return 1
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
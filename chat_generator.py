@@ -0,0 +1,157 @@
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+
+# Synthetic WhatsApp export generator for load and scaling tests.
+# Output follows the "DD/MM/YY, HH:MM - User: Message" layout that
+# preprocessor.preprocess expects, and is fully determined by the seed.
+#
+# Example:
+#   python chat_generator.py --messages 1000000 --participants 50 --seed 7 -o chat_1m.txt
+
+HINGLISH_WORDS = [
+    'haan', 'nahi', 'kya', 'kyun', 'kaise', 'yaar', 'bhai', 'accha', 'theek', 'hai',
+    'tha', 'thi', 'kal', 'aaj', 'abhi', 'chalo', 'bas', 'matlab', 'sahi', 'bohot',
+    'bahut', 'pakka', 'mast', 'jaldi', 'baad', 'mein', 'kuch', 'sab', 'log', 'ghar',
+    'khana', 'paani', 'chai', 'milte', 'dekho', 'suno', 'bolo', 'karo', 'kar', 'raha',
+    'rahi', 'hoga', 'gaya', 'gayi', 'arre', 'achha', 'shukriya', 'dost', 'pyaar', 'mazaa',
+]
+
+ENGLISH_WORDS = [
+    'ok', 'okay', 'yes', 'no', 'good', 'great', 'bad', 'sad', 'happy', 'love',
+    'hate', 'thanks', 'please', 'sorry', 'meeting', 'tomorrow', 'today', 'party', 'movie', 'game',
+    'call', 'later', 'now', 'work', 'office', 'home', 'food', 'trip', 'photo', 'birthday',
+    'awesome', 'terrible', 'nice', 'cool', 'done', 'sure', 'maybe', 'never', 'always', 'lol',
+]
+
+EMOJIS = ['😂', '❤', '😍', '👍', '🙏', '😊', '😭', '🔥', '😁', '🤣', '😢', '😡', '🎉', '👌', '😎']
+
+FIRST_NAMES = [
+    'Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Sneha', 'Arjun', 'Kavya', 'Rohan', 'Isha',
+    'Aditya', 'Meera', 'Karan', 'Pooja', 'Nikhil', 'Riya', 'Siddharth', 'Neha', 'Varun', 'Zoya',
+]
+
+DOMAINS = ['youtube.com', 'instagram.com', 'github.com', 'example.com', 'news.example.org', 'maps.google.com']
+
+NOTIFICATIONS = [
+    "{user} joined using this group's invite link",
+    "{user} left",
+    "{user} changed this group's icon",
+]
+
+
+def participant_names(count, rng):
+    names = []
+    for i in range(count):
+        if i % 10 == 9:
+            # Unsaved contacts show up as phone numbers in exports
+            names.append(f"+91 9{rng.randrange(1000, 10000)} {rng.randrange(10000, 100000)}")
+        else:
+            suffix = '' if i < len(FIRST_NAMES) else f" {i // len(FIRST_NAMES)}"
+            names.append(FIRST_NAMES[i % len(FIRST_NAMES)] + suffix)
+    return names
+
+
+def generate_message(rng, args):
+    roll = rng.random()
+    if roll < args.media_ratio:
+        return '<Media omitted>'
+    words = []
+    for _ in range(rng.randint(1, args.max_words)):
+        if rng.random() < args.emoji_density:
+            words.append(rng.choice(EMOJIS))
+        elif rng.random() < args.hinglish_ratio:
+            words.append(rng.choice(HINGLISH_WORDS))
+        else:
+            words.append(rng.choice(ENGLISH_WORDS))
+    if roll < args.media_ratio + args.link_ratio:
+        words.append(f"https://{rng.choice(DOMAINS)}/{rng.randrange(10 ** 6)}")
+    text = ' '.join(words)
+    if rng.random() < args.multiline_ratio:
+        extra = rng.randint(1, 3)
+        text += ''.join('\n' + ' '.join(rng.choice(ENGLISH_WORDS) for _ in range(rng.randint(1, 6)))
+                        for _ in range(extra))
+    return text
+
+
+def generate_lines(args):
+    # Yields the export line by line so 10M-message chats never sit in memory
+    rng = random.Random(args.seed)
+    users = participant_names(args.participants, rng)
+    start = datetime.strptime(args.start, '%Y-%m-%d')
+    step = args.days * 24 * 60 / max(args.messages, 1)
+    current_day, prefix = None, ''
+    for i in range(args.messages):
+        minute = int(i * step + rng.random() * step)
+        day, minute_of_day = divmod(minute, 24 * 60)
+        if day != current_day:
+            d = start + timedelta(days=day)
+            if args.date_order == 'dmy':
+                prefix = f"{d.day:02d}/{d.month:02d}/{d.year % 100:02d}, "
+            else:
+                prefix = f"{d.month:02d}/{d.day:02d}/{d.year % 100:02d}, "
+            current_day = day
+        hour, minute = divmod(minute_of_day, 60)
+        stamp = f"{prefix}{hour:02d}:{minute:02d} - "
+        user = users[int(rng.paretovariate(1.2)) % len(users)] if args.skewed else rng.choice(users)
+        if rng.random() < args.notification_ratio:
+            yield stamp + rng.choice(NOTIFICATIONS).format(user=user) + '\n'
+        else:
+            text = generate_message(rng, args)
+            if args.mention_ratio and rng.random() < args.mention_ratio:
+                mentioned = rng.choice(users)
+                # Saved contacts are mentioned by name, unsaved ones by number
+                tag = mentioned.replace(' ', '').lstrip('+') if mentioned.startswith('+') else mentioned
+                text = f"@{tag} {text}"
+            yield f"{stamp}{user}: {text}\n"
+
+
+def generate_chat_text(**options):
+    # Convenience wrapper for benchmarks: returns the whole export as a string
+    args = build_parser().parse_args([])
+    for key, value in options.items():
+        setattr(args, key, value)
+    return ''.join(generate_lines(args))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate a synthetic WhatsApp chat export.")
+    parser.add_argument('--messages', type=int, default=10000, help="Number of messages to generate")
+    parser.add_argument('--participants', type=int, default=8, help="Number of distinct authors")
+    parser.add_argument('--start', default='2020-01-01', help="First day of the chat (YYYY-MM-DD)")
+    parser.add_argument('--days', type=int, default=365, help="Date span of the chat in days")
+    parser.add_argument('--multiline-ratio', type=float, default=0.05, help="Share of messages spanning several lines")
+    parser.add_argument('--emoji-density', type=float, default=0.08, help="Probability that a word slot is an emoji")
+    parser.add_argument('--media-ratio', type=float, default=0.04, help="Share of '<Media omitted>' messages")
+    parser.add_argument('--link-ratio', type=float, default=0.03, help="Share of messages containing a link")
+    parser.add_argument('--hinglish-ratio', type=float, default=0.5, help="Share of words drawn from the Hinglish vocabulary")
+    parser.add_argument('--notification-ratio', type=float, default=0.005, help="Share of group notification lines")
+    parser.add_argument('--mention-ratio', type=float, default=0.0, help="Share of messages starting with an @mention")
+    parser.add_argument('--max-words', type=int, default=15, help="Maximum words per message line")
+    parser.add_argument('--date-order', choices=['dmy', 'mdy'], default='dmy',
+                        help="Day/month order of timestamps (mdy needs a span reaching day 13 or later)")
+    parser.add_argument('--skewed', action='store_true', help="Give authors a long-tailed activity distribution")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed; equal seeds produce identical files")
+    parser.add_argument('-o', '--output', default='-', help="Output file (default: stdout)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='\n')
+    try:
+        buffer = []
+        for line in generate_lines(args):
+            buffer.append(line)
+            if len(buffer) >= 10000:
+                out.write(''.join(buffer))
+                buffer.clear()
+        out.write(''.join(buffer))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
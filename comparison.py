@@ -0,0 +1,167 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import preprocessor
+
+# Multi-chat comparison. Every chat is reduced once to an activity cube:
+# message and word counts per (day, hour, sentiment). Timelines, heatmaps and
+# sentiment mixes for any set of chats are then cheap reductions of the cubes,
+# and CubeCache keeps cubes by content digest so adding a chat to the
+# comparison never re-parses the ones already loaded.
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+SENTIMENT_NAMES = {1: 'Positive', 0: 'Neutral', -1: 'Negative'}
+
+
+def chat_cube(df):
+    # Returns {'cube': DataFrame, 'senders': DataFrame, 'messages', 'participants',
+    # 'first_message', 'last_message'}. 'senders' has one row per (day, user)
+    # so the totals can be recomputed for a date range. Frames parsed without
+    # sentiment (the quick profile) give a cube without the value dimension.
+    messages = df[df['user'] != 'group_notification']
+    per_message = pd.DataFrame({
+        'day': messages['date'].dt.normalize(),
+        'hour': messages['hour'],
+        'words': messages['message'].astype(str).str.split().str.len(),
+    })
+    keys = ['day', 'hour']
+    if 'value' in messages:
+        per_message['value'] = messages['value']
+        keys.append('value')
+    cube = per_message.groupby(keys).agg(
+        messages=('words', 'size'),
+        words=('words', 'sum'),
+    ).reset_index()
+    senders = messages.groupby([per_message['day'], messages['user']]).agg(
+        messages=('date', 'size'),
+        first_message=('date', 'min'),
+        last_message=('date', 'max'),
+    ).reset_index()
+    return _with_totals(cube, senders)
+
+
+def _with_totals(cube, senders):
+    return {
+        'cube': cube,
+        'senders': senders,
+        'messages': int(senders['messages'].sum()),
+        'participants': int(senders['user'].nunique()),
+        'first_message': senders['first_message'].min() if len(senders) else None,
+        'last_message': senders['last_message'].max() if len(senders) else None,
+    }
+
+
+def filter_chat(chat, start_date, end_date):
+    # The chat restricted to days in [start_date, end_date], totals included
+    cube_days = chat['cube']['day'].dt.date
+    sender_days = chat['senders']['day'].dt.date
+    return _with_totals(chat['cube'][(cube_days >= start_date) & (cube_days <= end_date)],
+                        chat['senders'][(sender_days >= start_date) & (sender_days <= end_date)])
+
+
+def cube_from_file(path):
+    # Runs in a worker process; only the small cube travels back
+    if path.lower().endswith('.zip'):
+        df = preprocessor.preprocess_zip(path)
+    else:
+        df = preprocessor.preprocess_file(path)
+    return chat_cube(df)
+
+
+class CubeCache:
+    # Cubes by content digest, shared by every session of the app
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._cubes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, items, workers=None):
+        # items: [(digest, path)]; returns {digest: cube}. Chats not seen
+        # before are parsed in parallel, cached ones are only looked up.
+        with self._lock:
+            missing = {digest: path for digest, path in items if digest not in self._cubes}
+        if missing:
+            workers = min(workers or os.cpu_count() or 1, len(missing))
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    cubes = dict(zip(missing, pool.map(cube_from_file, missing.values())))
+            else:
+                cubes = {digest: cube_from_file(path) for digest, path in missing.items()}
+            with self._lock:
+                self._cubes.update(cubes)
+        with self._lock:
+            result = {}
+            for digest, _ in items:
+                self._cubes.move_to_end(digest)
+                result[digest] = self._cubes[digest]
+            while len(self._cubes) > self.max_entries:
+                self._cubes.popitem(last=False)
+        return result
+
+
+def _cubes_by_name(chats):
+    # chats: {display name: cube}
+    frames = [chat['cube'].assign(chat=name) for name, chat in chats.items() if not chat['cube'].empty]
+    if not frames:
+        return pd.DataFrame(columns=['day', 'hour', 'value', 'messages', 'words', 'chat'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def overview(chats):
+    rows = []
+    for name, chat in chats.items():
+        cube = chat['cube']
+        total = cube['messages'].sum()
+        rows.append({
+            'Chat': name,
+            'Messages': chat['messages'],
+            'Participants': chat['participants'],
+            'First Message': chat['first_message'],
+            'Last Message': chat['last_message'],
+            'Active Days': cube['day'].nunique(),
+            'Messages per Active Day': round(total / cube['day'].nunique(), 1) if total else 0,
+            'Words per Message': round(cube['words'].sum() / total, 1) if total else 0,
+        })
+    return pd.DataFrame(rows)
+
+
+def monthly_timeline(chats):
+    cubes = _cubes_by_name(chats)
+    timeline = cubes.groupby(['chat', cubes['day'].dt.to_period('M').rename('month')])['messages'].sum()
+    timeline = timeline.reset_index()
+    timeline['month'] = timeline['month'].dt.to_timestamp()
+    return timeline
+
+
+def hourly_profile(chats):
+    # Share of each chat's messages per hour of day, so chats of any size compare
+    cubes = _cubes_by_name(chats)
+    profile = cubes.groupby(['chat', 'hour'])['messages'].sum().unstack(fill_value=0)
+    profile = profile.reindex(columns=range(24), fill_value=0)
+    profile = (profile.div(profile.sum(axis=1), axis=0) * 100).round(2)
+    return profile.stack().rename('percent').reset_index()
+
+
+def weekly_heatmap(chat):
+    # Share of one chat's messages per weekday and hour
+    cube = chat['cube']
+    if cube.empty:
+        return pd.DataFrame()
+    heatmap = cube.groupby([cube['day'].dt.dayofweek.rename('weekday'), 'hour'])['messages'].sum().unstack(fill_value=0)
+    heatmap = heatmap.reindex(index=range(7), columns=range(24), fill_value=0)
+    heatmap.index = DAY_NAMES
+    return (heatmap / max(heatmap.values.sum(), 1) * 100).round(2)
+
+
+def sentiment_mix(chats):
+    cubes = _cubes_by_name(chats)
+    mix = cubes.groupby(['chat', 'value'])['messages'].sum().unstack(fill_value=0)
+    mix = mix.reindex(columns=list(SENTIMENT_NAMES), fill_value=0)
+    mix = (mix.div(mix.sum(axis=1), axis=0) * 100).round(2)
+    mix.columns = [SENTIMENT_NAMES[v] for v in mix.columns]
+    return mix.reset_index().melt(id_vars='chat', var_name='sentiment', value_name='percent')
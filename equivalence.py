@@ -0,0 +1,214 @@
+import argparse
+import importlib
+import inspect
+import logging
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+import benchmark
+import chat_generator
+import helper
+import preprocessor
+
+# Golden-output equivalence harness. Runs the reference implementation
+# (preprocessor.preprocess and helper.py) and a candidate module exposing
+# functions with the same names on the same fixture chats, and reports
+# mismatches per function.
+#
+# Examples:
+#   python equivalence.py --candidate fast_helper
+#   python equivalence.py --candidate fast_helper --chat my_export.txt --only chat_fetch_stats
+
+# Generated fixture chats: name -> chat_generator options
+FIXTURES = {
+    'small_dmy': {'messages': 300, 'participants': 4, 'seed': 1},
+    'mdy_dates': {'messages': 2000, 'participants': 6, 'seed': 2, 'date_order': 'mdy'},
+    'multiline_heavy': {'messages': 2000, 'participants': 5, 'seed': 3, 'multiline_ratio': 0.4},
+    'emoji_media_heavy': {'messages': 2000, 'participants': 12, 'seed': 4,
+                          'emoji_density': 0.4, 'media_ratio': 0.2, 'link_ratio': 0.2},
+    'large_group': {'messages': 20000, 'participants': 150, 'seed': 5, 'skewed': True},
+}
+
+# Default tolerance rules, overridable per function in COMPARISON_RULES
+DEFAULT_RULES = {
+    'ignore_order': False,   # compare rows as a multiset instead of a sequence
+    'ignore_index': True,    # ignore RangeIndex labels left over from filtering
+    'rtol': 1e-9,
+    'atol': 1e-9,
+}
+
+# Rankings whose ties may legitimately come out in a different order
+COMPARISON_RULES = {
+    'chat_most_busy_users': {'ignore_order': True},
+    'emoji_contribution': {'ignore_order': True},
+    'chat_most_common_words': {'ignore_order': True},
+    'chat_emoji_helper': {'ignore_order': True},
+    'sentiment_percentage': {'ignore_order': True},
+    'sentiment_most_common_words': {'ignore_order': True},
+    'sentiment_transition_analysis': {'ignore_order': True},
+    'sentiment_emoji_correlation': {'ignore_order': True},
+    'message_length_by_user': {'ignore_order': True},
+    'extreme_messages': {'ignore_order': True},
+    'user_summary_table': {'ignore_order': True, 'ignore_index': False},
+}
+
+
+class Mismatch(Exception):
+    pass
+
+
+def _normalize_frame(frame, rules):
+    if isinstance(frame, pd.Series):
+        frame = frame.to_frame(name=frame.name if frame.name is not None else 0)
+    frame = frame.copy()
+    # Unnamed integer indexes are row positions left over from filtering;
+    # labelled indexes (day names, users, ...) are part of the result
+    positional = frame.index.name is None and pd.api.types.is_integer_dtype(frame.index)
+    frame = frame.reset_index(drop=rules['ignore_index'] and positional)
+    frame.columns = [str(c) for c in frame.columns]
+    for column in frame.columns:
+        # dtype normalization: categories and nullable types compare by value
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype(object)
+        elif pd.api.types.is_bool_dtype(frame[column]) or pd.api.types.is_integer_dtype(frame[column]):
+            frame[column] = frame[column].astype('float64')
+        elif pd.api.types.is_float_dtype(frame[column]):
+            frame[column] = frame[column].astype('float64')
+    if rules['ignore_order'] and not frame.empty:
+        frame = frame.sort_values(list(frame.columns), kind='stable', key=lambda s: s.astype(str))
+    return frame.reset_index(drop=True)
+
+
+def compare(reference, candidate, rules, path='result'):
+    # Raises Mismatch describing the first difference found
+    if isinstance(reference, (pd.DataFrame, pd.Series)) or isinstance(candidate, (pd.DataFrame, pd.Series)):
+        if not isinstance(candidate, (pd.DataFrame, pd.Series)) or not isinstance(reference, (pd.DataFrame, pd.Series)):
+            raise Mismatch(f"{path}: {type(reference).__name__} vs {type(candidate).__name__}")
+        if reference.empty and candidate.empty:
+            return
+        left, right = _normalize_frame(reference, rules), _normalize_frame(candidate, rules)
+        try:
+            pd.testing.assert_frame_equal(
+                left, right, check_dtype=False, check_exact=False,
+                rtol=rules['rtol'], atol=rules['atol'], check_index_type=False, check_column_type=False,
+            )
+        except AssertionError as e:
+            raise Mismatch(f"{path}: {str(e).strip()}")
+    elif isinstance(reference, (tuple, list)):
+        if not isinstance(candidate, (tuple, list)) or len(reference) != len(candidate):
+            raise Mismatch(f"{path}: sequence shape differs")
+        for i, (a, b) in enumerate(zip(reference, candidate)):
+            compare(a, b, rules, f"{path}[{i}]")
+    elif isinstance(reference, dict):
+        # Keyed results such as the per-year calendar grids
+        if not isinstance(candidate, dict) or list(reference) != list(candidate):
+            raise Mismatch(f"{path}: keys differ")
+        for key in reference:
+            compare(reference[key], candidate[key], rules, f"{path}[{key!r}]")
+    elif isinstance(reference, pd.Index):
+        try:
+            pd.testing.assert_index_equal(reference, candidate, exact=False)
+        except (AssertionError, TypeError) as e:
+            raise Mismatch(f"{path}: {str(e).strip()}")
+    elif isinstance(reference, np.ndarray) or isinstance(candidate, np.ndarray):
+        try:
+            np.testing.assert_allclose(np.asarray(reference, dtype=float), np.asarray(candidate, dtype=float),
+                                       rtol=rules['rtol'], atol=rules['atol'])
+        except (AssertionError, TypeError, ValueError) as e:
+            raise Mismatch(f"{path}: {str(e).strip()}")
+    elif hasattr(reference, 'words_'):
+        # WordCloud objects are compared by their word frequencies
+        compare(pd.Series(reference.words_, dtype='float64').sort_index(),
+                pd.Series(getattr(candidate, 'words_', {}), dtype='float64').sort_index(), rules, path)
+    elif isinstance(reference, (int, float, np.number)) and isinstance(candidate, (int, float, np.number)):
+        if not math.isclose(float(reference), float(candidate), rel_tol=rules['rtol'], abs_tol=rules['atol']):
+            raise Mismatch(f"{path}: {reference} != {candidate}")
+    elif reference != candidate:
+        raise Mismatch(f"{path}: {reference!r} != {candidate!r}")
+
+
+def fixture_chats(paths=()):
+    chats = {name: chat_generator.generate_chat_text(**options) for name, options in FIXTURES.items()}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            chats[path] = f.read()
+    return chats
+
+
+def run(candidate, chats, only=None, reference=helper, reference_preprocess=preprocessor.preprocess):
+    # Returns {function name: [(chat name, error message or None), ...]}
+    report = {}
+    candidate_preprocess = getattr(candidate, 'preprocess', None)
+    for chat_name, data in chats.items():
+        df = reference_preprocess(data)
+        if candidate_preprocess is not None and (not only or 'preprocess' in only):
+            report.setdefault('preprocess', []).append(
+                (chat_name, _check(reference_preprocess, candidate_preprocess, [data], 'preprocess')))
+        users = [u for u in df['user'].value_counts().index if u != 'group_notification'][:2]
+        chat = benchmark.chat_arguments(df)
+        for name, func in benchmark.helper_functions():
+            if only and name not in only:
+                continue
+            candidate_func = getattr(candidate, name, None)
+            if candidate_func is None or candidate_func is func and candidate is not reference:
+                continue
+            per_user = 'selected_user' in inspect.signature(func).parameters
+            for selected_user in ['Overall'] + (users if per_user else []):
+                args = benchmark.call_arguments(func, df, dict(chat, selected_user=selected_user))
+                if args is None:
+                    break
+                label = chat_name if selected_user == 'Overall' else f"{chat_name}/{selected_user}"
+                report.setdefault(name, []).append((label, _check(func, candidate_func, args, name)))
+    return report
+
+
+def _check(reference_func, candidate_func, args, name):
+    rules = dict(DEFAULT_RULES, **COMPARISON_RULES.get(name, {}))
+    try:
+        expected = reference_func(*args)
+    except Exception as e:
+        expected = e
+    try:
+        actual = candidate_func(*args)
+    except Exception as e:
+        actual = e
+    if isinstance(expected, Exception) or isinstance(actual, Exception):
+        if type(expected) is type(actual):
+            return None
+        return f"raised {type(expected).__name__} vs {type(actual).__name__}: {actual if isinstance(actual, Exception) else expected}"
+    try:
+        compare(expected, actual, rules)
+    except Mismatch as e:
+        return str(e)
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check a candidate implementation against helper.py.")
+    parser.add_argument('--candidate', required=True, help="Module exposing candidate functions (and optionally preprocess)")
+    parser.add_argument('--chat', action='append', default=[], help="Extra chat export to include as a fixture")
+    parser.add_argument('--only', default='', help="Comma-separated function names to check")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    candidate = importlib.import_module(args.candidate)
+    only = {s for s in args.only.split(',') if s}
+    report = run(candidate, fixture_chats(args.chat), only=only)
+    failures = 0
+    for name, checks in report.items():
+        bad = [(label, error) for label, error in checks if error]
+        status = 'OK' if not bad else f"MISMATCH ({len(bad)}/{len(checks)})"
+        print(f"{name:<36} {status}")
+        for label, error in bad:
+            print(f"    {label}: {error.splitlines()[0]}")
+        failures += len(bad)
+    if not report:
+        print(f"{args.candidate} defines none of the reference functions")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
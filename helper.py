@@ -1,15 +1,44 @@
-from urlextract import URLExtract
-from wordcloud import WordCloud
+import numpy as np
 import pandas as pd
 from collections import Counter
 import emoji
 import re
+import os
 import logging
+import functools
+
+import membership
+import preprocessor
 
 # Configure basic logging
 logging.basicConfig(level=logging.INFO)
 
-extract = URLExtract()
+@functools.lru_cache(maxsize=None)
+def _url_extractor():
+    # URLExtract loads its TLD list when constructed, so build it on first use
+    from urlextract import URLExtract
+    return URLExtract()
+
+def _find_urls(text):
+    # Every URL URLExtract can find contains a dot before its TLD
+    if '.' not in text:
+        return []
+    return _url_extractor().find_urls(text)
+
+def _wordcloud():
+    from wordcloud import WordCloud
+    return WordCloud(width=500, height=500, min_font_size=10, background_color='white')
+
+STOP_WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stop_hinglish.txt')
+
+def _message_kinds(df):
+    # The parsed 'kind' column; frames stored before it existed are classified here
+    if 'kind' in df:
+        return df['kind']
+    return pd.Series(preprocessor.classify_messages(df['message'].astype(str)), index=df.index, name='kind')
+
+def _media_mask(df):
+    return _message_kinds(df).isin(preprocessor.MEDIA_KINDS)
 
 # Chat Analysis Functions
 def chat_fetch_stats(selected_user, df):
@@ -20,80 +49,84 @@ def chat_fetch_stats(selected_user, df):
     words = []
     for message in df['message']:
         words.extend(message.split())
-    num_media_messages = df[df['message'].str.contains('<Media omitted>', na=False)].shape[0]
+    num_media_messages = df[_media_mask(df)].shape[0]
     links = []
     for message in df['message']:
-        links.extend(extract.find_urls(str(message)))
+        links.extend(_find_urls(str(message)))
     return num_messages, len(words), num_media_messages, len(links)
 
-def chat_most_busy_users(df):
-    df = df[df['user'] != 'group_notification'].copy()
-    if df.empty:
+def chat_most_busy_users(df, summary=None):
+    if summary is None:
+        summary = user_summary_table(df, scans=())
+    if summary.empty:
         return pd.Series(), pd.DataFrame()
-    x = df['user'].value_counts()
-    df_percent = round((df['user'].value_counts() / df.shape[0]) * 100, 2).reset_index().rename(
-        columns={'index': 'Name', 'user': 'Percent'})
+    x = summary['messages'].sort_values(ascending=False, kind='stable').rename('count')
+    df_percent = round((x / x.sum()) * 100, 2).reset_index()
+    df_percent.columns = ['Name', 'Percent']
     return x, df_percent
 
 def chat_create_wordcloud(selected_user, df):
     if selected_user != 'Overall':
         df = df[df['user'] == selected_user]
     df = df[df['user'] != 'group_notification'].copy()
-    df = df[~df['message'].str.contains('<Media omitted>', na=False)].copy()
+    df = df[~_media_mask(df)].copy()
     if df.empty:
         return None
-    wc = WordCloud(width=500, height=500, min_font_size=10, background_color='white')
+    wc = _wordcloud()
     df_wc = wc.generate(df['message'].str.cat(sep=" "))
     return df_wc
 
-def chat_most_common_words(selected_user, df):
-    f = open('stop_hinglish.txt', 'r')
+def count_words(messages):
+    # Word counts in first-appearance order, so most_common breaks ties the
+    # same way however the counts were accumulated
+    f = open(STOP_WORDS_PATH, 'r')
     stop_words = f.read()
     f.close()
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
-    temp = df[df['user'] != 'group_notification'].copy()
-    temp = temp[~temp['message'].str.contains('<Media omitted>', na=False)].copy()
-    if temp.empty:
-        return pd.DataFrame()
-    words = []
-    for message in temp['message']:
+    words = Counter()
+    for message in messages:
         # Clean words: remove punctuation, convert to lowercase, and split
         cleaned_message = re.sub(r'[^\w\s]', '', str(message).lower())
         for word in cleaned_message.split():
             # Only include words longer than 1 character to avoid noise
             if word not in stop_words and len(word) > 1:
-                words.append(word)
-    logging.info(f"Processed {len(words)} words for common words analysis")
-    most_common_df = pd.DataFrame(Counter(words).most_common(20))
-    return most_common_df
+                words[word] += 1
+    return words
+
+def count_emojis(messages):
+    return Counter(c for message in messages for c in str(message) if c in emoji.EMOJI_DATA)
+
+def chat_most_common_words(selected_user, df):
+    if selected_user != 'Overall':
+        df = df[df['user'] == selected_user]
+    temp = df[df['user'] != 'group_notification'].copy()
+    temp = temp[~_media_mask(temp)].copy()
+    if temp.empty:
+        return pd.DataFrame()
+    words = count_words(temp['message'])
+    logging.info(f"Processed {sum(words.values())} words for common words analysis")
+    return most_common_words(words)
+
+def most_common_words(words):
+    return pd.DataFrame(words.most_common(20))
 
 def chat_emoji_helper(selected_user, df):
     if selected_user != 'Overall':
         df = df[df['user'] == selected_user]
     df = df[df['user'] != 'group_notification'].copy()
-    emojis = []
-    for message in df['message']:
-        emojis.extend([c for c in str(message) if c in emoji.EMOJI_DATA])
+    return emoji_table(count_emojis(df['message']))
+
+def emoji_table(emojis):
     if not emojis:
         return pd.DataFrame()
-    emoji_df = pd.DataFrame(Counter(emojis).most_common(len(Counter(emojis))))
-    return emoji_df
+    return pd.DataFrame(emojis.most_common(len(emojis)))
 
-def emoji_contribution(df):
-    df = df[df['user'] != 'group_notification'].copy()
-    if df.empty:
+def emoji_contribution(df, summary=None):
+    if summary is None:
+        summary = user_summary_table(df, scans=('emojis',))
+    if summary.empty:
         return pd.DataFrame()
-    emoji_counts = []
-    for user in df['user'].unique():
-        user_df = df[df['user'] == user]
-        emojis = []
-        for message in user_df['message']:
-            emojis.extend([c for c in str(message) if c in emoji.EMOJI_DATA])
-        emoji_counts.append({'user': user, 'emoji_count': len(emojis)})
-    emoji_contribution_df = pd.DataFrame(emoji_counts)
-    if not emoji_contribution_df.empty:
-        emoji_contribution_df = emoji_contribution_df.sort_values(by='emoji_count', ascending=False)
+    emoji_contribution_df = summary['emojis'].reset_index().rename(columns={'emojis': 'emoji_count'})
+    emoji_contribution_df = emoji_contribution_df.sort_values(by='emoji_count', ascending=False, kind='stable')
     return emoji_contribution_df
 
 def chat_monthly_timeline(selected_user, df):
@@ -152,6 +185,10 @@ def chat_activity_heatmap(selected_user, df):
     if df.empty:
         return pd.DataFrame(), None, None, []
     user_heatmap = df.pivot_table(index='day_name', columns='period', values='message', aggfunc='count').fillna(0)
+    return heatmap_summary(user_heatmap)
+
+def heatmap_summary(user_heatmap):
+    # (heatmap, most active day, most active period, busiest hour per day)
     max_value = user_heatmap.values.max()
     if max_value == 0:
         return user_heatmap, None, None, []
@@ -174,6 +211,209 @@ def chat_activity_heatmap(selected_user, df):
         most_busy_hours.append([day, most_active_hour, message_count])
     return user_heatmap, most_active_day, most_active_period, most_busy_hours
 
+# Normalized activity. Raw counts favour whichever weekdays, months or hours
+# occur most often in the chat's span (4 Sundays against 3 Mondays); these
+# views divide by calendar counts of the span instead. _activity_calendar is
+# computed once per chat view and every denominator is a bincount over its
+# per-day arrays.
+NORMALIZATIONS = {
+    'count': 'Raw counts',
+    'day': 'Per day (weekday / month occurrences)',
+    'hour': 'Per hour slot',
+    'member': 'Per active member',
+}
+NORMALIZATION_UNITS = {
+    'count': 'Message Count',
+    'day': 'Messages per Day',
+    'hour': 'Messages per Hour',
+    'member': 'Messages per Member-Day',
+}
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June',
+          'July', 'August', 'September', 'October', 'November', 'December']
+
+def _period_label(hour):
+    # Same labels as the parsed 'period' column
+    if hour == 23:
+        return "23-00"
+    if hour == 0:
+        return "00-1"
+    return f"{hour}-{hour + 1}"
+
+def _activity_calendar(df, intervals=None):
+    # Every day of the span of df with its weekday and month, the hours it
+    # covers (first and last day are partial) and the members in the group,
+    # from membership periods and never fewer than the day's posters
+    start = df['date'].min().normalize()
+    days = pd.date_range(start, df['date'].max().normalize(), freq='D')
+    hour = pd.Timedelta(hours=1)
+    hours = np.arange((df['date'].min() - start) // hour, (df['date'].max() - start) // hour + 1)
+    if intervals is None:
+        intervals = membership.membership_intervals(df)
+    messages = df[df['user'] != 'group_notification']
+    members = membership.active_members(df, intervals)
+    members = members.to_numpy() if len(members) else np.zeros(len(days), dtype=np.int64)
+    day = ((messages['date'] - start) // pd.Timedelta(days=1)).to_numpy()
+    codes = pd.factorize(messages['user'])[0]
+    width = int(codes.max()) + 1 if len(codes) else 1
+    posters = np.bincount(np.unique(day * width + codes) // width, minlength=len(days))
+    return {
+        'start': start,
+        'days': days,
+        'weekday': days.dayofweek.to_numpy(),
+        'month': days.month.to_numpy() - 1,
+        'covered': np.bincount(hours, minlength=len(days) * 24).reshape(len(days), 24),
+        'members': np.maximum(members, posters),
+        'intervals': intervals,
+    }
+
+def _activity_counts(selected_user, df, calendar):
+    # Messages per (day, hour) of the calendar
+    if selected_user != 'Overall':
+        df = df[df['user'] == selected_user]
+    df = df[df['user'] != 'group_notification']
+    size = len(calendar['days']) * 24
+    hours = ((df['date'] - calendar['start']) // pd.Timedelta(hours=1)).to_numpy()
+    return np.bincount(hours, minlength=size)[:size].reshape(-1, 24)
+
+def _day_weights(selected_user, df, calendar, counts, normalization):
+    # Denominator of each calendar day; summed over a group of days it is
+    # the group's weekday/month occurrences, hours or member-days
+    if normalization == 'day':
+        return np.ones(len(calendar['days']))
+    if normalization == 'hour':
+        return calendar['covered'].sum(axis=1)
+    if normalization == 'member':
+        if selected_user == 'Overall':
+            return calendar['members']
+        intervals = calendar['intervals']
+        member = membership.active_members(df, intervals[intervals['member'] == selected_user])
+        member = member.to_numpy() if len(member) else 0
+        return np.maximum(member, counts.sum(axis=1) > 0)
+    return None
+
+def _ratio(numerator, denominator):
+    return np.round(np.divide(numerator, denominator, out=np.zeros(len(numerator)),
+                              where=denominator > 0), 3)
+
+def _normalized_by(selected_user, df, calendar, normalization, key, size):
+    # Messages per group of days (key: group id of every calendar day)
+    counts = _activity_counts(selected_user, df, calendar)
+    activity = np.bincount(key, weights=counts.sum(axis=1), minlength=size)
+    weights = _day_weights(selected_user, df, calendar, counts, normalization)
+    if weights is None:
+        return activity.astype(np.int64), counts
+    return _ratio(activity, np.bincount(key, weights=weights, minlength=size)), counts
+
+def normalized_week_activity_map(selected_user, df, calendar, normalization='day'):
+    activity, counts = _normalized_by(selected_user, df, calendar, normalization, calendar['weekday'], 7)
+    if not counts.any():
+        return pd.Series(dtype='float64'), None
+    activity = pd.Series(activity, index=WEEKDAYS)
+    return activity, activity.idxmax()
+
+def normalized_month_activity_map(selected_user, df, calendar, normalization='day'):
+    activity, counts = _normalized_by(selected_user, df, calendar, normalization, calendar['month'], 12)
+    if not counts.any():
+        return pd.Series(dtype='float64'), None
+    activity = pd.Series(activity, index=MONTHS)
+    return activity, activity.idxmax()
+
+def normalized_activity_heatmap(selected_user, df, calendar, normalization='hour'):
+    # Weekday x hour slot grid; 'hour' divides each cell by the occurrences
+    # of that exact slot, the other denominators are per weekday
+    counts = _activity_counts(selected_user, df, calendar)
+    if not counts.any():
+        return pd.DataFrame(), None, None, []
+    cells = (calendar['weekday'][:, None] * 24 + np.arange(24)).ravel()
+    grid = np.bincount(cells, weights=counts.ravel(), minlength=168)
+    if normalization == 'hour':
+        grid = _ratio(grid, np.bincount(cells, weights=calendar['covered'].ravel(), minlength=168))
+    else:
+        weights = _day_weights(selected_user, df, calendar, counts, normalization)
+        if weights is not None:
+            per_weekday = np.bincount(calendar['weekday'], weights=weights, minlength=7)
+            grid = _ratio(grid, np.repeat(per_weekday, 24))
+    user_heatmap = pd.DataFrame(grid.reshape(7, 24), index=WEEKDAYS, columns=[_period_label(h) for h in range(24)])
+    most_active_day, most_active_period = user_heatmap.stack().idxmax()
+    most_busy_hours = []
+    for day, row in user_heatmap.iterrows():
+        if row.sum() > 0:
+            most_busy_hours.append([day, row.idxmax(), row.max()])
+        else:
+            most_busy_hours.append([day, "No Activity", 0])
+    return user_heatmap, most_active_day, most_active_period, most_busy_hours
+
+def normalized_monthly_timeline(selected_user, df, calendar, normalization='day'):
+    days = calendar['days']
+    months, key = np.unique(days.year.to_numpy() * 12 + calendar['month'], return_inverse=True)
+    activity, counts = _normalized_by(selected_user, df, calendar, normalization, key, len(months))
+    if not counts.any():
+        return pd.DataFrame()
+    timeline = pd.DataFrame({'year': months // 12, 'month_num': months % 12 + 1, 'message': activity})
+    timeline['month'] = [MONTHS[m - 1] for m in timeline['month_num']]
+    timeline['time'] = timeline['month'] + "-" + timeline['year'].astype(str)
+    return timeline
+
+def normalized_daily_timeline(selected_user, df, calendar, normalization='day'):
+    activity, counts = _normalized_by(selected_user, df, calendar, normalization,
+                                      np.arange(len(calendar['days'])), len(calendar['days']))
+    if not counts.any():
+        return pd.DataFrame()
+    return pd.DataFrame({'only_date': calendar['days'].date, 'message': activity})
+
+# Calendar heatmaps: one weekday x week grid per year, Monday first (a year
+# touches up to 54 Monday-started weeks), for a few hundred cells per year
+# however long the chat is
+CALENDAR_WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+CALENDAR_WEEKS = 54
+
+def _calendar_cells(dates, first_year):
+    # Flat (year, weekday, week) cell of each date
+    jan1_weekday = (dates.dayofweek - dates.dayofyear + 1) % 7
+    week = (dates.dayofyear - 1 + jan1_weekday) // 7
+    return ((dates.year - first_year) * 7 + dates.dayofweek) * CALENDAR_WEEKS + week
+
+def calendar_grid(dates, values):
+    # {year: 7 x 54 frame} of per-day values; days of the year without a
+    # value are 0, cells outside the year NaN
+    dates = pd.DatetimeIndex(dates).normalize()
+    if dates.empty:
+        return {}
+    first_year, last_year = dates.year.min(), dates.year.max()
+    size = (last_year - first_year + 1) * 7 * CALENDAR_WEEKS
+    in_year = _calendar_cells(pd.date_range(f"{first_year}-01-01", f"{last_year}-12-31", freq='D'), first_year)
+    grid = np.full(size, np.nan)
+    grid[in_year] = np.bincount(_calendar_cells(dates, first_year), weights=np.asarray(values, dtype=float),
+                                minlength=size)[in_year]
+    grid = grid.reshape(-1, 7, CALENDAR_WEEKS)
+    return {
+        int(year): pd.DataFrame(grid[i], index=CALENDAR_WEEKDAYS, columns=range(1, CALENDAR_WEEKS + 1))
+        for i, year in enumerate(range(first_year, last_year + 1))
+    }
+
+def calendar_dates(year):
+    # Date of every cell of a year's grid ('' outside the year), for hover text
+    days = pd.date_range(f"{year}-01-01", f"{year}-12-31", freq='D')
+    labels = np.full(7 * CALENDAR_WEEKS, '', dtype=object)
+    labels[_calendar_cells(days, year)] = days.strftime('%Y-%m-%d')
+    return labels.reshape(7, CALENDAR_WEEKS)
+
+def calendar_heatmap(selected_user, df, k=None):
+    # Messages per day (with sentiment k when given) on yearly calendar grids,
+    # from one bincount over day ordinals
+    if selected_user != 'Overall':
+        df = df[df['user'] == selected_user]
+    df = df[df['user'] != 'group_notification']
+    if k is not None:
+        df = df[df['value'] == k]
+    if df.empty:
+        return {}
+    days = df['date'].dt.normalize()
+    start = days.min()
+    counts = np.bincount(((days - start) // pd.Timedelta(days=1)).to_numpy())
+    return calendar_grid(pd.date_range(start, periods=len(counts), freq='D'), counts)
+
 def user_activity_timeline(selected_user, df):
     if selected_user != 'Overall':
         df = df[df['user'] == selected_user]
@@ -181,19 +421,20 @@ def user_activity_timeline(selected_user, df):
     if df.empty:
         return pd.DataFrame()
     timeline = df.groupby('hour').count()['message'].reset_index()
-    def convert_to_12hour(hour):
-        if hour == 0:
-            return "12 AM"
-        elif hour == 12:
-            return "12 PM"
-        elif hour > 12:
-            return f"{hour - 12} PM"
-        else:
-            return f"{hour} AM"
-    timeline['hour_12'] = timeline['hour'].apply(convert_to_12hour)
+    timeline['hour_12'] = timeline['hour'].apply(hour_12)
     timeline = timeline.sort_values('hour')
     return timeline
 
+def hour_12(hour):
+    if hour == 0:
+        return "12 AM"
+    elif hour == 12:
+        return "12 PM"
+    elif hour > 12:
+        return f"{hour - 12} PM"
+    else:
+        return f"{hour} AM"
+
 def response_time_analysis(selected_user, df):
     if selected_user != 'Overall':
         df = df[df['user'] == selected_user]
@@ -214,6 +455,58 @@ def response_time_analysis(selected_user, df):
     timeline.rename(columns={'time_diff': 'avg_response_time_minutes'}, inplace=True)
     return avg_response_time, timeline
 
+# Per-user summary shared by every group-comparison chart
+SENTIMENT_COLUMNS = {1: 'positive', 0: 'neutral', -1: 'negative'}
+
+# Per-message text scans of user_summary_table that cost far more than the
+# grouped counts; callers that need neither column pass scans=()
+SUMMARY_SCANS = ('links', 'emojis')
+
+def user_summary_table(df, scans=SUMMARY_SCANS):
+    # One grouped aggregation over all messages instead of one filter per user
+    df = df[df['user'] != 'group_notification']
+    if df.empty:
+        return pd.DataFrame()
+    message = df['message'].astype(str)
+    is_media = _media_mask(df)
+    msg_length = message.str.len()
+    per_message = pd.DataFrame({
+        'user': df['user'],
+        'words': message.str.split().str.len(),
+        'media': is_media,
+        'text_messages': ~is_media,
+        'total_length': msg_length.where(~is_media, 0),
+        'positive': df['value'] == 1,
+        'neutral': df['value'] == 0,
+        'negative': df['value'] == -1,
+        'only_date': df['only_date'],
+        'date': df['date'],
+    })
+    columns = {
+        'messages': ('user', 'size'),
+        'words': ('words', 'sum'),
+        'media': ('media', 'sum'),
+    }
+    if 'links' in scans:
+        per_message['links'] = [len(_find_urls(m)) for m in message]
+        columns['links'] = ('links', 'sum')
+    if 'emojis' in scans:
+        per_message['emojis'] = [sum(1 for c in m if c in emoji.EMOJI_DATA) for m in message]
+        columns['emojis'] = ('emojis', 'sum')
+    summary = per_message.groupby('user', sort=False).agg(
+        **columns,
+        text_messages=('text_messages', 'sum'),
+        total_length=('total_length', 'sum'),
+        positive=('positive', 'sum'),
+        neutral=('neutral', 'sum'),
+        negative=('negative', 'sum'),
+        active_days=('only_date', 'nunique'),
+        first_message=('date', 'min'),
+        last_message=('date', 'max'),
+    )
+    summary['avg_length'] = (summary['total_length'] / summary['text_messages'].where(summary['text_messages'] > 0)).round(2)
+    return summary.sort_values('messages', ascending=False, kind='stable')
+
 # Sentiment Analysis Functions
 def sentiment_week_activity_map(selected_user, df, k):
     if selected_user != 'Overall':
@@ -267,23 +560,25 @@ def sentiment_monthly_timeline(selected_user, df, k):
     timeline['time'] = time
     return timeline
 
-def sentiment_percentage(df, k):
-    df_filtered = df[df['value'] == k].copy()
-    df_filtered = df_filtered[df_filtered['user'] != 'group_notification'].copy()
-    if df_filtered.empty:
+def sentiment_percentage(df, k, summary=None):
+    if summary is None:
+        summary = user_summary_table(df, scans=())
+    column = SENTIMENT_COLUMNS[k]
+    if summary.empty or summary[column].sum() == 0:
         return pd.DataFrame()
-    df_result = round((df_filtered['user'].value_counts() / df_filtered.shape[0]) * 100, 2).reset_index().rename(
-        columns={'index': 'name', 'user': 'percent'})
+    counts = summary.loc[summary[column] > 0, column].sort_values(ascending=False, kind='stable')
+    df_result = round((counts / counts.sum()) * 100, 2).reset_index()
+    df_result.columns = ['name', 'percent']
     return df_result
 
 def sentiment_create_wordcloud(selected_user, df, k):
-    f = open('stop_hinglish.txt', 'r')
+    f = open(STOP_WORDS_PATH, 'r')
     stop_words = f.read()
     f.close()
     if selected_user != 'Overall':
         df = df[df['user'] == selected_user]
     temp = df[df['user'] != 'group_notification'].copy()
-    temp = temp[~temp['message'].str.contains('<Media omitted>', na=False)].copy()
+    temp = temp[~_media_mask(temp)].copy()
     def remove_stop_words(message):
         y = []
         # Clean message: remove punctuation, convert to lowercase
@@ -292,7 +587,7 @@ def sentiment_create_wordcloud(selected_user, df, k):
             if word not in stop_words and len(word) > 1:  # Exclude words shorter than 2 characters
                 y.append(word)
         return " ".join(y)
-    wc = WordCloud(width=500, height=500, min_font_size=10, background_color='white')
+    wc = _wordcloud()
     temp['message'] = temp['message'].apply(remove_stop_words)
     temp = temp[temp['value'] == k].copy()
     if temp.empty:
@@ -302,13 +597,13 @@ def sentiment_create_wordcloud(selected_user, df, k):
     return df_wc
 
 def sentiment_most_common_words(selected_user, df, k):
-    f = open('stop_hinglish.txt', 'r')
+    f = open(STOP_WORDS_PATH, 'r')
     stop_words = f.read()
     f.close()
     if selected_user != 'Overall':
         df = df[df['user'] == selected_user]
     temp = df[df['user'] != 'group_notification'].copy()
-    temp = temp[~temp['message'].str.contains('<Media omitted>', na=False)].copy()
+    temp = temp[~_media_mask(temp)].copy()
     if temp.empty:
         return pd.DataFrame()
     words = []
@@ -432,19 +727,16 @@ def keyword_timeline(selected_user, df, keyword):
     return timeline
 
 # Message Length Analysis Functions
-def message_length_by_user(selected_user, df):
+def message_length_by_user(selected_user, df, summary=None):
+    if summary is None:
+        summary = user_summary_table(df, scans=())
     if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
-    df = df[df['user'] != 'group_notification'].copy()
-    if df.empty:
+        summary = summary[summary.index == selected_user]
+    summary = summary[summary['text_messages'] > 0]
+    if summary.empty:
         return pd.DataFrame()
-    df['msg_length'] = df['message'].apply(lambda x: len(str(x)))
-    df = df[~df['message'].str.contains('<Media omitted>', na=False)].copy()
-    if df.empty:
-        return pd.DataFrame()
-    avg_length = df.groupby('user')['msg_length'].mean().round(2).reset_index()
-    avg_length = avg_length.rename(columns={'msg_length': 'avg_length'})
-    avg_length = avg_length.sort_values('avg_length', ascending=False)
+    avg_length = summary['avg_length'].reset_index()
+    avg_length = avg_length.sort_values('avg_length', ascending=False, kind='stable')
     return avg_length
 
 def message_length_timeline(selected_user, df):
@@ -454,7 +746,7 @@ def message_length_timeline(selected_user, df):
     if df.empty:
         return pd.DataFrame()
     df['msg_length'] = df['message'].apply(lambda x: len(str(x)))
-    df = df[~df['message'].str.contains('<Media omitted>', na=False)].copy()
+    df = df[~_media_mask(df)].copy()
     if df.empty:
         return pd.DataFrame()
     timeline = df.groupby(['year', 'month_num', 'month'])['msg_length'].mean().round(2).reset_index(name='avg_length')
@@ -471,7 +763,7 @@ def message_length_distribution(selected_user, df):
     if df.empty:
         return pd.DataFrame()
     df['msg_length'] = df['message'].apply(lambda x: len(str(x)))
-    df = df[~df['message'].str.contains('<Media omitted>', na=False)].copy()
+    df = df[~_media_mask(df)].copy()
     if df.empty:
         return pd.DataFrame()
     return df['msg_length']
@@ -483,7 +775,7 @@ def message_length_by_sentiment(selected_user, df):
     if df.empty:
         return pd.DataFrame()
     df['msg_length'] = df['message'].apply(lambda x: len(str(x)))
-    df = df[~df['message'].str.contains('<Media omitted>', na=False)].copy()
+    df = df[~_media_mask(df)].copy()
     if df.empty:
         return pd.DataFrame()
     sentiment_labels = {1: 'Positive', 0: 'Neutral', -1: 'Negative'}
@@ -498,7 +790,7 @@ def message_length_by_day_of_week(selected_user, df):
     if df.empty:
         return pd.DataFrame()
     df['msg_length'] = df['message'].apply(lambda x: len(str(x)))
-    df = df[~df['message'].str.contains('<Media omitted>', na=False)].copy()
+    df = df[~_media_mask(df)].copy()
     if df.empty:
         return pd.DataFrame()
     length_by_day = df.groupby('day_name')['msg_length'].mean().reset_index()
@@ -514,7 +806,7 @@ def extreme_messages(selected_user, df):
     if df.empty:
         return pd.DataFrame(), pd.DataFrame()
     df['msg_length'] = df['message'].apply(lambda x: len(str(x)))
-    df = df[~df['message'].str.contains('<Media omitted>', na=False)].copy()
+    df = df[~_media_mask(df)].copy()
     if df.empty:
         return pd.DataFrame(), pd.DataFrame()
     df = df[df['msg_length'] > 0].copy()
@@ -525,3 +817,239 @@ def extreme_messages(selected_user, df):
     longest['date'] = longest['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
     shortest['date'] = shortest['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
     return longest, shortest
+
+def message_kind_breakdown(selected_user, df):
+    # Messages per user and kind (text, media types, deleted, edited, ...);
+    # only kinds that occur get a column
+    if selected_user != 'Overall':
+        df = df[df['user'] == selected_user]
+    df = df[df['user'] != 'group_notification']
+    if df.empty:
+        return pd.DataFrame()
+    table = df.groupby(['user', _message_kinds(df)], observed=True).size().unstack(fill_value=0)
+    table = table[[kind for kind in preprocessor.MESSAGE_KINDS if kind in table.columns]]
+    table.columns = table.columns.astype(str).rename(None)
+    table.insert(0, 'messages', table.sum(axis=1))
+    return table.sort_values('messages', ascending=False, kind='stable')
+
+def message_kind_timeline(selected_user, df):
+    # Monthly counts of every kind except plain text
+    if selected_user != 'Overall':
+        df = df[df['user'] == selected_user]
+    df = df[df['user'] != 'group_notification']
+    kinds = _message_kinds(df)
+    df = df[kinds != 'text']
+    if df.empty:
+        return pd.DataFrame()
+    month = df['date'].dt.to_period('M').astype(str).rename('month')
+    timeline = df.groupby([month, kinds[df.index].astype(str).rename('kind')]).size()
+    return timeline.rename('messages').reset_index()
+
+def media_summary(media):
+    # Attachments of a .zip export by kind, from preprocessor.zip_media_index
+    if media is None or media.empty:
+        return pd.DataFrame()
+    summary = media.groupby('kind').agg(
+        files=('filename', 'size'),
+        size_mb=('size', 'sum'),
+        compressed_mb=('compressed_size', 'sum'),
+    )
+    summary['size_mb'] = (summary['size_mb'] / 2 ** 20).round(2)
+    summary['compressed_mb'] = (summary['compressed_mb'] / 2 ** 20).round(2)
+    return summary.sort_values('files', ascending=False, kind='stable').reset_index()
+
+def media_timeline(media):
+    if media is None or media.empty:
+        return pd.DataFrame()
+    dated = media.dropna(subset=['date'])
+    if dated.empty:
+        return pd.DataFrame()
+    timeline = dated.groupby([dated['date'].dt.to_period('M').astype(str).rename('month'), 'kind']).size()
+    return timeline.rename('files').reset_index()
+
+# Reply interactions. Within a conversation session (no gap longer than
+# SESSION_GAP_MINUTES) a message whose author differs from the previous
+# message's author counts as a reply to that author.
+SESSION_GAP_MINUTES = 60
+
+def _reply_edges(df, gap_minutes=SESSION_GAP_MINUTES):
+    # One row per reply from a single shift over the messages in time order
+    messages = df[df['user'] != 'group_notification'].sort_values('date', kind='stable')
+    users = messages['user'].to_numpy()
+    dates = messages['date'].to_numpy()
+    latency = (dates[1:] - dates[:-1]) / np.timedelta64(1, 'm')
+    reply = (users[1:] != users[:-1]) & (latency <= gap_minutes)
+    return pd.DataFrame({
+        'user': users[1:][reply],
+        'replied_to': users[:-1][reply],
+        'latency_minutes': latency[reply],
+    })
+
+def reply_interactions(selected_user, df, gap_minutes=SESSION_GAP_MINUTES):
+    # Sparse user x user reply matrix: one row per (user, replied_to) pair
+    # that occurs, with its reply count and median latency, top pairs first
+    edges = _reply_edges(df, gap_minutes)
+    if edges.empty:
+        return pd.DataFrame()
+    pairs = edges.groupby(['user', 'replied_to'], sort=False)['latency_minutes'].agg(
+        replies='size', median_reply_minutes='median').reset_index()
+    pairs['median_reply_minutes'] = pairs['median_reply_minutes'].round(2)
+    pairs = pairs.sort_values(['replies', 'user', 'replied_to'], ascending=[False, True, True],
+                              kind='stable').reset_index(drop=True)
+    if selected_user != 'Overall':
+        pairs = pairs[(pairs['user'] == selected_user) | (pairs['replied_to'] == selected_user)].reset_index(drop=True)
+    return pairs
+
+def reply_degrees(selected_user, df, pairs=None):
+    # Per user: replies sent and received, and how many distinct members
+    # they reply to (out-degree) and get replies from (in-degree)
+    if pairs is None:
+        pairs = reply_interactions('Overall', df)
+    if pairs.empty:
+        return pd.DataFrame()
+    sent = pairs.groupby('user').agg(replies_sent=('replies', 'sum'), out_degree=('replied_to', 'size'))
+    received = pairs.groupby('replied_to').agg(replies_received=('replies', 'sum'), in_degree=('user', 'size'))
+    received.index.name = 'user'
+    degrees = sent.join(received, how='outer').fillna(0).astype('int64')
+    degrees = degrees[['replies_sent', 'replies_received', 'out_degree', 'in_degree']]
+    degrees = degrees.sort_values(['replies_received', 'replies_sent'], ascending=False, kind='stable')
+    if selected_user != 'Overall':
+        degrees = degrees[degrees.index == selected_user]
+    return degrees.reset_index()
+
+def reply_matrix(pairs, users):
+    # Dense reply counts among a few members, for display only
+    if pairs is None or pairs.empty:
+        return pd.DataFrame()
+    pairs = pairs[pairs['user'].isin(users) & pairs['replied_to'].isin(users)]
+    matrix = pairs.pivot(index='user', columns='replied_to', values='replies')
+    return matrix.reindex(index=users, columns=users).fillna(0).astype('int64')
+
+# Streaks and silences. Everything is computed from a users x days matrix of
+# message counts (one bincount over the messages), run-length encoded in a
+# single vectorized pass: runs of active days are streaks, runs of inactive
+# days between two active ones are gaps.
+GAP_BINS = [1, 2, 3, 4, 8, 15, 31, 91]
+
+def _daily_activity_matrix(df):
+    # (users, days, counts): counts[i, j] messages by users[i] on days[j]
+    messages = df[df['user'] != 'group_notification']
+    start = df['date'].min().normalize()
+    days = pd.date_range(start, df['date'].max().normalize(), freq='D')
+    codes, users = pd.factorize(messages['user'], sort=True)
+    day = ((messages['date'] - start) // pd.Timedelta(days=1)).to_numpy()
+    counts = np.bincount(codes * len(days) + day, minlength=len(users) * len(days))
+    return list(users), days, counts.reshape(len(users), len(days))
+
+def _runs(active):
+    # Run-length encoding of every row of a boolean matrix:
+    # (row, first column, length, value) of each run
+    n_rows, n_cols = active.shape
+    flat = active.ravel()
+    if not flat.size:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, np.zeros(0, dtype=bool)
+    change = np.empty(flat.size, dtype=bool)
+    change[0] = True
+    change[1:] = flat[1:] != flat[:-1]
+    change[::n_cols] = True
+    starts = np.flatnonzero(change)
+    lengths = np.diff(np.append(starts, flat.size))
+    return starts // n_cols, starts % n_cols, lengths, flat[starts]
+
+def _gap_runs(row, col, length, value, n_cols):
+    # Inactive runs with activity on both sides
+    return ~value & (col > 0) & (col + length < n_cols)
+
+def _longest_per_row(n_rows, row, col, length):
+    # Length and first column of each row's longest run (earliest on ties)
+    best = np.zeros(n_rows, dtype=np.int64)
+    first = np.full(n_rows, -1, dtype=np.int64)
+    order = np.lexsort((col, -length, row))
+    _, heads = np.unique(row[order], return_index=True)
+    chosen = order[heads]
+    best[row[chosen]] = length[chosen]
+    first[row[chosen]] = col[chosen]
+    return best, first
+
+def _run_dates(days, first, length):
+    # Start and end dates of runs, NaT for rows without one
+    found = first >= 0
+    start = pd.Series(pd.NaT, index=range(len(first)), dtype='datetime64[ns]')
+    end = start.copy()
+    start[found] = days[first[found]]
+    end[found] = days[first[found] + length[found] - 1]
+    return start.dt.date, end.dt.date
+
+def _activity_rows(selected_user, df, activity):
+    users, days, counts = activity if activity is not None else _daily_activity_matrix(df)
+    if selected_user != 'Overall':
+        keep = [users.index(selected_user)] if selected_user in users else []
+        users, counts = [users[i] for i in keep], counts[keep]
+    return users, days, counts
+
+def activity_streaks(selected_user, df, activity=None):
+    # Per user: active days, longest streak of consecutive active days, the
+    # current streak (ending on the last day of the chat), the longest gap
+    # between two active days and the days since their last message
+    users, days, counts = _activity_rows(selected_user, df, activity)
+    if not users:
+        return pd.DataFrame()
+    active = counts > 0
+    n_rows, n_cols = active.shape
+    row, col, length, value = _runs(active)
+    streak, streak_first = _longest_per_row(n_rows, row[value], col[value], length[value])
+    gaps = _gap_runs(row, col, length, value, n_cols)
+    gap, gap_first = _longest_per_row(n_rows, row[gaps], col[gaps], length[gaps])
+    at_end = col + length == n_cols
+    current = np.zeros(n_rows, dtype=np.int64)
+    current[row[at_end & value]] = length[at_end & value]
+    since_last = np.zeros(n_rows, dtype=np.int64)
+    since_last[row[at_end & ~value]] = length[at_end & ~value]
+    streak_start, streak_end = _run_dates(days, streak_first, streak)
+    gap_start, gap_end = _run_dates(days, gap_first, gap)
+    result = pd.DataFrame({
+        'user': users,
+        'active_days': active.sum(axis=1),
+        'longest_streak': streak,
+        'streak_start': streak_start,
+        'streak_end': streak_end,
+        'current_streak': current,
+        'longest_gap': gap,
+        'gap_start': gap_start,
+        'gap_end': gap_end,
+        'days_since_last': since_last,
+    })
+    return result.sort_values(['longest_streak', 'active_days'], ascending=False, kind='stable').reset_index(drop=True)
+
+def silence_gaps(selected_user, df, top_n=10, activity=None):
+    # Longest silences: days without any message in the chat ('Overall') or
+    # from the selected user, between two active days, longest first
+    users, days, counts = _activity_rows(selected_user, df, activity)
+    if not users:
+        return pd.DataFrame()
+    active = (counts > 0).any(axis=0)[None, :]
+    row, col, length, value = _runs(active)
+    gaps = _gap_runs(row, col, length, value, active.shape[1])
+    col, length = col[gaps], length[gaps]
+    order = np.lexsort((col, -length))[:top_n]
+    return pd.DataFrame({
+        'start': days[col[order]].date,
+        'end': days[col[order] + length[order] - 1].date,
+        'days': length[order],
+    })
+
+def gap_distribution(selected_user, df, activity=None):
+    # How many gaps between active days of each length, pooled over all
+    # participants for 'Overall'
+    users, days, counts = _activity_rows(selected_user, df, activity)
+    if not users:
+        return pd.DataFrame()
+    row, col, length, value = _runs(counts > 0)
+    lengths = length[_gap_runs(row, col, length, value, counts.shape[1])]
+    bins = np.searchsorted(GAP_BINS, lengths, side='right') - 1
+    labels = [str(low) if high - low == 1 else f"{low}-{high - 1}" for low, high in zip(GAP_BINS, GAP_BINS[1:])]
+    return pd.DataFrame({
+        'gap_days': labels + [f"{GAP_BINS[-1]}+"],
+        'gaps': np.bincount(bins, minlength=len(GAP_BINS)),
+    })
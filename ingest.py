@@ -0,0 +1,344 @@
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+import helper
+import preprocessor
+
+# Incremental re-ingestion of re-exported chats. Each analyzed .txt export is
+# persisted under a name the user gives it, with an anchor: the raw text of
+# its last ANCHOR_MESSAGES messages. When a later export remembered under
+# the same name contains that anchor at a message boundary, only the text
+# after it is parsed and scored and appended to the stored frame. An upload
+# is only ever matched against the chat it is remembered as, so stored
+# history never leaks into someone else's analysis by matching content. The stored aggregates (the per-user summary and ChatAggregates:
+# daily, monthly and weekday x hour counts, word and emoji counts) are merged
+# with the tail's instead of rebuilt from the whole chat.
+#
+# The aggregates describe the whole chat; views of a date range, and the
+# sections without a stored aggregate (sentiment, lengths, replies, ...),
+# are computed from the merged frame.
+#
+# The merged frame equals preprocess() of the new export when the export
+# still starts where the stored one did; if WhatsApp trimmed old history
+# from the front, the stored history is kept.
+
+ANCHOR_MESSAGES = 50
+STORE_ENV = 'CHAT_ANALYZER_STORE'
+
+
+def default_store_dir():
+    return os.environ.get(STORE_ENV) or os.path.join(os.path.expanduser('~'), '.cache', 'chat-analyzer')
+
+
+def message_boundaries_from_end(data, count):
+    # Offsets of the last `count` message starts (timestamps at a line start),
+    # found by scanning backwards; data is bytes or an mmap
+    offsets = []
+    pos = len(data)
+    while len(offsets) < count:
+        pos = data.rfind(b'\n', 0, pos)
+        if pos < 0:
+            if preprocessor.is_message_start(data, 0):
+                offsets.append(0)
+            break
+        start = pos + 1
+        if preprocessor.is_message_start(data, start):
+            offsets.append(start)
+    return offsets[::-1]
+
+
+def daily_counts(df):
+    # Messages per (user, day), the base of the daily timelines and active days
+    messages = df[df['user'] != 'group_notification']
+    return messages.groupby(['user', 'only_date']).size()
+
+
+class ChatAggregates:
+    # Additive per-user counts of a stored chat. merge() adds a tail's
+    # counts, and view() rebuilds the helper.py result of one of SECTIONS
+    # from them, equal to running the helper on the merged frame. Word and
+    # emoji counters keep first-appearance order, so ties rank the same.
+    SECTIONS = ('chat_daily_timeline', 'chat_monthly_timeline', 'chat_activity_heatmap',
+                'chat_most_common_words', 'chat_emoji_helper')
+
+    def __init__(self, daily, monthly, heatmap, words, emojis):
+        self.daily = daily
+        self.monthly = monthly
+        self.heatmap = heatmap
+        self.words = words
+        self.emojis = emojis
+
+    @classmethod
+    def build(cls, df):
+        messages = df[df['user'] != 'group_notification']
+        text = messages[~helper._media_mask(messages)]
+        words = {'Overall': helper.count_words(text['message'])}
+        emojis = {'Overall': helper.count_emojis(messages['message'])}
+        for user in pd.unique(messages['user']):
+            words[user] = helper.count_words(text.loc[text['user'] == user, 'message'])
+            emojis[user] = helper.count_emojis(messages.loc[messages['user'] == user, 'message'])
+        return cls(
+            daily_counts(df),
+            messages.groupby(['user', 'year', 'month_num', 'month']).size(),
+            messages.groupby(['user', 'day_name', 'period']).size(),
+            words,
+            emojis,
+        )
+
+    def merge(self, tail):
+        def add(old, new):
+            return old.add(new, fill_value=0).astype('int64')
+
+        def add_counters(old, new):
+            merged = {user: Counter(counts) for user, counts in old.items()}
+            for user, counts in new.items():
+                merged.setdefault(user, Counter()).update(counts)
+            return merged
+        return ChatAggregates(add(self.daily, tail.daily), add(self.monthly, tail.monthly),
+                              add(self.heatmap, tail.heatmap), add_counters(self.words, tail.words),
+                              add_counters(self.emojis, tail.emojis))
+
+    def _counts(self, counts, selected_user, levels):
+        if selected_user != 'Overall':
+            if selected_user not in counts.index.get_level_values('user'):
+                return counts.iloc[:0].droplevel('user')
+            return counts.xs(selected_user, level='user')
+        return counts.groupby(level=levels).sum()
+
+    def view(self, section, selected_user='Overall'):
+        if section == 'chat_daily_timeline':
+            daily = self._counts(self.daily, selected_user, ['only_date'])
+            if daily.empty:
+                return pd.DataFrame()
+            return daily.rename('message').reset_index()
+        if section == 'chat_monthly_timeline':
+            monthly = self._counts(self.monthly, selected_user, ['year', 'month_num', 'month'])
+            if monthly.empty:
+                return pd.DataFrame()
+            timeline = monthly.rename('message').reset_index()
+            timeline['time'] = timeline['month'] + "-" + timeline['year'].astype(str)
+            return timeline
+        if section == 'chat_activity_heatmap':
+            heatmap = self._counts(self.heatmap, selected_user, ['day_name', 'period'])
+            if heatmap.empty:
+                return pd.DataFrame(), None, None, []
+            return helper.heatmap_summary(heatmap.unstack('period').fillna(0))
+        if section == 'chat_most_common_words':
+            if selected_user not in self.words:
+                return pd.DataFrame()
+            return helper.most_common_words(self.words[selected_user])
+        if section == 'chat_emoji_helper':
+            return helper.emoji_table(self.emojis.get(selected_user, Counter()))
+        raise KeyError(section)
+
+
+def summary_table(record):
+    # The stored summary, ordered like helper.user_summary_table
+    return record['summary'].sort_values('messages', ascending=False, kind='stable')
+
+
+def _unsorted_summary(df):
+    # helper.user_summary_table keeps first-appearance order before sorting;
+    # that order is stored so merged tables sort exactly like a full rebuild
+    summary = helper.user_summary_table(df)
+    if summary.empty:
+        return summary
+    order = pd.unique(df.loc[df['user'] != 'group_notification', 'user'])
+    return summary.reindex(order)
+
+
+def merge_summary(old, tail, old_daily, tail_daily):
+    if old.empty:
+        return tail
+    if tail.empty:
+        return old
+    users = old.index.union(tail.index, sort=False)
+    old, tail = old.reindex(users), tail.reindex(users)
+    merged = pd.DataFrame(index=users)
+    for column in ('messages', 'words', 'media', 'links', 'emojis', 'text_messages', 'total_length',
+                   'positive', 'neutral', 'negative', 'active_days'):
+        merged[column] = old[column].fillna(0).astype('int64') + tail[column].fillna(0).astype('int64')
+    # A day that has messages on both sides of the anchor counts once
+    overlap = old_daily.index.intersection(tail_daily.index).get_level_values('user').value_counts()
+    merged['active_days'] -= overlap.reindex(users, fill_value=0).astype('int64')
+    merged['first_message'] = old['first_message'].fillna(tail['first_message'])
+    merged['last_message'] = tail['last_message'].fillna(old['last_message'])
+    merged['avg_length'] = (merged['total_length'] / merged['text_messages'].where(merged['text_messages'] > 0)).round(2)
+    merged.index.name = 'user'
+    return merged
+
+
+def _build_record(df, date_format, anchor):
+    return {
+        'df': df,
+        'summary': _unsorted_summary(df),
+        'aggregates': ChatAggregates.build(df),
+        'date_format': date_format,
+        'anchor': anchor,
+        'updated': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def chat_id(name):
+    # File-safe id of a remembered chat's name
+    if not name or not name.strip():
+        raise ValueError("A remembered chat needs a name.")
+    return hashlib.sha256(name.strip().encode('utf-8')).hexdigest()[:16]
+
+
+class ChatStore:
+    # One pickle per chat plus a small .anchor file, so checking whether an
+    # upload extends a chat never loads the stored frame
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_store_dir()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, chat_id, extension):
+        return os.path.join(self.directory, chat_id + extension)
+
+    def chat_ids(self):
+        return sorted(name[:-len('.anchor')] for name in os.listdir(self.directory) if name.endswith('.anchor'))
+
+    def has(self, chat_id):
+        return os.path.exists(self._path(chat_id, '.anchor'))
+
+    def load(self, chat_id):
+        with open(self._path(chat_id, '.pkl'), 'rb') as f:
+            return pickle.load(f)
+
+    def save(self, chat_id, record):
+        # Written to temporary files first so a crash never leaves a torn record
+        for extension, payload in (('.pkl', pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)),
+                                   ('.anchor', record['anchor'])):
+            path = self._path(chat_id, extension)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(payload)
+            os.replace(path + '.tmp', path)
+
+    def anchor_end(self, chat_id, data):
+        # End offset of the stored chat's anchor where it appears in data at
+        # a message boundary, else None
+        if not self.has(chat_id):
+            return None
+        with open(self._path(chat_id, '.anchor'), 'rb') as f:
+            anchor = f.read()
+        if not anchor:
+            return None
+        start = data.find(anchor)
+        while start >= 0:
+            end = start + len(anchor)
+            at_start = start == 0 or (data[start - 1:start] == b'\n' and
+                                      preprocessor.is_message_start(data, start))
+            at_end = end == len(data) or (data[end - 1:end] == b'\n' and
+                                          preprocessor.is_message_start(data, end))
+            if at_start and at_end:
+                return end
+            start = data.find(anchor, start + 1)
+        return None
+
+    def ingest_file(self, path, name, workers=1):
+        # Remembers the export under name. Returns (record, status);
+        # status['mode'] is 'new', 'appended', 'unchanged', 'reparsed' (the
+        # tail forced another date format) or 'replaced' (the export does not
+        # continue the chat stored under that name, which is overwritten).
+        chat = chat_id(name)
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(preprocessor.INVALID_FORMAT)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = self.anchor_end(chat, mm)
+                offsets = message_boundaries_from_end(mm, ANCHOR_MESSAGES)
+                anchor = mm[offsets[0]:] if offsets else b''
+                size = len(mm)
+
+        if end is None:
+            mode = 'replaced' if self.has(chat) else 'new'
+            df, date_format = preprocessor.parse_file(path, workers)
+            record = _build_record(df, date_format, anchor)
+            self.save(chat, record)
+            return record, {'mode': mode, 'chat_id': chat, 'new_messages': len(df), 'total_messages': len(df)}
+
+        record = self.load(chat)
+        if 'kind' not in record['df']:
+            # Stored before message kinds were parsed
+            record['df'].insert(record['df'].columns.get_loc('period') + 1, 'kind',
+                                preprocessor.classify_messages(record['df']['message']))
+        if 'aggregates' not in record:
+            # Stored before the aggregates were kept
+            record['aggregates'] = ChatAggregates.build(record['df'])
+            record.pop('daily', None)
+        status = {'chat_id': chat, 'total_messages': len(record['df'])}
+        if end == size:
+            return record, dict(status, mode='unchanged', new_messages=0)
+
+        formats = preprocessor.DATE_FORMATS[preprocessor.DATE_FORMATS.index(record['date_format']):]
+        try:
+            tail_df, tail_format = preprocessor.parse_range(path, (end, size), formats)
+        except ValueError:
+            tail_format = None
+        if tail_format != record['date_format']:
+            # The new messages only parse with a later date format, which a
+            # full parse would apply to the whole chat
+            logging.info(f"Chat {chat}: date format changed, parsing the full export")
+            df, date_format = preprocessor.parse_file(path, workers)
+            record = _build_record(df, date_format, anchor)
+            self.save(chat, record)
+            return record, dict(status, mode='reparsed', new_messages=len(df), total_messages=len(df))
+
+        tail_aggregates = ChatAggregates.build(tail_df)
+        record['summary'] = merge_summary(record['summary'], _unsorted_summary(tail_df),
+                                          record['aggregates'].daily, tail_aggregates.daily)
+        record['aggregates'] = record['aggregates'].merge(tail_aggregates)
+        record['df'] = pd.concat([record['df'], tail_df], ignore_index=True)
+        record['anchor'] = anchor
+        record['updated'] = datetime.now().isoformat(timespec='seconds')
+        self.save(chat, record)
+        return record, dict(status, mode='appended', new_messages=len(tail_df), total_messages=len(record['df']))
+
+
+def message_keys(df):
+    # 64-bit hash of (timestamp, author, body) per message, computed vectorized.
+    # Trailing whitespace is ignored: the last message of an export may lack
+    # the newline it has in a later export.
+    messages = pd.DataFrame({'date': df['date'], 'user': df['user'], 'message': df['message'].str.rstrip()})
+    return pd.util.hash_pandas_object(messages, index=False).to_numpy()
+
+
+def merge_exports(frames):
+    # Merges parsed exports of the same group into one frame in the
+    # preprocess schema. Messages are aligned on (timestamp, author, body
+    # hash) plus an occurrence number, so a message legitimately sent twice
+    # in the same minute is kept twice, but never duplicated across exports.
+    # One hash-based drop_duplicates pass, no pairwise comparison.
+    # Returns (merged frame, per-export stats).
+    keyed = []
+    for source, df in enumerate(frames):
+        keys = pd.DataFrame({'key': message_keys(df)})
+        keys['occurrence'] = keys.groupby('key', sort=False).cumcount()
+        keys['source'] = source
+        keyed.append(keys)
+    keys = pd.concat(keyed, ignore_index=True)
+    keep = ~keys.duplicated(subset=['key', 'occurrence'], keep='first').to_numpy()
+
+    merged = pd.concat(frames, ignore_index=True)[keep]
+    # Stable, so messages within the same minute keep their export order
+    merged = merged.sort_values('date', kind='stable').reset_index(drop=True)
+
+    kept = pd.Series(keys['source'].to_numpy()[keep]).value_counts()
+    stats = [{'source': i, 'messages': len(df), 'added': int(kept.get(i, 0)),
+              'duplicates': len(df) - int(kept.get(i, 0))} for i, df in enumerate(frames)]
+    return merged, stats
+
+
+def merge_files(paths, workers=1, sentiment=True):
+    # Parses each export (.txt or .zip) and merges them
+    frames = [preprocessor.preprocess_path(path, workers=workers, sentiment=sentiment) for path in paths]
+    return merge_exports(frames)
@@ -0,0 +1,176 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+# Opt-in instrumentation for the dashboard. Enabled with the sidebar toggle
+# or by setting CHAT_ANALYZER_PROFILE=1; records are appended as one JSON line
+# per run to CHAT_ANALYZER_PROFILE_LOG (default: profile_log.jsonl).
+
+PROFILE_ENV = 'CHAT_ANALYZER_PROFILE'
+PROFILE_LOG_ENV = 'CHAT_ANALYZER_PROFILE_LOG'
+
+# tracemalloc is global to the process and shared by every session's
+# Profiler: enabled profilers hold a reference, and tracing started here is
+# stopped only when the last of them lets go
+_started_tracing = False
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+
+
+def _acquire_tracing():
+    global _started_tracing, _tracing_users
+    with _tracing_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _started_tracing, _tracing_users
+    with _tracing_lock:
+        _tracing_users = max(_tracing_users - 1, 0)
+        if not _tracing_users and _started_tracing:
+            # Tracing slows every allocation, so turn it off once unused
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def enabled_by_env():
+    return os.environ.get(PROFILE_ENV, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def _rows(args, kwargs):
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return len(value)
+    return None
+
+
+class _ModuleProxy:
+    # Stands in for a module and times every function looked up on it
+
+    def __init__(self, module, profiler):
+        self._module = module
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        value = getattr(self._module, name)
+        if not callable(value) or isinstance(value, type):
+            return value
+        label = f"{self._module.__name__}.{name}"
+
+        @functools.wraps(value)
+        def timed(*args, **kwargs):
+            with self._profiler.measure('call', label, _rows(args, kwargs)):
+                return value(*args, **kwargs)
+        return timed
+
+
+class _Measurement:
+    def __init__(self, profiler, kind, name, rows):
+        self.profiler = profiler
+        self.record = {'kind': kind, 'name': name, 'rows': rows}
+        self.max_peak = 0
+
+    def __enter__(self):
+        # tracemalloc keeps a single global peak, so hand the peak seen so far
+        # to the enclosing measurement before resetting it for this one
+        current, peak = tracemalloc.get_traced_memory()
+        stack = self.profiler._stack
+        if stack:
+            stack[-1].max_peak = max(stack[-1].max_peak, peak)
+        tracemalloc.reset_peak()
+        stack.append(self)
+        self.start_current = current
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.record['wall_ms'] = round((time.perf_counter() - self.start_wall) * 1000, 2)
+        self.record['cpu_ms'] = round((time.process_time() - self.start_cpu) * 1000, 2)
+        peak = max(self.max_peak, tracemalloc.get_traced_memory()[1])
+        self.record['peak_mb'] = round(max(peak - self.start_current, 0) / 2 ** 20, 3)
+        self.record['error'] = exc[0].__name__ if exc[0] else None
+        stack = self.profiler._stack
+        stack.remove(self)
+        if stack:
+            stack[-1].max_peak = max(stack[-1].max_peak, peak)
+        self.profiler.records.append(self.record)
+        return False
+
+
+class _NullMeasurement:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Profiler:
+    # Collects per-call and per-section timings for one script run.
+    # Sections are lap timers: mark() closes the running section and opens
+    # the next, so each render block only needs a single line in app.py.
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.records = []
+        self._section = None
+        self._stack = []
+        self._tracing = enabled
+        if enabled:
+            _acquire_tracing()
+
+    def __del__(self):
+        # Runs cut short (st.stop) never reach finish()
+        self._stop_tracing()
+
+    def _stop_tracing(self):
+        if getattr(self, '_tracing', False):
+            self._tracing = False
+            _release_tracing()
+
+    def wrap(self, module):
+        return _ModuleProxy(module, self) if self.enabled else module
+
+    def measure(self, kind, name, rows=None):
+        if not self.enabled:
+            return _NullMeasurement()
+        return _Measurement(self, kind, name, rows)
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        self._close_section()
+        self._section = self.measure('section', name)
+        self._section.__enter__()
+
+    def finish(self):
+        if self.enabled:
+            self._close_section()
+            self._stop_tracing()
+
+    def _close_section(self):
+        if self._section is not None:
+            self._section.__exit__(None, None, None)
+            self._section = None
+
+    def to_frame(self):
+        frame = pd.DataFrame(self.records, columns=['kind', 'name', 'wall_ms', 'cpu_ms', 'rows', 'peak_mb', 'error'])
+        return frame.sort_values('wall_ms', ascending=False, kind='stable').reset_index(drop=True)
+
+    def write_log(self, path=None, **context):
+        if not self.enabled or not self.records:
+            return
+        path = path or os.environ.get(PROFILE_LOG_ENV, 'profile_log.jsonl')
+        entry = {'time': datetime.now().isoformat(timespec='seconds'), 'context': context, 'records': self.records}
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, default=str) + '\n')
@@ -0,0 +1,172 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Group membership from system notifications. The group_notification rows
+# (joins, adds, leaves, removals, subject/icon/description changes) are
+# parsed into structured events, each member's events become membership
+# intervals, and the number of active members per day is one difference-array
+# pass over those intervals. Members without a join event (the founders, or
+# people added before the export starts) count from the first day of the chat.
+
+# (event, language, pattern) in match order; 'actor' did it, 'members' are
+# affected, 'subject' is a new group name. English, German, Spanish,
+# Portuguese and French.
+EVENT_PATTERNS = [(event, language, re.compile(pattern)) for event, language, pattern in [
+    ('join', 'en', r"^(?P<members>.+?) joined using this group's invite link$"),
+    ('join', 'de', r"^(?P<members>.+?) ist über den Einladungslink dieser Gruppe beigetreten$"),
+    ('join', 'es', r"^(?P<members>.+?) se unió usando el enlace de invitación de este grupo$"),
+    ('join', 'pt', r"^(?P<members>.+?) entrou usando o link de convite deste grupo$"),
+    ('join', 'fr', r"^(?P<members>.+?) a rejoint ce groupe via le lien d'invitation$"),
+    ('create', 'en', r'^(?P<actor>.+?) created group "(?P<subject>.*)"$'),
+    ('create', 'de', r'^(?P<actor>.+?) hat die Gruppe „?"?(?P<subject>.*?)["“]? erstellt$'),
+    ('create', 'es', r'^(?P<actor>.+?) creó el grupo "(?P<subject>.*)"$'),
+    ('create', 'pt', r'^(?P<actor>.+?) criou o grupo "(?P<subject>.*)"$'),
+    ('create', 'fr', r'^(?P<actor>.+?) a créé le groupe « ?(?P<subject>.*?) ?»$'),
+    ('subject', 'en', r'^(?P<actor>.+?) changed the (?:group name|subject)(?: from ".*")? to "(?P<subject>.*)"$'),
+    ('subject', 'de', r'^(?P<actor>.+?) hat den Betreff (?:von ".*" )?zu "(?P<subject>.*)" geändert$'),
+    ('subject', 'es', r'^(?P<actor>.+?) cambió el asunto(?: de ".*")? a "(?P<subject>.*)"$'),
+    ('subject', 'pt', r'^(?P<actor>.+?) mudou o assunto(?: de ".*")? para "(?P<subject>.*)"$'),
+    ('subject', 'fr', r'^(?P<actor>.+?) a modifié le sujet(?: de « .* »)? en « ?(?P<subject>.*?) ?»$'),
+    ('icon', None, r"^(?P<actor>.+?) (?:changed this group's icon|hat das Gruppenbild geändert|cambió el ícono de este grupo"
+                   r"|mudou a imagem deste grupo|a changé l'icône de ce groupe)$"),
+    ('description', None, r'^(?P<actor>.+?) (?:changed the group description|hat die Gruppenbeschreibung geändert'
+                          r'|cambió la descripción del grupo|mudou a descrição do grupo|a modifié la description du groupe)$'),
+    ('add', 'en', r'^(?P<actor>.+?) added (?P<members>.+)$'),
+    ('add', 'de', r'^(?P<actor>.+?) hat (?P<members>.+) hinzugefügt$'),
+    ('add', 'es', r'^(?P<actor>.+?) añadió a (?P<members>.+)$'),
+    ('add', 'pt', r'^(?P<actor>.+?) adicionou (?P<members>.+)$'),
+    ('add', 'fr', r'^(?P<actor>.+?) a ajouté (?P<members>.+)$'),
+    ('leave', 'en', r'^(?P<members>.+?) left$'),
+    ('leave', 'de', r'^(?P<members>.+?) hat die Gruppe verlassen$'),
+    ('leave', 'es', r'^(?P<members>.+?) salió del grupo$'),
+    ('leave', 'pt', r'^(?P<members>.+?) saiu$'),
+    ('leave', 'fr', r'^(?P<members>.+?) est parti(?:e)?$'),
+    ('remove', 'en', r'^(?P<actor>.+?) removed (?P<members>.+)$'),
+    ('remove', 'de', r'^(?P<actor>.+?) hat (?P<members>.+) entfernt$'),
+    ('remove', 'es', r'^(?P<actor>.+?) eliminó a (?P<members>.+)$'),
+    ('remove', 'pt', r'^(?P<actor>.+?) removeu (?P<members>.+)$'),
+    ('remove', 'fr', r'^(?P<actor>.+?) a retiré (?P<members>.+)$'),
+]]
+STARTS = ('join', 'add')
+ENDS = ('leave', 'remove')
+# "A, B and C": commas, then the notification language's conjunction before
+# the last name only, so "Maria e Silva" stays one name in an English notice
+CONJUNCTIONS = {'en': 'and', 'de': 'und', 'es': 'y', 'pt': 'e', 'fr': 'et'}
+
+def split_members(text, language='en'):
+    names = text.split(',')
+    conjunction = CONJUNCTIONS.get(language)
+    last = list(re.finditer(rf'\s+{conjunction}\s+', names[-1])) if conjunction else []
+    if last:
+        names[-1:] = [names[-1][:last[-1].start()], names[-1][last[-1].end():]]
+    return [name.strip() for name in names if name.strip()]
+
+def parse_event(text):
+    # (event, language, match) for one notification line, or (None, None, None)
+    text = text.strip().strip('‎')
+    for event, language, pattern in EVENT_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            return event, language, match
+    return None, None, None
+
+def parse_events(df):
+    # One row per (event, affected member): date, event, actor, member, subject.
+    # Notifications that are not membership or group changes are skipped.
+    notifications = df[df['user'] == 'group_notification']
+    rows = []
+    for date, text in zip(notifications['date'], notifications['message']):
+        event, language, match = parse_event(text)
+        if event is None:
+            continue
+        groups = match.groupdict()
+        members = split_members(groups['members'], language) if groups.get('members') else [None]
+        for member in members:
+            rows.append((date, event, groups.get('actor'), member, groups.get('subject')))
+    return pd.DataFrame(rows, columns=['date', 'event', 'actor', 'member', 'subject'])
+
+def membership_intervals(df, events=None):
+    # One row per membership period: member, start, end (NaT while still a
+    # member). A member whose first event is a leave or removal, or who posts
+    # before their first join, was a member from the start of the chat.
+    if events is None:
+        events = parse_events(df)
+    if df.empty:
+        return pd.DataFrame(columns=['member', 'start', 'end'])
+    chat_start = df['date'].min()
+    moves = events[events['event'].isin(STARTS + ENDS)].sort_values('date', kind='stable')
+    posts = df[df['user'] != 'group_notification'].groupby('user')['date'].min()
+    moves_by_member = dict(tuple(moves.groupby('member', sort=False)))
+    rows = []
+    for member in pd.unique(pd.concat([moves['member'], pd.Series(posts.index)], ignore_index=True)):
+        member_moves = moves_by_member.get(member)
+        start = None
+        first_post = posts.get(member)
+        if member_moves is None or member_moves['event'].iloc[0] in ENDS or \
+                (first_post is not None and first_post < member_moves['date'].iloc[0]):
+            start = chat_start
+        if member_moves is not None:
+            for date, event in zip(member_moves['date'], member_moves['event']):
+                if event in STARTS and start is None:
+                    start = date
+                elif event in ENDS and start is not None:
+                    rows.append((member, start, date))
+                    start = None
+        if start is not None:
+            rows.append((member, start, pd.NaT))
+    intervals = pd.DataFrame(rows, columns=['member', 'start', 'end'])
+    return intervals.sort_values(['start', 'member'], kind='stable').reset_index(drop=True)
+
+def interval_index(intervals, until):
+    # pd.IntervalIndex of the periods (open periods end at `until`)
+    return pd.IntervalIndex.from_arrays(intervals['start'], intervals['end'].fillna(until), closed='both')
+
+def active_members(df, intervals):
+    # Members in the group on each day of the chat: +1 on the day a period
+    # starts, -1 the day after it ends, then one cumulative sum
+    if df.empty or intervals.empty:
+        return pd.Series(dtype='int64', name='active_members')
+    first = df['date'].min().normalize()
+    last = df['date'].max().normalize()
+    days = pd.date_range(first, last, freq='D')
+    starts = ((intervals['start'].dt.normalize() - first).dt.days).to_numpy()
+    ends = ((intervals['end'].fillna(last).dt.normalize() - first).dt.days).to_numpy()
+    diff = np.zeros(len(days) + 1, dtype=np.int64)
+    np.add.at(diff, np.clip(starts, 0, len(days)), 1)
+    np.add.at(diff, np.clip(ends + 1, 0, len(days)), -1)
+    return pd.Series(np.cumsum(diff[:-1]), index=days.rename('day'), name='active_members')
+
+def activity_per_member(df, active):
+    # Messages and messages per active member for every day of the chat
+    messages = df[df['user'] != 'group_notification']
+    daily = messages.groupby(messages['date'].dt.normalize().rename('day')).size()
+    result = pd.DataFrame({'active_members': active})
+    result['messages'] = daily.reindex(result.index, fill_value=0).astype('int64')
+    result['messages_per_member'] = (result['messages'] / result['active_members'].where(
+        result['active_members'] > 0)).round(3)
+    return result.reset_index()
+
+def event_timeline(events):
+    # Membership changes per month and event type
+    if events.empty:
+        return pd.DataFrame(columns=['month', 'event', 'members'])
+    month = events['date'].dt.to_period('M').astype(str).rename('month')
+    return events.groupby([month, 'event']).size().rename('members').reset_index()
+
+def member_table(intervals, until):
+    # Per member: membership periods, first join, last exit and days in the group
+    if intervals.empty:
+        return pd.DataFrame()
+    ends = intervals['end'].fillna(until)
+    table = intervals.assign(days=(ends - intervals['start']).dt.days + 1).groupby('member').agg(
+        periods=('start', 'size'),
+        first_joined=('start', 'min'),
+        last_left=('end', 'max'),
+        days_in_group=('days', 'sum'),
+    )
+    still_member = intervals.groupby('member')['end'].apply(lambda e: e.isna().any())
+    table['last_left'] = table['last_left'].where(~still_member)
+    table['current_member'] = still_member
+    return table.sort_values('days_in_group', ascending=False, kind='stable').reset_index()
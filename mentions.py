@@ -0,0 +1,156 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# @mention index. Mentions are extracted once per chat: a compiled pattern
+# finds every '@' that starts a mention and a prefix trie over the
+# participants' names resolves the longest name following it, so
+# "@Aarav 1 see you" resolves to "Aarav 1" rather than "Aarav". Unsaved
+# contacts ("+91 98765 43210") are mentioned by their digits
+# ("@919876543210") and are indexed under those digits as well.
+#
+# The index keeps parallel arrays (message row, author id, mentioned user id,
+# date); most mentioned, who mentions whom and the mention timeline are
+# reductions of those arrays and never look at message text again.
+
+# An '@' not preceded by a word character (which skips e-mail addresses),
+# optionally followed by the isolate character newer exports put around names
+MENTION_START = re.compile(r'(?<![\w@])@⁨?(?=[\w+])')
+PHONE_NAME = re.compile(r'^\+?[\d\s\-()]{7,}$')
+
+# Trie nodes map a character to the next node; this key holds the user id
+# of a name ending at the node
+_END = ''
+
+
+def build_trie(users):
+    trie = {}
+    for user_id, name in enumerate(users):
+        keys = [name.lower()]
+        if PHONE_NAME.match(name):
+            keys.append(re.sub(r'\D', '', name))
+        for key in keys:
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node.setdefault(_END, user_id)
+    return trie
+
+
+def resolve(trie, text, start):
+    # Id of the longest participant name at text[start:] that ends at a word
+    # boundary, or -1
+    node = trie
+    found = -1
+    i = start
+    while i < len(text):
+        node = node.get(text[i].lower())
+        if node is None:
+            break
+        i += 1
+        if _END in node and (i == len(text) or not (text[i].isalnum() or text[i] == '_')):
+            found = node[_END]
+    return found
+
+
+class MentionIndex:
+
+    def __init__(self, users, rows, authors, mentioned, dates, unresolved=0):
+        self.users = users
+        self.rows = rows
+        self.authors = authors
+        self.mentioned = mentioned
+        self.dates = dates
+        self.unresolved = unresolved
+
+    @classmethod
+    def build(cls, df):
+        # rows are positions in df; a user mentioned twice in one message counts once
+        is_message = (df['user'] != 'group_notification').to_numpy()
+        users = sorted(df.loc[is_message, 'user'].unique())
+        trie = build_trie(users)
+        candidates = np.flatnonzero(is_message & df['message'].str.contains('@', regex=False).to_numpy())
+        rows, mentioned = [], []
+        unresolved = 0
+        texts = df['message'].to_numpy()
+        for row in candidates:
+            text = texts[row]
+            seen = set()
+            for match in MENTION_START.finditer(text):
+                user_id = resolve(trie, text, match.end())
+                if user_id < 0:
+                    unresolved += 1
+                elif user_id not in seen:
+                    seen.add(user_id)
+                    rows.append(row)
+                    mentioned.append(user_id)
+        rows = np.asarray(rows, dtype=np.int64)
+        authors = pd.Categorical(df['user'].to_numpy()[rows], categories=users).codes.astype(np.int32)
+        return cls(users, rows, authors, np.asarray(mentioned, dtype=np.int32),
+                   df['date'].to_numpy()[rows], unresolved)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _subset(self, keep):
+        return MentionIndex(self.users, self.rows[keep], self.authors[keep], self.mentioned[keep],
+                            self.dates[keep], self.unresolved)
+
+    def for_rows(self, positions):
+        # Mentions in the given df row positions (a view of the same frame)
+        return self._subset(np.isin(self.rows, positions))
+
+    def between(self, start=None, end=None):
+        # Inclusive date range; a bare end date includes the whole day
+        keep = np.ones(len(self.rows), dtype=bool)
+        if start is not None:
+            keep &= self.dates >= pd.Timestamp(start).to_datetime64()
+        if end is not None:
+            high = pd.Timestamp(end)
+            if high == high.normalize():
+                high += pd.Timedelta(days=1)
+            keep &= self.dates < high.to_datetime64()
+        return self._subset(keep)
+
+    def _user_id(self, selected_user):
+        return self.users.index(selected_user) if selected_user in self.users else -1
+
+    def _by_author(self, selected_user):
+        if selected_user == 'Overall':
+            return self
+        return self._subset(self.authors == self._user_id(selected_user))
+
+    def most_mentioned(self, selected_user='Overall'):
+        # Who gets mentioned most (by the selected user's messages)
+        index = self._by_author(selected_user)
+        counts = np.bincount(index.mentioned, minlength=len(self.users))
+        result = pd.DataFrame({'user': self.users, 'mentions': counts})
+        result = result[result['mentions'] > 0]
+        return result.sort_values('mentions', ascending=False, kind='stable').reset_index(drop=True)
+
+    def network(self, selected_user='Overall'):
+        # Sparse who-mentions-whom pairs, most frequent first
+        keep = np.ones(len(self.rows), dtype=bool)
+        if selected_user != 'Overall':
+            user_id = self._user_id(selected_user)
+            keep = (self.authors == user_id) | (self.mentioned == user_id)
+        keys = self.authors[keep].astype(np.int64) * len(self.users) + self.mentioned[keep]
+        keys, counts = np.unique(keys, return_counts=True)
+        users = np.asarray(self.users, dtype=object)
+        result = pd.DataFrame({
+            'user': users[keys // max(len(self.users), 1)] if len(keys) else [],
+            'mentioned': users[keys % max(len(self.users), 1)] if len(keys) else [],
+            'mentions': counts,
+        })
+        return result.sort_values('mentions', ascending=False, kind='stable').reset_index(drop=True)
+
+    def timeline(self, selected_user='Overall'):
+        # Mentions per month (made by the selected user's messages)
+        index = self._by_author(selected_user)
+        if not len(index):
+            return pd.DataFrame(columns=['month', 'mentions'])
+        months = pd.Series(index.dates).dt.to_period('M')
+        timeline = months.value_counts().sort_index().rename('mentions')
+        timeline.index = timeline.index.to_timestamp()
+        return timeline.rename_axis('month').reset_index()
@@ -0,0 +1,280 @@
+import copy
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import helper
+import preprocessor
+
+# Per-user sections warmed up in the background. Each entry is a helper
+# function taking (selected_user, df) whose result is stored per participant.
+USER_VIEW_SECTIONS = [
+    'chat_fetch_stats',
+    'user_activity_timeline',
+    'chat_week_activity_map',
+    'chat_month_activity_map',
+    'chat_activity_heatmap',
+    'chat_most_common_words',
+    'chat_emoji_helper',
+    'chat_monthly_timeline',
+    'calendar_heatmap',
+    'sentiment_trend',
+]
+
+
+class GroupedViews:
+    # Every participant's result of a section from one grouped pass over the
+    # whole chat: the first view() of a section aggregates by (user, key)
+    # once, later users only slice that aggregate. Results equal
+    # helper.<section>(user, df). Sections without a grouped form here
+    # (sentiment_trend, custom ones) run the helper on the user's slice of
+    # a single groupby split.
+
+    def __init__(self, df):
+        self.messages = df[df['user'] != 'group_notification']
+        self.df = df
+        self._grouped = {}
+
+    def _aggregate(self, section):
+        if section not in self._grouped:
+            self._grouped[section] = getattr(self, '_group_' + section, self._group_slices)()
+        return self._grouped[section]
+
+    def view(self, section, user):
+        grouped = self._aggregate(section if hasattr(self, '_group_' + section) else 'slices')
+        slicer = getattr(self, '_slice_' + section, None)
+        if slicer is None:
+            user_df = grouped.get(user, self.messages.iloc[:0])
+            return getattr(helper, section)('Overall', user_df)
+        return slicer(grouped, user)
+
+    def _group_slices(self):
+        return dict(tuple(self.messages.groupby('user', sort=False)))
+
+    def _counts(self, keys):
+        return self.messages.groupby(['user'] + keys).size()
+
+    def _group_chat_fetch_stats(self):
+        message = self.messages['message']
+        per_message = pd.DataFrame({
+            'user': self.messages['user'],
+            'messages': 1,
+            'words': [len(m.split()) for m in message],
+            'media': helper._media_mask(self.messages),
+            'links': [len(helper._find_urls(str(m))) for m in message],
+        })
+        return per_message.groupby('user').sum()
+
+    def _slice_chat_fetch_stats(self, stats, user):
+        if user not in stats.index:
+            return 0, 0, 0, 0
+        row = stats.loc[user]
+        return int(row['messages']), int(row['words']), int(row['media']), int(row['links'])
+
+    def _group_user_activity_timeline(self):
+        return self._counts(['hour'])
+
+    def _slice_user_activity_timeline(self, counts, user):
+        if user not in counts.index.get_level_values('user'):
+            return pd.DataFrame()
+        timeline = counts.xs(user, level='user').rename('message').reset_index()
+        timeline['hour_12'] = timeline['hour'].apply(helper.hour_12)
+        return timeline
+
+    def _group_chat_week_activity_map(self):
+        return self._counts(['day_name'])
+
+    def _slice_chat_week_activity_map(self, counts, user):
+        return self._activity_map(counts, user, helper.WEEKDAYS)
+
+    def _group_chat_month_activity_map(self):
+        return self._counts(['month'])
+
+    def _slice_chat_month_activity_map(self, counts, user):
+        return self._activity_map(counts, user, helper.MONTHS)
+
+    def _activity_map(self, counts, user, labels):
+        if user not in counts.index.get_level_values('user'):
+            return pd.Series(), None
+        activity = counts.xs(user, level='user').reindex(labels, fill_value=0).rename('count')
+        return activity, activity.idxmax()
+
+    def _group_chat_activity_heatmap(self):
+        return self._counts(['day_name', 'period'])
+
+    def _slice_chat_activity_heatmap(self, counts, user):
+        if user not in counts.index.get_level_values('user'):
+            return pd.DataFrame(), None, None, []
+        return helper.heatmap_summary(
+            counts.xs(user, level='user').unstack('period').fillna(0).sort_index().sort_index(axis=1))
+
+    def _group_chat_monthly_timeline(self):
+        return self._counts(['year', 'month_num', 'month'])
+
+    def _slice_chat_monthly_timeline(self, counts, user):
+        if user not in counts.index.get_level_values('user'):
+            return pd.DataFrame()
+        timeline = counts.xs(user, level='user').rename('message').reset_index()
+        timeline['time'] = timeline['month'] + "-" + timeline['year'].astype(str)
+        return timeline
+
+    def _group_chat_most_common_words(self):
+        text = self.messages[~helper._media_mask(self.messages)]
+        return {user: helper.count_words(messages) for user, messages in text.groupby('user')['message']}
+
+    def _slice_chat_most_common_words(self, words, user):
+        if user not in words:
+            return pd.DataFrame()
+        return helper.most_common_words(words[user])
+
+    def _group_chat_emoji_helper(self):
+        return {user: helper.count_emojis(messages) for user, messages in self.messages.groupby('user')['message']}
+
+    def _slice_chat_emoji_helper(self, emojis, user):
+        return helper.emoji_table(emojis.get(user, {}))
+
+    def _group_calendar_heatmap(self):
+        users, days, counts = helper._daily_activity_matrix(self.df)
+        return dict(zip(users, counts)), days
+
+    def _slice_calendar_heatmap(self, grouped, user):
+        rows, days = grouped
+        if user not in rows:
+            return {}
+        active = np.flatnonzero(rows[user])
+        first, last = active[0], active[-1] + 1
+        return helper.calendar_grid(days[first:last], rows[user][first:last])
+
+
+class UserViewWarmup:
+    # Precomputes every participant's view of the dashboard on a background
+    # thread so that switching "Show analysis for" becomes a dictionary lookup.
+
+    def __init__(self, df, sections=None):
+        self.df = df
+        self.sections = list(sections or USER_VIEW_SECTIONS)
+        self.users = sorted(u for u in df['user'].unique() if u != 'group_notification')
+        self.done_users = 0
+        self.error = None
+        self._views = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='user-view-warmup', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            # Each section is aggregated for all participants in one grouped
+            # pass (on the first user), then sliced per participant
+            grouped = GroupedViews(self.df)
+            for user in self.users:
+                views = {}
+                for section in self.sections:
+                    try:
+                        views[section] = grouped.view(section, user)
+                    except Exception as e:
+                        logging.warning(f"Warm-up of {section} for {user} failed: {e}")
+                with self._lock:
+                    for section, result in views.items():
+                        self._views[(section, user)] = result
+                    self.done_users += 1
+        except Exception as e:
+            logging.exception("User view warm-up failed")
+            self.error = e
+
+    @property
+    def total_users(self):
+        return len(self.users)
+
+    @property
+    def finished(self):
+        return self.error is not None or self.done_users >= self.total_users
+
+    def progress(self):
+        if not self.users:
+            return 1.0
+        return self.done_users / self.total_users
+
+    def get(self, section, user):
+        # Returns a copy of the precomputed result, or None when it is not ready.
+        # The app mutates returned frames (e.g. shifting the index), so the
+        # cached originals must never be handed out directly.
+        with self._lock:
+            result = self._views.get((section, user))
+        if result is None:
+            return None
+        return copy.deepcopy(result)
+
+
+def user_view(warmup, section, selected_user, df, source=helper, stored=None):
+    # Looks up a precomputed participant view, falling back to computing it
+    # with the given helper module (the instrumented proxy when profiling).
+    # stored is the ingest.ChatAggregates of the unfiltered chat, if any.
+    if stored is not None and section in stored.SECTIONS:
+        return stored.view(section, selected_user)
+    if warmup is not None and selected_user != 'Overall':
+        result = warmup.get(section, selected_user)
+        if result is not None:
+            return result
+    return getattr(source, section)(selected_user, df)
+
+
+class SentimentUpgrade:
+    # Upgrades a quick-profile frame (parsed without sentiment) to the full
+    # profile on a background thread: messages are scored with VADER in
+    # blocks, in worker processes when workers > 1, and the score columns
+    # are added to a copy. The result equals a full parse of the same export.
+
+    def __init__(self, df, workers=1, block_size=20000):
+        self.df = df
+        self.workers = workers or 1
+        self.block_size = block_size
+        self.done_messages = 0
+        self.result = None
+        self.error = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='sentiment-upgrade', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            messages = self.df['message'].tolist()
+            blocks = [messages[i:i + self.block_size] for i in range(0, len(messages), self.block_size)]
+            scores = ([], [], [])
+            if self.workers > 1 and len(blocks) > 1:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(blocks))) as pool:
+                    self._collect(scores, pool.map(preprocessor.sentiment_scores, blocks))
+            else:
+                self._collect(scores, map(preprocessor.sentiment_scores, blocks))
+            df = self.df.copy()
+            preprocessor.add_sentiment(df, scores)
+            self.result = df
+        except Exception as e:
+            logging.exception("Sentiment upgrade failed")
+            self.error = e
+
+    def _collect(self, scores, block_scores):
+        for block in block_scores:
+            for column, values in zip(scores, block):
+                column.extend(values)
+            self.done_messages += len(block[0])
+
+    @property
+    def finished(self):
+        return self.error is not None or self.result is not None
+
+    def progress(self):
+        if not len(self.df):
+            return 1.0
+        return self.done_messages / len(self.df)
@@ -1,19 +1,378 @@
 import re
+import os
+import io
+import functools
+import mmap
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
-# Download the VADER lexicon for sentiment analysis
-nltk.download('vader_lexicon', quiet=True)
+# VADER lexicon bundled with the app (nltk_data/sentiment/vader_lexicon.zip),
+# so sentiment scoring never downloads anything at startup
+NLTK_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data')
 
-def preprocess(data):
-    # Regular expression for WhatsApp chat format
-    pattern = r'\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}\s-\s'
+@functools.lru_cache(maxsize=None)
+def sentiment_analyzer():
+    # NLTK is slow to import, so it is loaded with the analyzer on first use
+    import nltk
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return SentimentIntensityAnalyzer()
 
+# Regular expression for WhatsApp chat format
+DATE_PATTERN = r'\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}\s-\s'
+
+# Date formats tried in order; the first one every message matches is used
+DATE_FORMATS = ['%d/%m/%y, %H:%M - ', '%m/%d/%y, %H:%M - ']
+
+# Chats smaller than this are parsed serially, as starting worker processes
+# would cost more than it saves
+PARALLEL_MIN_CHARS = 4 * 2 ** 20
+
+# Exports read from disk are parsed in byte ranges of about this size; small
+# ranges keep the transient memory of parsing one range low
+STREAM_BLOCK_BYTES = 2 ** 20
+
+INVALID_FORMAT = ("Invalid WhatsApp chat format. Expected format: 'MM/DD/YY, HH:MM - User: Message' "
+                  "or 'DD/MM/YY, HH:MM - User: Message'")
+
+# Message starts at the beginning of a line, used to place chunk boundaries
+# in text (str) and in memory-mapped files (bytes)
+_LINE_START = re.compile(r'\n(?=' + DATE_PATTERN + ')')
+_DATE_RE = re.compile(DATE_PATTERN)
+_LINE_START_BYTES = re.compile(_LINE_START.pattern.encode())
+_DATE_RE_BYTES = re.compile(DATE_PATTERN.encode())
+_AUTHOR_SEPARATOR = re.compile(r':\s')
+
+# Message kinds, classified once at parse time into the categorical 'kind'
+# column. Each entry is matched against the whole message (ignoring
+# surrounding whitespace and the marks iOS exports add), except 'edited',
+# which is a suffix on the edited text. Markers cover Android and iOS
+# exports in English, German, Spanish, Portuguese, French, Italian and
+# Indonesian.
+_ATTACHED = r'(?:\S+\.(?:{0}) \(file attached\)|<attached: [^>]+\.(?:{0})>)'
+MESSAGE_KIND_PATTERNS = {
+    'media': r'<(?:Media omitted|Medien ausgeschlossen|Multimedia omitido|Mídia oculta|Médias omis'
+             r'|Media tidak disertakan|Media weggelaten|Media omessi)>',
+    'image': r'(?:image omitted|imagen omitida|Bild weggelassen|imagem ocultada|image absente|immagine omessa'
+             r'|gambar tidak disertakan|' + _ATTACHED.format('jpe?g|png|heic') + ')',
+    'video': r'(?:video omitted|video omitido|Video weggelassen|vídeo ocultado|vidéo absente|video omesso'
+             r'|video tidak disertakan|' + _ATTACHED.format('mp4|3gp|mov') + ')',
+    'audio': r'(?:audio omitted|audio omitido|Audio weggelassen|áudio ocultado|audio omis|audio omesso'
+             r'|audio tidak disertakan|' + _ATTACHED.format('opus|mp3|m4a|aac|ogg') + ')',
+    'sticker': r'(?:sticker omitted|sticker omitido|Sticker weggelassen|figurinha omitida|autocollant omis'
+               r'|sticker omesso|stiker tidak disertakan|' + _ATTACHED.format('webp') + ')',
+    'gif': r'(?:GIF omitted|GIF omitido|GIF weggelassen|GIF omis|GIF omessa|GIF tidak disertakan)',
+    'contact': r'(?:Contact card omitted|tarjeta de contacto omitida|Kontaktkarte weggelassen'
+               r'|cartão de contato omitido|fiche contact omise|scheda contatto omessa'
+               r'|kartu kontak tidak disertakan|' + _ATTACHED.format('vcf') + ')',
+    'document': r'(?:document omitted|documento omitido|Dokument weggelassen|document omis|documento omesso'
+                r'|dokumen tidak disertakan|' + _ATTACHED.format('[A-Za-z0-9]{1,5}') + ')',
+    'location': r'(?:live )?(?:location|ubicación|Standort|localização|position|posizione|lokasi): https?://\S+',
+    # The upper-case marker on its own line, the question, then one line per
+    # option; case-sensitive so that ordinary "Poll: ..." text stays text
+    'poll': r'(?-i:(?:POLL|ENCUESTA|UMFRAGE|ENQUETE|SONDAGE|SONDAGGIO|POLLING):\r?\n[^\r\n]+'
+            r'(?:\r?\n(?:OPTION|OPCIÓN|OPÇÃO|OPZIONE|OPSI): [^\r\n]*)+)',
+    'deleted': r'(?:This message was deleted|You deleted this message|Diese Nachricht wurde gelöscht'
+               r'|Du hast diese Nachricht gelöscht|Se eliminó este mensaje|Eliminaste este mensaje'
+               r'|Mensagem apagada|Você apagou esta mensagem|Ce message a été supprimé'
+               r'|Vous avez supprimé ce message|Questo messaggio è stato eliminato|Hai eliminato questo messaggio'
+               r'|Pesan ini telah dihapus|Anda menghapus pesan ini)\.?',
+}
+_EDITED = (r'<(?:This message was edited|Diese Nachricht wurde bearbeitet|Se editó este mensaje\.?'
+           r'|Mensagem editada|Ce message a été modifié|Questo messaggio è stato modificato|Pesan ini diedit)>')
+MESSAGE_KINDS = ['text'] + list(MESSAGE_KIND_PATTERNS) + ['edited']
+MEDIA_KINDS = ['media', 'image', 'video', 'audio', 'sticker', 'gif', 'document', 'contact']
+# One alternation with a named group per kind; match.lastgroup is the kind
+_KIND_RE = re.compile(
+    r'\A[\s\u200e\u200f]*(?:' + '|'.join(f'(?P<{kind}>{pattern})' for kind, pattern in MESSAGE_KIND_PATTERNS.items())
+    + r')[\s\u200e\u200f]*\Z|(?P<edited>' + _EDITED + r')\s*\Z',
+    re.IGNORECASE)
+# Longest possible DATE_PATTERN match (2+1+2+1+4 date, ", ", 2+1+2 time, " - ")
+_MAX_MATCH = 22
+
+def preprocess(data, workers=1):
     # Validate file format
-    if not re.search(pattern, data):
-        raise ValueError(
-            "Invalid WhatsApp chat format. Expected format: 'MM/DD/YY, HH:MM - User: Message' or 'DD/MM/YY, HH:MM - User: Message'")
+    if not re.search(DATE_PATTERN, data):
+        raise ValueError(INVALID_FORMAT)
+
+    if workers and workers > 1 and len(data) >= PARALLEL_MIN_CHARS:
+        return preprocess_parallel(data, workers)
+    df, _ = _parse_chunk(data)
+    return df
+
+def _straddles(data, boundary, date_re=_DATE_RE):
+    # True if a serial scan could match a timestamp across the boundary
+    for start in range(max(0, boundary - _MAX_MATCH), boundary):
+        match = date_re.match(data, start)
+        if match and match.end() > boundary:
+            return True
+    return False
+
+def is_message_start(data, pos):
+    # True if a message starts at offset pos of str, bytes or an mmap: a
+    # timestamp that a serial scan of the whole text would also match there
+    date_re = _DATE_RE if isinstance(data, str) else _DATE_RE_BYTES
+    return bool(date_re.match(data, pos)) and not _straddles(data, pos, date_re)
+
+def chunk_boundaries(data, parts):
+    # Offsets splitting data into about `parts` chunks, each starting with a
+    # timestamp at the beginning of a line. Works on str and on bytes-like
+    # objects such as an mmap of the export.
+    if isinstance(data, str):
+        line_start, date_re = _LINE_START, _DATE_RE
+    else:
+        line_start, date_re = _LINE_START_BYTES, _DATE_RE_BYTES
+    bounds = [0]
+    for i in range(1, parts):
+        target = max(len(data) * i // parts, bounds[-1] + 1)
+        boundary = None
+        while True:
+            match = line_start.search(data, target)
+            if match is None:
+                break
+            if not _straddles(data, match.start() + 1, date_re):
+                boundary = match.start() + 1
+                break
+            target = match.start() + 1
+        if boundary is None:
+            break
+        bounds.append(boundary)
+    bounds.append(len(data))
+    return bounds
+
+def preprocess_parallel(data, workers=None):
+    # Parses chunks in worker processes and concatenates them in order; the
+    # result is identical to preprocess(data)
+    workers = workers or os.cpu_count() or 1
+    bounds = chunk_boundaries(data, workers)
+    chunks = [data[a:b] for a, b in zip(bounds, bounds[1:])]
+    if len(chunks) < 2:
+        return preprocess(data)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        parsed = list(pool.map(_parse_chunk, chunks))
+        df, _ = _settle_date_format(
+            parsed, lambda redo, formats: pool.map(_parse_chunk, [chunks[i] for i in redo], [formats] * len(redo)))
+    return df
+
+def preprocess_file(path, workers=1, sentiment=True):
+    # Parses a UTF-8 export straight from disk; same result as preprocess() of
+    # the file read in text mode
+    df, _ = parse_file(path, workers, sentiment)
+    return df
+
+def parse_file(path, workers=1, sentiment=True):
+    # Returns (DataFrame, date format used). The file is memory-mapped only
+    # to place chunk boundaries, then each byte range is read and decoded on
+    # its own (in a worker process when workers > 1), so the export is never
+    # held in memory as one string. With sentiment=False the VADER columns
+    # are left out (see add_sentiment).
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(INVALID_FORMAT)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if not _DATE_RE_BYTES.search(mm):
+                raise ValueError(INVALID_FORMAT)
+            parts = max(workers or 1, -(-len(mm) // STREAM_BLOCK_BYTES))
+            bounds = chunk_boundaries(mm, parts)
+    ranges = list(zip(bounds, bounds[1:]))
+
+    if workers and workers > 1 and len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            parsed = list(pool.map(parse_range, [path] * len(ranges), ranges,
+                                   [DATE_FORMATS] * len(ranges), [sentiment] * len(ranges)))
+            return _settle_date_format(parsed, lambda redo, formats: pool.map(
+                parse_range, [path] * len(redo), [ranges[i] for i in redo], [formats] * len(redo),
+                [sentiment] * len(redo)))
+    parsed = [parse_range(path, byte_range, DATE_FORMATS, sentiment) for byte_range in ranges]
+    return _settle_date_format(
+        parsed, lambda redo, formats: [parse_range(path, ranges[i], formats, sentiment) for i in redo])
+
+def parse_range(path, byte_range, date_formats=DATE_FORMATS, sentiment=True):
+    # Returns (DataFrame, date format used) for bytes [start, end) of an
+    # export, with the first of date_formats that parses every date.
+    # Boundaries sit before a timestamp at a line start (see
+    # is_message_start), never inside a multi-byte character, so each range
+    # decodes on its own. Line endings are translated as text-mode open()
+    # would (CRLF never straddles a boundary, which follows a newline).
+    start, end = byte_range
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start).decode('utf-8')
+    if '\r' in data:
+        data = data.replace('\r\n', '\n').replace('\r', '\n')
+    return _parse_chunk(data, date_formats, sentiment)
+
+def preprocess_stream(open_stream, block_chars=STREAM_BLOCK_BYTES, sentiment=True, sketch=None):
+    # Parses text read block by block from open_stream(), a callable returning
+    # a fresh text stream. Each block is cut after its last message start and
+    # the tail carried into the next one, so at most one block is in memory.
+    # The stream is re-opened only if chunks disagree on the date format.
+    with open_stream() as stream:
+        parsed = list(parse_stream(stream, block_chars, DATE_FORMATS, sentiment, sketch))
+    if not any(len(df) for df, _ in parsed):
+        raise ValueError(INVALID_FORMAT)
+
+    def reparse(redo, date_formats):
+        wanted = set(redo)
+        with open_stream() as stream:
+            return [_parse_chunk(chunk, date_formats, sentiment)
+                    for i, chunk in enumerate(stream_chunks(stream, block_chars)) if i in wanted]
+    df, _ = _settle_date_format(parsed, reparse)
+    return df
+
+def parse_stream(stream, block_chars=STREAM_BLOCK_BYTES, date_formats=DATE_FORMATS, sentiment=True, sketch=None):
+    # Yields (DataFrame, date format used) per block of the stream, parsing
+    # the text exactly as read: files opened in text mode (the default
+    # newline=None) arrive with CRLF already translated. A sketch
+    # (sketches.ChatSketch) is fed each block's frame as soon as it is parsed,
+    # so consumers that only need the sketch hold one block at a time.
+    for chunk in stream_chunks(stream, block_chars):
+        df, date_format = _parse_chunk(chunk, date_formats, sentiment)
+        if sketch is not None:
+            sketch.update_frame(df)
+        yield df, date_format
+
+def stream_chunks(stream, block_chars):
+    carry = ''
+    while True:
+        block = stream.read(block_chars)
+        if not block:
+            break
+        buffer = carry + block
+        boundary = _last_boundary(buffer)
+        if boundary:
+            yield buffer[:boundary]
+            carry = buffer[boundary:]
+        else:
+            carry = buffer
+    if carry:
+        yield carry
+
+def _last_boundary(buffer):
+    # Offset of the last complete timestamp at a line start, or None
+    pos = len(buffer)
+    while True:
+        pos = buffer.rfind('\n', 0, pos)
+        if pos < 0:
+            return None
+        if _DATE_RE.match(buffer, pos + 1) and not _straddles(buffer, pos + 1):
+            return pos + 1
+
+# WhatsApp "Export chat -> Include media" archives: the chat is _chat.txt
+# (iOS) or "WhatsApp Chat with <name>.txt" (Android) next to the attachments
+MEDIA_PREFIXES = {'IMG': 'image', 'VID': 'video', 'PTT': 'voice note', 'AUD': 'audio',
+                  'STK': 'sticker', 'DOC': 'document'}
+MEDIA_EXTENSIONS = {
+    'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'heic': 'image',
+    'mp4': 'video', 'mov': 'video', '3gp': 'video',
+    'opus': 'voice note', 'mp3': 'audio', 'm4a': 'audio', 'aac': 'audio', 'ogg': 'audio',
+    'webp': 'sticker', 'pdf': 'document', 'vcf': 'contact',
+}
+_MEDIA_DATE = re.compile(r'-(\d{8})-WA\d+')
+
+def find_chat_member(archive):
+    names = [info for info in archive.infolist() if not info.is_dir() and info.filename.lower().endswith('.txt')]
+    for info in names:
+        if os.path.basename(info.filename) == '_chat.txt':
+            return info
+    if not names:
+        raise ValueError("The .zip file does not contain a WhatsApp chat (.txt) export.")
+    return max(names, key=lambda info: info.file_size)
+
+def preprocess_zip(path, sentiment=True):
+    # Streams the chat member through the decompressor into the parser;
+    # nothing is extracted to disk and media entries are never read. The
+    # member is decoded in text mode, so CRLF exports parse like a .txt file.
+    try:
+        with zipfile.ZipFile(path) as archive:
+            member = find_chat_member(archive)
+
+            def open_stream():
+                return io.TextIOWrapper(archive.open(member), encoding='utf-8')
+            return preprocess_stream(open_stream, sentiment=sentiment)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a valid .zip export: {e}")
+
+def preprocess_path(path, workers=1, sentiment=True):
+    # A .txt export from disk or the chat inside a .zip export, by suffix
+    if path.lower().endswith('.zip'):
+        return preprocess_zip(path, sentiment=sentiment)
+    return preprocess_file(path, workers=workers, sentiment=sentiment)
+
+def zip_media_index(path):
+    # One row per attachment, read from the central directory only
+    rows = []
+    with zipfile.ZipFile(path) as archive:
+        chat = find_chat_member(archive)
+        for info in archive.infolist():
+            if info.is_dir() or info.filename == chat.filename:
+                continue
+            name = os.path.basename(info.filename)
+            extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+            kind = MEDIA_PREFIXES.get(name.split('-', 1)[0].upper()) or MEDIA_EXTENSIONS.get(extension, 'other')
+            sent = _MEDIA_DATE.search(name)
+            rows.append({
+                'filename': name,
+                'kind': kind,
+                'extension': extension,
+                'compressed_size': info.compress_size,
+                'size': info.file_size,
+                'date': pd.to_datetime(sent.group(1), format='%Y%m%d', errors='coerce') if sent
+                        else pd.Timestamp(*info.date_time),
+            })
+    return pd.DataFrame(rows, columns=['filename', 'kind', 'extension', 'compressed_size', 'size', 'date'])
+
+def _settle_date_format(parsed, reparse):
+    # A serial parse uses the first format that fits every message, so chunks
+    # that settled on an earlier format are parsed again with the later ones.
+    # Returns (DataFrame, date format).
+    formats = {date_format for _, date_format in parsed}
+    while len(formats) > 1:
+        first = max(DATE_FORMATS.index(f) for f in formats)
+        redo = [i for i, (_, f) in enumerate(parsed) if DATE_FORMATS.index(f) < first]
+        for i, result in zip(redo, reparse(redo, DATE_FORMATS[first:])):
+            parsed[i] = result
+        formats = {date_format for _, date_format in parsed}
+    if len(parsed) == 1:
+        return parsed[0]
+    return pd.concat([df for df, _ in parsed], ignore_index=True), parsed[0][1]
+
+def split_user_messages(user_messages):
+    # Separates "Author: text" into authors and texts; lines without an
+    # author are group notifications. Same result as
+    # re.split(r'([\w\W]+?):\s', message) with the author at entry[1] and
+    # " ".join(entry[2:]) as the text, but each ": " is found with one
+    # forward search instead of a lazy match retried at every position.
+    users = []
+    messages = []
+    for message in user_messages:
+        pieces = []
+        pos = 0
+        while True:
+            # A separator needs at least one character before it
+            match = _AUTHOR_SEPARATOR.search(message, pos + 1)
+            if match is None:
+                break
+            pieces.append(message[pos:match.start()])
+            pos = match.end()
+        if pieces:  # User name exists
+            users.append(pieces[0])
+            entry = []
+            for piece in pieces[1:]:
+                entry += ['', piece]
+            entry.append(message[pos:])
+            messages.append(" ".join(entry))
+        else:  # Group notification
+            users.append('group_notification')
+            messages.append(message)
+    return users, messages
+
+def _parse_chunk(data, date_formats=DATE_FORMATS, sentiment=True):
+    # Returns (DataFrame, date format used) for text starting at a timestamp
+    pattern = DATE_PATTERN
 
     # Split text into messages and dates
     messages = re.split(pattern, data)[1:]
@@ -27,26 +386,18 @@ def preprocess(data):
     df = pd.DataFrame({'user_message': messages, 'message_date': dates})
 
     # Convert date, supporting both formats
-    try:
-        df['message_date'] = pd.to_datetime(df['message_date'], format='%d/%m/%y, %H:%M - ')
-    except:
+    for date_format in date_formats:
         try:
-            df['message_date'] = pd.to_datetime(df['message_date'], format='%m/%d/%y, %H:%M - ')
-        except:
-            raise ValueError("Date format not recognized. Use 'MM/DD/YY, HH:MM - ' or 'DD/MM/YY, HH:MM - '.")
+            df['message_date'] = pd.to_datetime(df['message_date'], format=date_format)
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError("Date format not recognized. Use 'MM/DD/YY, HH:MM - ' or 'DD/MM/YY, HH:MM - '.")
     df.rename(columns={'message_date': 'date'}, inplace=True)
 
     # Extract user and message
-    users = []
-    messages = []
-    for message in df['user_message']:
-        entry = re.split(r'([\w\W]+?):\s', message)
-        if entry[1:]:  # User name exists
-            users.append(entry[1])
-            messages.append(" ".join(entry[2:]))
-        else:  # Group notification
-            users.append('group_notification')
-            messages.append(entry[0])
+    users, messages = split_user_messages(df['user_message'])
 
     df['user'] = users
     df['message'] = messages
@@ -72,22 +423,35 @@ def preprocess(data):
         else:
             period.append(str(hour) + "-" + str(hour + 1))
     df['period'] = period
+    df['kind'] = classify_messages(df['message'])
+
+    if sentiment:
+        add_sentiment(df, sentiment_scores(df['message']))
 
-    # Sentiment analysis with VADER
-    sentiments = SentimentIntensityAnalyzer()
-    df["po"] = df["message"].apply(lambda x: sentiments.polarity_scores(x)["pos"])
-    df["ne"] = df["message"].apply(lambda x: sentiments.polarity_scores(x)["neg"])
-    df["nu"] = df["message"].apply(lambda x: sentiments.polarity_scores(x)["neu"])
+    return df, date_format
 
-    # Determine overall sentiment value
-    def sentiment(row):
-        if row["po"] >= row["ne"] and row["po"] >= row["nu"]:
-            return 1
-        if row["ne"] >= row["po"] and row["ne"] >= row["nu"]:
-            return -1
-        if row["nu"] >= row["po"] and row["nu"] >= row["ne"]:
-            return 0
+def classify_messages(messages):
+    # Categorical message kind per message, see MESSAGE_KINDS
+    search = _KIND_RE.search
+    kinds = []
+    for message in messages:
+        match = search(message)
+        kinds.append(match.lastgroup if match else 'text')
+    return pd.Categorical(kinds, categories=MESSAGE_KINDS)
 
-    df['value'] = df.apply(sentiment, axis=1)
+def sentiment_scores(messages):
+    # VADER (pos, neg, neu) lists for a sequence of messages; each message is
+    # scored once. Module level so it can run in worker processes.
+    sentiments = sentiment_analyzer()
+    scores = [sentiments.polarity_scores(message) for message in messages]
+    return ([s["pos"] for s in scores], [s["neg"] for s in scores], [s["neu"] for s in scores])
 
+def add_sentiment(df, scores):
+    # Adds the po/ne/nu score columns and the overall sentiment value
+    # (1 positive, -1 negative, 0 neutral; ties go to the first) in place
+    df["po"], df["ne"], df["nu"] = scores
+    po, ne, nu = df["po"], df["ne"], df["nu"]
+    positive = (po >= ne) & (po >= nu)
+    negative = ~positive & (ne >= po) & (ne >= nu)
+    df['value'] = positive.astype('int64') - negative.astype('int64')
     return df
@@ -0,0 +1,235 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import batch_analyze
+import preprocessor
+
+# Local HTTP analysis service. POST a chat export to /analyze and get the same
+# JSON bundle batch_analyze.py writes; GET /health reports the pool state.
+#
+#   python service.py --port 8765 --workers 4
+#   curl --data-binary @chat.txt "http://127.0.0.1:8765/analyze?user=Priya&keyword=party"
+#
+# Analyses run in a bounded process pool. Identical uploads (same bytes and
+# options) share one in-flight job and finished results are kept in a small
+# LRU cache. When every worker is busy and the queue is full the request is
+# rejected with 503 and a Retry-After header instead of piling up. A job whose
+# requests all timed out is cancelled if it has not started; if it is already
+# running it no longer counts towards that limit.
+
+
+class Saturated(Exception):
+    pass
+
+
+def analyze_payload(body, selected_user='Overall', keyword=None):
+    # Runs in a worker process; returns the encoded JSON bundle
+    data = body.decode('utf-8')
+    _, _, bundle = batch_analyze.analyze_text(data, selected_user, keyword)
+    return json.dumps(bundle, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _warm_worker():
+    # Load the lexicon once per worker instead of on its first request
+    logging.getLogger().setLevel(logging.WARNING)
+    preprocessor.sentiment_analyzer()
+
+
+class AnalysisService:
+
+    def __init__(self, workers=None, queue_size=None, cache_size=32):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        # Jobs allowed to wait for a free worker before new uploads are rejected
+        self.queue_size = self.workers if queue_size is None else queue_size
+        self.cache_size = cache_size
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # Reentrant: cancelling a future under the lock runs _finished inline
+        self._lock = threading.RLock()
+        self._inflight = {}
+        # Requests still waiting on each in-flight job
+        self._waiting = {}
+        self._keys = {}
+        self._cache = OrderedDict()
+        self.stats = {'requests': 0, 'computed': 0, 'deduplicated': 0, 'cache_hits': 0, 'rejected': 0,
+                      'timed_out': 0, 'cancelled': 0}
+
+    def submit(self, body, selected_user='Overall', keyword=None):
+        # Returns a future resolving to the JSON bytes, or raises Saturated
+        key = (hashlib.sha256(body).hexdigest(), selected_user, keyword)
+        with self._lock:
+            self.stats['requests'] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+                return _done(self._cache[key])
+            if key in self._inflight:
+                self.stats['deduplicated'] += 1
+                self._waiting[key] += 1
+                return self._inflight[key]
+            if self._awaited() >= self.workers + self.queue_size:
+                self.stats['rejected'] += 1
+                raise Saturated()
+            future = self.pool.submit(analyze_payload, body, selected_user, keyword)
+            self._inflight[key] = future
+            self._waiting[key] = 1
+            self._keys[future] = key
+            self.stats['computed'] += 1
+        future.add_done_callback(lambda f: self._finished(key, f))
+        return future
+
+    def _awaited(self):
+        # In-flight jobs someone is still waiting for (abandoned ones excluded)
+        return sum(1 for waiting in self._waiting.values() if waiting)
+
+    def abandon(self, future):
+        # A request stopped waiting (timed out); the last one to leave cancels
+        # the job if it is still queued. The check and the cancel happen under
+        # the lock, so a duplicate upload cannot join a job being cancelled.
+        with self._lock:
+            self.stats['timed_out'] += 1
+            key = self._keys.get(future)
+            if key is None or key not in self._waiting:
+                return
+            self._waiting[key] = max(self._waiting[key] - 1, 0)
+            if self._waiting[key] == 0 and future.cancel():
+                self.stats['cancelled'] += 1
+
+    def _finished(self, key, future):
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._waiting.pop(key, None)
+            self._keys.pop(future, None)
+            if self.cache_size and not future.cancelled() and future.exception() is None:
+                self._cache[key] = future.result()
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+    def health(self):
+        with self._lock:
+            return dict(self.stats, workers=self.workers, queue_size=self.queue_size,
+                        inflight=self._awaited(), abandoned=len(self._inflight) - self._awaited(),
+                        cached=len(self._cache))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    server_version = 'ChatAnalyzer/1.0'
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self._send_json(200, self.server.service.health())
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/analyze':
+            self._send_json(404, {'error': 'not found'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self._send_json(400, {'error': 'empty upload'})
+            return
+        if length > self.server.max_bytes:
+            self._send_json(413, {'error': f"upload larger than {self.server.max_bytes} bytes"})
+            return
+        body = self.rfile.read(length)
+        query = parse_qs(url.query)
+        selected_user = query.get('user', ['Overall'])[0]
+        keyword = query.get('keyword', [None])[0] or None
+
+        try:
+            future = self.server.service.submit(body, selected_user, keyword)
+        except Saturated:
+            self._send_json(503, {'error': 'all workers are busy, retry later'},
+                            {'Retry-After': str(self.server.retry_after)})
+            return
+        try:
+            payload = future.result(timeout=self.server.timeout_s)
+        except UnicodeDecodeError:
+            self._send_json(400, {'error': 'upload is not UTF-8 text'})
+            return
+        except TimeoutError:
+            self.server.service.abandon(future)
+            self._send_json(504, {'error': 'analysis timed out'})
+            return
+        except ValueError as e:
+            self._send_json(422, {'error': f"could not parse chat: {e}"})
+            return
+        except Exception as e:
+            logging.exception("Analysis failed")
+            self._send_json(500, {'error': f"analysis failed: {e}"})
+            return
+        self._send(200, payload)
+
+    def _send_json(self, status, value, headers=None):
+        self._send(status, json.dumps(value).encode('utf-8'), headers)
+
+    def _send(self, status, payload, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+
+def make_server(host='127.0.0.1', port=8765, service=None, max_mb=50, timeout_s=300, retry_after=5):
+    server = ThreadingHTTPServer((host, port), AnalysisHandler)
+    server.daemon_threads = True
+    server.service = service or AnalysisService()
+    server.max_bytes = int(max_mb * 2 ** 20)
+    server.timeout_s = timeout_s
+    server.retry_after = retry_after
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve chat analyses over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to bind (default: localhost only)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument('--queue', type=int, help="Jobs allowed to wait for a worker before returning 503 "
+                                                  "(default: one per worker)")
+    parser.add_argument('--cache', type=int, default=32, help="Finished results kept for repeated uploads")
+    parser.add_argument('--max-mb', type=float, default=50, help="Largest accepted upload in MB")
+    parser.add_argument('--timeout', type=float, default=300, help="Seconds to wait for an analysis")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.INFO)
+
+    service = AnalysisService(args.workers, args.queue, args.cache)
+    server = make_server(args.host, args.port, service, args.max_mb, args.timeout)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} with {service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
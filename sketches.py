@@ -0,0 +1,287 @@
+import heapq
+import io
+import math
+import re
+import zipfile
+from collections import Counter
+from urllib.parse import urlsplit
+
+import emoji
+import numpy as np
+import pandas as pd
+
+import helper
+import preprocessor
+
+# Approximate analytics for very large chats. ChatSketch is fed by the chunk
+# parser (preprocessor.parse_stream) while an export is read once, block by
+# block, and keeps only fixed-size summaries, so memory stays bounded
+# whatever the chat size:
+#
+#   top words / emojis   Space-Saving: each count is at most `error` too high
+#   top link domains     Count-Min: at most eps * N too high with prob. 1 - delta
+#   distinct vocabulary  HyperLogLog: relative standard error 1.04 / sqrt(m)
+#   lengths              fixed-bin histograms (exact per bin)
+
+# Message length bins in characters and words; the last bin is open-ended
+LENGTH_BINS = [0, 1, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+WORD_BINS = [0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144]
+
+
+def _hashes(items, seed):
+    # Stable 64-bit hashes (the same in every process), one per item
+    return pd.util.hash_array(np.asarray(items, dtype=object), hash_key=f"{seed:016d}")
+
+
+class SpaceSaving:
+    # Heavy hitters with `capacity` counters
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}
+        self._errors = {}
+        self._heap = []
+
+    def update(self, counts):
+        # counts: {item: occurrences} for one block
+        for item, weight in counts.items():
+            self.total += weight
+            if item in self._counts:
+                self._counts[item] += weight
+            elif len(self._counts) < self.capacity:
+                self._counts[item] = weight
+                self._errors[item] = 0
+            else:
+                # The new item takes over the smallest counter and inherits
+                # its count as the possible overestimate
+                floor, victim = self._pop_min()
+                del self._counts[victim], self._errors[victim]
+                self._counts[item] = floor + weight
+                self._errors[item] = floor
+            heapq.heappush(self._heap, (self._counts[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, item) for item, count in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        # The heap holds stale entries; skip those whose count has moved on
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self._counts.get(item) == count:
+                return count, item
+
+    @property
+    def error(self):
+        # No count is overestimated by more than the smallest counter (<= total / capacity)
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+
+    def top(self, k=20):
+        items = sorted(self._counts.items(), key=lambda pair: (-pair[1], pair[0]))[:k]
+        return pd.DataFrame({
+            'item': [item for item, _ in items],
+            'estimate': [count for _, count in items],
+            'at_least': [count - self._errors[item] for item, count in items],
+        })
+
+
+class CountMin:
+    # Frequency table of `depth` hashed rows of `width` counters
+
+    def __init__(self, width=2048, depth=5, candidates=50):
+        self.width = width
+        self.depth = depth
+        self.candidates = candidates
+        self.total = 0
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._candidates = {}
+
+    @property
+    def epsilon(self):
+        return math.e / self.width
+
+    @property
+    def delta(self):
+        return math.exp(-self.depth)
+
+    def _columns(self, items):
+        return [(_hashes(items, seed) % np.uint64(self.width)).astype(np.int64) for seed in range(self.depth)]
+
+    def update(self, counts):
+        if not counts:
+            return
+        items = list(counts)
+        weights = np.fromiter(counts.values(), dtype=np.int64, count=len(items))
+        columns = self._columns(items)
+        for row, cols in enumerate(columns):
+            np.add.at(self.table[row], cols, weights)
+        self.total += int(weights.sum())
+        estimates = np.min([self.table[row, cols] for row, cols in enumerate(columns)], axis=0)
+        # Only the current heaviest items are remembered as top-k candidates
+        self._candidates.update(zip(items, estimates.tolist()))
+        if len(self._candidates) > 2 * self.candidates:
+            heaviest = heapq.nlargest(self.candidates, self._candidates.items(), key=lambda pair: pair[1])
+            self._candidates = dict(heaviest)
+
+    def estimate(self, items):
+        columns = self._columns(items)
+        return np.min([self.table[row, cols] for row, cols in enumerate(columns)], axis=0)
+
+    @property
+    def error(self):
+        return self.epsilon * self.total
+
+    def top(self, k=20):
+        if not self._candidates:
+            return pd.DataFrame(columns=['item', 'estimate'])
+        items = list(self._candidates)
+        frame = pd.DataFrame({'item': items, 'estimate': self.estimate(items)})
+        return frame.sort_values(['estimate', 'item'], ascending=[False, True]).head(k).reset_index(drop=True)
+
+
+class HyperLogLog:
+    # Distinct count in 2 ** precision one-byte registers
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def update(self, items):
+        if not len(items):
+            return
+        p = self.precision
+        hashes = _hashes(items, 99)
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        # Position of the leftmost 1-bit in the remaining 64 - p bits; the
+        # float conversion is exact because the value has fewer than 53 bits
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (64 - p) - bit_length + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are empty
+            return m * math.log(m / zeros)
+        return float(raw)
+
+
+class FixedHistogram:
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges)
+        self.counts = np.zeros(len(edges), dtype=np.int64)
+
+    def update(self, values):
+        if not len(values):
+            return
+        bins = np.searchsorted(self.edges, np.asarray(values), side='right') - 1
+        self.counts += np.bincount(np.clip(bins, 0, len(self.edges) - 1), minlength=len(self.edges))
+
+    def _label(self, i):
+        if i == len(self.edges) - 1:
+            return f"{self.edges[i]}+"
+        if self.edges[i + 1] - self.edges[i] == 1:
+            return str(self.edges[i])
+        return f"{self.edges[i]}-{self.edges[i + 1] - 1}"
+
+    def quantile(self, q):
+        # (low, high) bounds of the bin holding the q-quantile
+        total = self.counts.sum()
+        if not total:
+            return None
+        i = int(np.searchsorted(np.cumsum(self.counts), q * total))
+        high = self.edges[i + 1] - 1 if i + 1 < len(self.edges) else None
+        return int(self.edges[i]), high
+
+    def to_frame(self):
+        return pd.DataFrame({'bin': [self._label(i) for i in range(len(self.edges))], 'messages': self.counts})
+
+
+class ChatSketch:
+
+    def __init__(self, capacity=2000, cm_width=2048, cm_depth=5, hll_precision=14):
+        self.words = SpaceSaving(capacity)
+        self.emojis = SpaceSaving(max(capacity // 4, 100))
+        self.domains = CountMin(cm_width, cm_depth)
+        self.vocabulary = HyperLogLog(hll_precision)
+        self.lengths = FixedHistogram(LENGTH_BINS)
+        self.word_counts = FixedHistogram(WORD_BINS)
+        self.messages = 0
+        self.media = 0
+        self.links = 0
+        with open(helper.STOP_WORDS_PATH, 'r') as f:
+            self._stop_words = f.read()
+
+    def update(self, users, messages, kinds=None):
+        # Folds one block of parsed (user, message) pairs into the sketches;
+        # words are cleaned exactly like helper.chat_most_common_words
+        words, emojis, domains = Counter(), Counter(), Counter()
+        lengths, word_counts = [], []
+        if kinds is None:
+            kinds = preprocessor.classify_messages(messages)
+        for user, message, kind in zip(users, messages, kinds):
+            if user == 'group_notification':
+                continue
+            self.messages += 1
+            lengths.append(len(message))
+            word_counts.append(len(message.split()))
+            emojis.update(c for c in message if c in emoji.EMOJI_DATA)
+            for url in helper._find_urls(message):
+                self.links += 1
+                host = urlsplit(url if '://' in url else 'http://' + url).hostname or ''
+                domains[host[4:] if host.startswith('www.') else host] += 1
+            if kind in preprocessor.MEDIA_KINDS:
+                self.media += 1
+                continue
+            for word in re.sub(r'[^\w\s]', '', message.lower()).split():
+                if word not in self._stop_words and len(word) > 1:
+                    words[word] += 1
+        self.words.update(words)
+        self.emojis.update(emojis)
+        self.domains.update(domains)
+        self.vocabulary.update(list(words))
+        self.lengths.update(lengths)
+        self.word_counts.update(word_counts)
+
+    def update_frame(self, df):
+        # A block parsed by the preprocessor, reusing its message kinds
+        self.update(df['user'], df['message'], df['kind'])
+
+    @classmethod
+    def from_file(cls, path, block_chars=preprocessor.STREAM_BLOCK_BYTES, **options):
+        # One streaming pass over a .txt or .zip export through the chunk
+        # parser (without sentiment); each block's frame is dropped once sketched
+        sketch = cls(**options)
+        if path.lower().endswith('.zip'):
+            with zipfile.ZipFile(path) as archive:
+                member = preprocessor.find_chat_member(archive)
+                with io.TextIOWrapper(archive.open(member), encoding='utf-8') as stream:
+                    for _ in preprocessor.parse_stream(stream, block_chars, sentiment=False, sketch=sketch):
+                        pass
+        else:
+            with open(path, encoding='utf-8') as stream:
+                for _ in preprocessor.parse_stream(stream, block_chars, sentiment=False, sketch=sketch):
+                    pass
+        if not sketch.messages:
+            raise ValueError(preprocessor.INVALID_FORMAT)
+        return sketch
+
+    def error_bounds(self):
+        return {
+            'words': self.words.error,
+            'emojis': self.emojis.error,
+            'domains': round(self.domains.error, 1),
+            'domains_confidence': round(1 - self.domains.delta, 4),
+            'vocabulary_relative': round(self.vocabulary.relative_error, 4),
+        }
@@ -0,0 +1,38 @@
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chat_generator  # noqa: E402
+import preprocessor  # noqa: E402
+
+# Generated fixture chats are small enough to score with VADER in a few
+# seconds; the notification ratio is raised so joins and leaves occur.
+CHAT_OPTIONS = {'messages': 3000, 'participants': 6, 'seed': 11, 'days': 120,
+                'notification_ratio': 0.02, 'multiline_ratio': 0.1}
+
+
+def message_lines(text):
+    # The export split into whole messages (continuation lines included)
+    starts = [m.start() for m in re.finditer(preprocessor.DATE_PATTERN, text)]
+    return [text[a:b] for a, b in zip(starts, starts[1:] + [len(text)])]
+
+
+@pytest.fixture(scope='session')
+def chat_text():
+    return chat_generator.generate_chat_text(**CHAT_OPTIONS)
+
+
+@pytest.fixture(scope='session')
+def chat_df(chat_text):
+    return preprocessor.preprocess(chat_text)
+
+
+@pytest.fixture
+def chat_file(tmp_path, chat_text):
+    path = tmp_path / 'chat.txt'
+    path.write_text(chat_text, encoding='utf-8')
+    return str(path)
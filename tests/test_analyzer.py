@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+import equivalence
+import helper
+from analyzer import ChatAnalyzer
+
+# ChatAnalyzer property -> helper function it must agree with
+VIEWS = {
+    'stats': 'chat_fetch_stats',
+    'timeline': 'chat_monthly_timeline',
+    'daily_timeline': 'chat_daily_timeline',
+    'calendar': 'calendar_heatmap',
+    'hourly_activity': 'user_activity_timeline',
+    'week_activity': 'chat_week_activity_map',
+    'month_activity': 'chat_month_activity_map',
+    'heatmap': 'chat_activity_heatmap',
+    'message_kinds': 'message_kind_breakdown',
+    'top_words': 'chat_most_common_words',
+    'emoji_table': 'chat_emoji_helper',
+    'sentiment_trend': 'sentiment_trend',
+}
+
+
+@pytest.fixture(scope='module')
+def analyzer(chat_df):
+    return ChatAnalyzer(chat_df)
+
+
+def check_views(view, selected_user, df):
+    for name, function in VIEWS.items():
+        equivalence.compare(getattr(helper, function)(selected_user, df), getattr(view, name),
+                            equivalence.DEFAULT_RULES, f"{name}({selected_user})")
+    for k in (1, 0, -1):
+        equivalence.compare(helper.sentiment_monthly_timeline(selected_user, df, k), view.sentiment_timeline(k),
+                            equivalence.DEFAULT_RULES, f"sentiment_timeline({selected_user}, {k})")
+
+
+def test_overall_views_match_helpers(analyzer, chat_df):
+    check_views(analyzer, 'Overall', chat_df)
+
+
+def test_user_views_match_helpers(analyzer, chat_df):
+    for user in analyzer.users():
+        check_views(analyzer.for_user(user), user, chat_df)
+
+
+def test_date_range_views_match_helpers(analyzer, chat_df):
+    start, end = '2020-02-01', '2020-03-15'
+    days = chat_df['date'].dt.normalize()
+    df = chat_df[(days >= start) & (days <= end)]
+    check_views(analyzer.between(start, end), 'Overall', df)
+    user = analyzer.users()[0]
+    check_views(analyzer.for_user(user).between(start, end), user, df)
+    assert len(analyzer.between(start, end)) == len(df)
+
+
+def test_unknown_user_raises(analyzer):
+    with pytest.raises(KeyError):
+        analyzer.for_user('Nobody')
+
+
+def test_empty_views_keep_their_root_and_group(analyzer):
+    empty = analyzer.between('1990-01-01', '1990-01-31')
+    assert len(empty) == 0
+    first, second = analyzer.users()[:2]
+    user_view = empty.for_user(first)
+    assert user_view._root is analyzer and user_view._group is empty
+    # Switching user from an empty user view stays in the empty group view
+    switched = user_view.for_user(second)
+    assert switched._group is empty and len(switched) == 0
+
+
+def test_user_views_copy_rows_and_ranges_share_them(analyzer, chat_df):
+    dates = chat_df['date'].to_numpy()
+    user_df = analyzer.for_user(analyzer.users()[0]).df
+    assert not np.shares_memory(user_df['date'].to_numpy(), dates)
+    range_df = analyzer.between('2020-02-01', '2020-03-15').df
+    assert len(range_df) and np.shares_memory(range_df['date'].to_numpy(), dates)
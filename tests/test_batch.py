@@ -0,0 +1,60 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import batch_analyze
+
+
+def test_report_names_disambiguate_shared_file_names(tmp_path):
+    paths = [str(tmp_path / 'a' / '_chat.txt'), str(tmp_path / 'b' / '_chat.txt'), str(tmp_path / 'family.zip')]
+    names = batch_analyze.report_names(paths)
+    assert names[paths[2]] == 'family'
+    assert names[paths[0]] != names[paths[1]]
+    assert all(names[p].startswith('_chat-') for p in paths[:2])
+    assert batch_analyze.report_names(paths[:1]) == {paths[0]: '_chat'}
+
+
+def test_expand_inputs_analyzes_each_file_once(chat_file):
+    assert batch_analyze.expand_inputs([chat_file, os.path.dirname(chat_file)]) == [chat_file]
+
+
+def test_to_jsonable_converts_arrays_and_indexes():
+    value = {
+        'days': pd.date_range('2020-01-01', periods=2),
+        'labels': pd.Index(['x', 'y']),
+        'grid': np.array([[1.0, np.nan], [2.0, 3.0]]),
+        'counts': np.array([1, 2], dtype=np.int64),
+    }
+    converted = batch_analyze.to_jsonable(value)
+    assert converted == {
+        'days': ['2020-01-01T00:00:00.000', '2020-01-02T00:00:00.000'],
+        'labels': ['x', 'y'],
+        'grid': [[1.0, None], [2.0, 3.0]],
+        'counts': [1, 2],
+    }
+    json.dumps(converted, allow_nan=False)
+
+
+def test_same_named_exports_get_separate_reports(tmp_path, chat_text):
+    paths = []
+    for folder in ('alice', 'bob'):
+        os.makedirs(tmp_path / folder)
+        paths.append(str(tmp_path / folder / '_chat.txt'))
+        with open(paths[-1], 'w', encoding='utf-8') as f:
+            f.write(chat_text)
+    out_dir = str(tmp_path / 'out')
+    assert batch_analyze.main(paths + ['--out-dir', out_dir, '--workers', '1', '--profile', 'quick']) == 0
+    reports = sorted(os.listdir(out_dir))
+    assert len(reports) == 2
+    sources = {json.load(open(os.path.join(out_dir, r), encoding='utf-8'))['summary']['source'] for r in reports}
+    assert sources == {os.path.abspath(p) for p in paths}
+
+
+def test_quick_analyses_match_full_counts(chat_df):
+    quick = batch_analyze.run_quick_analyses(chat_df)
+    messages = chat_df[chat_df['user'] != 'group_notification']
+    pd.testing.assert_series_equal(quick['most_busy_users'], messages['user'].value_counts())
+    assert quick['daily_timeline']['messages'].sum() == len(messages)
+    assert quick['monthly_timeline']['messages'].sum() == len(messages)
@@ -0,0 +1,35 @@
+import datetime
+
+import pandas as pd
+
+import comparison
+import helper
+
+
+def filtered(df, start, end):
+    days = df['date'].dt.date
+    return df[(days >= start) & (days <= end)]
+
+
+def test_cube_totals_match_the_frame(chat_df):
+    chat = comparison.chat_cube(chat_df)
+    messages = chat_df[chat_df['user'] != 'group_notification']
+    assert chat['messages'] == len(messages)
+    assert chat['participants'] == messages['user'].nunique()
+    assert chat['first_message'] == messages['date'].min()
+    assert chat['last_message'] == messages['date'].max()
+    assert chat['cube']['words'].sum() == helper.chat_fetch_stats('Overall', chat_df)[1]
+
+
+def test_filtered_overview_equals_overview_of_the_filtered_frame(chat_df):
+    start, end = datetime.date(2020, 2, 1), datetime.date(2020, 3, 15)
+    expected = comparison.overview({'chat': comparison.chat_cube(filtered(chat_df, start, end))})
+    actual = comparison.overview({'chat': comparison.filter_chat(comparison.chat_cube(chat_df), start, end)})
+    pd.testing.assert_frame_equal(expected, actual)
+    assert actual['Messages'].iloc[0] < len(chat_df)
+
+
+def test_filter_without_messages_has_empty_totals(chat_df):
+    chat = comparison.filter_chat(comparison.chat_cube(chat_df), datetime.date(1990, 1, 1), datetime.date(1990, 1, 2))
+    assert (chat['messages'], chat['participants'], chat['first_message']) == (0, 0, None)
+    assert comparison.overview({'chat': chat})['Messages per Active Day'].iloc[0] == 0
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import equivalence
+import helper
+
+RULES = equivalence.DEFAULT_RULES
+
+
+def test_reference_passes_against_itself(chat_text):
+    report = equivalence.run(helper, {'fixture': chat_text}, only={'chat_fetch_stats', 'calendar_heatmap',
+                                                                   'chat_most_busy_users'})
+    assert report
+    assert all(error is None for checks in report.values() for _, error in checks)
+
+
+def test_candidate_mismatch_is_reported(chat_text):
+    class Candidate:
+        @staticmethod
+        def chat_fetch_stats(selected_user, df):
+            messages, words, media, links = helper.chat_fetch_stats(selected_user, df)
+            return messages + 1, words, media, links
+
+    report = equivalence.run(Candidate, {'fixture': chat_text}, only={'chat_fetch_stats'})
+    assert all(error and 'result[0]' in error for _, error in report['chat_fetch_stats'])
+
+
+def test_compare_dicts_by_key():
+    grid = pd.DataFrame([[1.0, np.nan]])
+    equivalence.compare({2020: grid}, {2020: grid.copy()}, RULES)
+    with pytest.raises(equivalence.Mismatch, match='keys differ'):
+        equivalence.compare({2020: grid}, {2021: grid}, RULES)
+    with pytest.raises(equivalence.Mismatch, match=r"\[2020\]"):
+        equivalence.compare({2020: grid}, {2020: grid + 1}, RULES)
+
+
+def test_compare_arrays_and_indexes():
+    equivalence.compare(np.arange(3), np.arange(3) + 1e-12, RULES)
+    with pytest.raises(equivalence.Mismatch):
+        equivalence.compare(np.arange(3), np.arange(1, 4), RULES)
+    days = pd.date_range('2020-01-01', periods=3)
+    equivalence.compare(days, pd.DatetimeIndex(list(days)), RULES)
+    with pytest.raises(equivalence.Mismatch):
+        equivalence.compare(days, days + pd.Timedelta(days=1), RULES)
+
+
+def test_ignore_order_rule():
+    left = pd.DataFrame({'user': ['a', 'b'], 'count': [1, 1]})
+    right = left.iloc[::-1]
+    with pytest.raises(equivalence.Mismatch):
+        equivalence.compare(left, right, RULES)
+    equivalence.compare(left, right, dict(RULES, ignore_order=True))
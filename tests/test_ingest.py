@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+import equivalence
+import helper
+import ingest
+from conftest import message_lines
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ingest.ChatStore(str(tmp_path / 'store'))
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_appended_export_matches_full_parse(tmp_path, store, chat_text, chat_df):
+    messages = message_lines(chat_text)
+    old = write(tmp_path, 'old.txt', ''.join(messages[:2200]))
+    new = write(tmp_path, 'new.txt', chat_text)
+    assert store.ingest_file(old, 'family')[1]['mode'] == 'new'
+
+    record, status = store.ingest_file(new, 'family')
+    assert status['mode'] == 'appended'
+    assert status['new_messages'] == len(messages) - 2200
+    pd.testing.assert_frame_equal(record['df'], chat_df)
+    pd.testing.assert_frame_equal(ingest.summary_table(record), helper.user_summary_table(chat_df))
+
+    aggregates = record['aggregates']
+    users = ['Overall'] + sorted(set(chat_df['user']) - {'group_notification'})
+    for user in users:
+        for section in aggregates.SECTIONS:
+            equivalence.compare(getattr(helper, section)(user, chat_df), aggregates.view(section, user),
+                                equivalence.DEFAULT_RULES, f"{section}({user})")
+
+
+def test_reingesting_the_same_export_is_unchanged(tmp_path, store, chat_text):
+    path = write(tmp_path, 'chat.txt', chat_text)
+    store.ingest_file(path, 'family')
+    record, status = store.ingest_file(path, 'family')
+    assert status['mode'] == 'unchanged'
+    assert status['new_messages'] == 0
+    assert len(store.chat_ids()) == 1
+
+
+def test_other_names_never_inherit_a_stored_chat(tmp_path, store, chat_text):
+    # A later export of the same chat remembered under another name (another
+    # user's session) is parsed on its own, without the stored history
+    messages = message_lines(chat_text)
+    store.ingest_file(write(tmp_path, 'old.txt', ''.join(messages[:2200])), 'family')
+    record, status = store.ingest_file(write(tmp_path, 'new.txt', ''.join(messages[2000:])), 'work')
+    assert status['mode'] == 'new'
+    assert len(record['df']) == len(messages) - 2000
+    assert len(store.chat_ids()) == 2
+
+
+def test_unrelated_export_replaces_the_named_chat(tmp_path, store, chat_text):
+    messages = message_lines(chat_text)
+    store.ingest_file(write(tmp_path, 'a.txt', ''.join(messages[:1000])), 'family')
+    record, status = store.ingest_file(write(tmp_path, 'b.txt', ''.join(messages[1500:])), 'family')
+    assert status['mode'] == 'replaced'
+    assert len(record['df']) == len(messages) - 1500
+    assert len(store.chat_ids()) == 1
+
+
+def test_a_name_is_required(tmp_path, store, chat_text):
+    with pytest.raises(ValueError):
+        store.ingest_file(write(tmp_path, 'chat.txt', chat_text), '  ')
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+import helper
+import preprocessor
+
+
+@pytest.mark.parametrize('message, kind', [
+    # Android
+    ('<Media omitted>', 'media'),
+    ('<Medien ausgeschlossen>', 'media'),
+    ('IMG-20200105-WA0001.jpg (file attached)', 'image'),
+    ('PTT-20200105-WA0002.opus (file attached)', 'audio'),
+    ('Report.pdf (file attached)', 'document'),
+    ('location: https://maps.google.com/?q=12.97,77.59', 'location'),
+    ('This message was deleted', 'deleted'),
+    ('POLL:\nLunch?\nOPTION: Pizza (2 votes)\nOPTION: Sushi (0 votes)\n', 'poll'),
+    ('ENCUESTA:\n¿Cena?\nOPCIÓN: Sí (1 voto)', 'poll'),
+    # iOS, with the left-to-right marks it puts around markers
+    ('‎image omitted', 'image'),
+    ('‎video omitted', 'video'),
+    ('‎sticker omitted', 'sticker'),
+    ('‎GIF omitted', 'gif'),
+    ('‎Contact card omitted', 'contact'),
+    ('‎<attached: 00000012-PHOTO-2020-01-05-10-00-00.jpg>', 'image'),
+    ('‎You deleted this message.', 'deleted'),
+    ('sounds good ‎<This message was edited>', 'edited'),
+    # Text that merely mentions a marker
+    ('Poll: who wants pizza?', 'text'),
+    ('POLL: Lunch?', 'text'),
+    ('poll:\nLunch?\noption: pizza', 'text'),
+    ('I sent the image omitted from the album', 'text'),
+    ('see <Media omitted> above', 'text'),
+    ('my location: home', 'text'),
+])
+def test_message_kinds(message, kind):
+    assert list(preprocessor.classify_messages([message])) == [kind]
+
+
+def test_breakdown_counts_each_kind_once(chat_df):
+    breakdown = helper.message_kind_breakdown('Overall', chat_df)
+    messages = chat_df[chat_df['user'] != 'group_notification']
+    assert breakdown['messages'].sum() == len(messages)
+    assert (breakdown.drop(columns='messages').sum(axis=1) == breakdown['messages']).all()
+    media = breakdown[[kind for kind in preprocessor.MEDIA_KINDS if kind in breakdown]].to_numpy().sum()
+    assert helper.chat_fetch_stats('Overall', chat_df)[2] == media
+
+
+def test_parsed_kinds_match_classifier(chat_df):
+    expected = preprocessor.classify_messages(chat_df['message'])
+    pd.testing.assert_series_equal(chat_df['kind'], pd.Series(expected, name='kind'), check_index=False)
@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+import membership
+import preprocessor
+
+CHAT = """01/01/21, 10:00 - Ana: hi all
+01/01/21, 10:05 - Ana added Bob, Carl and Maria e Silva
+02/01/21, 09:00 - Bob: hello
+03/01/21, 11:00 - Carl left
+04/01/21, 12:00 - Ana changed this group's icon
+05/01/21, 08:00 - Dan joined using this group's invite link
+06/01/21, 12:00 - Ana removed Bob
+07/01/21, 12:00 - Ana added Bob
+08/01/21, 12:00 - Dan: hey
+"""
+
+
+def brute_force_active(df, intervals):
+    days = pd.date_range(df['date'].min().normalize(), df['date'].max().normalize(), freq='D')
+    last = days[-1]
+    counts = [sum(1 for start, end in zip(intervals['start'], intervals['end'])
+                  if start.normalize() <= day <= (last if pd.isna(end) else end.normalize())) for day in days]
+    return pd.Series(counts, index=days.rename('day'), name='active_members', dtype='int64')
+
+
+@pytest.mark.parametrize('text, language, members', [
+    ("Bob, Carl and Dan", 'en', ['Bob', 'Carl', 'Dan']),
+    ("Maria e Silva", 'en', ['Maria e Silva']),
+    ("Bruno e Maria", 'pt', ['Bruno', 'Maria']),
+    ("Max und Moritz", 'de', ['Max', 'Moritz']),
+    ("Juan y Pedro", 'es', ['Juan', 'Pedro']),
+    ("Paul et Marie", 'fr', ['Paul', 'Marie']),
+    ("+91 98765 43210", 'en', ['+91 98765 43210']),
+])
+def test_split_members(text, language, members):
+    assert membership.split_members(text, language) == members
+
+
+def test_events():
+    events = membership.parse_events(preprocessor.preprocess(CHAT))
+    assert events['event'].tolist() == ['add', 'add', 'add', 'leave', 'icon', 'join', 'remove', 'add']
+    assert events['member'].tolist() == ['Bob', 'Carl', 'Maria e Silva', 'Carl', None, 'Dan', 'Bob', 'Bob']
+    assert events['actor'].tolist() == ['Ana'] * 3 + [None, 'Ana', None, 'Ana', 'Ana']
+
+
+def test_membership_intervals():
+    df = preprocessor.preprocess(CHAT)
+    intervals = membership.membership_intervals(df)
+    periods = {(member, str(start), str(end)) for member, start, end in intervals.itertuples(index=False)}
+    assert periods == {
+        ('Ana', '2021-01-01 10:00:00', 'NaT'),
+        ('Bob', '2021-01-01 10:05:00', '2021-01-06 12:00:00'),
+        ('Bob', '2021-01-07 12:00:00', 'NaT'),
+        ('Carl', '2021-01-01 10:05:00', '2021-01-03 11:00:00'),
+        ('Maria e Silva', '2021-01-01 10:05:00', 'NaT'),
+        ('Dan', '2021-01-05 08:00:00', 'NaT'),
+    }
+    active = membership.active_members(df, intervals)
+    assert active.tolist() == [4, 4, 4, 3, 4, 4, 4, 4]
+    pd.testing.assert_series_equal(active, brute_force_active(df, intervals))
+
+
+def test_active_members_match_brute_force(chat_df):
+    intervals = membership.membership_intervals(chat_df)
+    assert not intervals.empty
+    pd.testing.assert_series_equal(membership.active_members(chat_df, intervals),
+                                   brute_force_active(chat_df, intervals))
+
+
+def test_member_table():
+    df = preprocessor.preprocess(CHAT)
+    table = membership.member_table(membership.membership_intervals(df), df['date'].max()).set_index('member')
+    assert table.loc['Bob', 'periods'] == 2
+    assert not table.loc['Carl', 'current_member']
+    assert table.loc['Dan', 'current_member']
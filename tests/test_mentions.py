@@ -0,0 +1,54 @@
+import pandas as pd
+
+import mentions
+import preprocessor
+
+CHAT = """01/02/20, 10:00 - Aarav: hi @Aarav 1 and @aarav, meet @Priya
+01/02/20, 10:01 - Aarav 1: thanks @Aarav! mail me at aarav@example.com
+01/02/20, 10:02 - +91 98765 43210: @Priya @Priya are you coming?
+01/02/20, 10:03 - Priya: yes @919876543210, and @Aaravi is not here
+01/03/20, 09:00 - Priya: @Aarav 12 is not a member but @Aarav is
+"""
+
+
+def test_trie_resolves_the_longest_name_at_a_word_boundary():
+    users = ['Aarav', 'Aarav 1', 'Priya', '+91 98765 43210']
+    trie = mentions.build_trie(users)
+    assert mentions.resolve(trie, 'Aarav 1 see you', 0) == 1
+    assert mentions.resolve(trie, 'aarav, hi', 0) == 0
+    assert mentions.resolve(trie, 'Aarav 12', 0) == 0
+    assert mentions.resolve(trie, 'Aaravi', 0) == -1
+    assert mentions.resolve(trie, '919876543210 hi', 0) == 3
+
+
+def test_index_of_a_small_chat():
+    df = preprocessor.preprocess(CHAT)
+    index = mentions.MentionIndex.build(df)
+    pairs = [(index.users[a], index.users[m]) for a, m in zip(index.authors, index.mentioned)]
+    assert pairs == [
+        ('Aarav', 'Aarav 1'), ('Aarav', 'Aarav'), ('Aarav', 'Priya'),
+        ('Aarav 1', 'Aarav'),
+        ('+91 98765 43210', 'Priya'),
+        ('Priya', '+91 98765 43210'),
+        # "@Aarav 12" is Aarav again, counted once for the message
+        ('Priya', 'Aarav'),
+    ]
+    # "@Aaravi" resolves to no one; the e-mail address is not a mention
+    assert index.unresolved == 1
+    assert index.most_mentioned().values.tolist() == [['Aarav', 3], ['Priya', 2], ['+91 98765 43210', 1],
+                                                      ['Aarav 1', 1]]
+    assert index.most_mentioned('Priya')['mentions'].sum() == 2
+    assert index.network('Aarav 1').values.tolist() == [['Aarav', 'Aarav 1', 1], ['Aarav 1', 'Aarav', 1]]
+    assert len(index.between('2020-02-01', '2020-02-01')) == 6
+    assert index.timeline()['mentions'].tolist() == [6, 1]
+
+
+def test_views_select_from_the_chat_index(chat_df):
+    index = mentions.MentionIndex.build(chat_df)
+    start, end = '2020-02-01', '2020-03-15'
+    days = chat_df['date'].dt.normalize()
+    part = chat_df[(days >= start) & (days <= end)]
+    rebuilt = mentions.MentionIndex.build(part.reset_index(drop=True))
+    selected = index.between(start, end)
+    pd.testing.assert_frame_equal(selected.most_mentioned(), rebuilt.most_mentioned())
+    pd.testing.assert_frame_equal(selected.network(), rebuilt.network())
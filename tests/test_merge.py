@@ -0,0 +1,35 @@
+import pandas as pd
+
+import ingest
+import preprocessor
+from conftest import message_lines
+
+
+def test_overlapping_exports_merge_to_the_full_chat(chat_text, chat_df):
+    messages = message_lines(chat_text)
+    first = preprocessor.preprocess(''.join(messages[:2000]))
+    second = preprocessor.preprocess(''.join(messages[1200:]))
+
+    merged, stats = ingest.merge_exports([first, second])
+    pd.testing.assert_frame_equal(merged, chat_df)
+    assert [s['duplicates'] for s in stats] == [0, 800]
+    assert [s['added'] for s in stats] == [2000, len(messages) - 2000]
+
+
+def test_merge_order_does_not_matter(chat_text, chat_df):
+    messages = message_lines(chat_text)
+    first = preprocessor.preprocess(''.join(messages[:2000]))
+    second = preprocessor.preprocess(''.join(messages[1200:]))
+    merged, _ = ingest.merge_exports([second, first])
+    pd.testing.assert_frame_equal(merged, chat_df)
+
+
+def test_repeated_messages_are_kept_once_per_occurrence():
+    repeated = "01/02/21, 10:00 - Ana: ok\n"
+    first = preprocessor.preprocess(repeated * 2 + "01/02/21, 10:01 - Bob: fine\n")
+    # The later export ends on the last message without its newline
+    second = preprocessor.preprocess(repeated * 2 + "01/02/21, 10:01 - Bob: fine\n01/02/21, 10:05 - Ana: ok")
+
+    merged, stats = ingest.merge_exports([first, second])
+    assert merged['message'].str.rstrip().tolist() == ['ok', 'ok', 'fine', 'ok']
+    assert [s['duplicates'] for s in stats] == [0, 3]
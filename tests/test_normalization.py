@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch_analyze
+import benchmark
+import helper
+import preprocessor
+
+# Monday 4 Jan 10:00 to Tuesday 12 Jan 10:00: two Mondays and two Tuesdays,
+# the first and last day only partly covered
+CHAT = """04/01/21, 10:00 - Ana: morning
+04/01/21, 10:30 - Bob: hi
+05/01/21, 09:00 - Bob: one
+05/01/21, 09:10 - Bob: two
+06/01/21, 18:00 - Ana: wednesday
+11/01/21, 10:30 - Ana: monday again
+12/01/21, 10:00 - Bob: last
+"""
+
+
+@pytest.fixture(scope='module')
+def df():
+    return preprocessor.preprocess(CHAT)
+
+
+@pytest.fixture(scope='module')
+def calendar(df):
+    return helper._activity_calendar(df)
+
+
+def test_calendar(calendar):
+    assert len(calendar['days']) == 9
+    assert calendar['covered'][0].sum() == 14
+    assert calendar['covered'][-1].sum() == 11
+    assert calendar['covered'][1:-1].all()
+    assert (calendar['members'] == 2).all()
+
+
+@pytest.mark.parametrize('selected_user', ['Overall', 'Ana', 'Bob'])
+def test_count_matches_raw_views(df, calendar, selected_user):
+    week, busiest = helper.normalized_week_activity_map(selected_user, df, calendar, 'count')
+    raw, raw_busiest = helper.chat_week_activity_map(selected_user, df)
+    pd.testing.assert_series_equal(week, raw, check_names=False, check_dtype=False)
+    assert busiest == raw_busiest
+    month, _ = helper.normalized_month_activity_map(selected_user, df, calendar, 'count')
+    assert month['January'] == helper.chat_month_activity_map(selected_user, df)[0]['January']
+    daily = helper.normalized_daily_timeline(selected_user, df, calendar, 'count')
+    raw_daily = helper.chat_daily_timeline(selected_user, df)
+    assert daily[daily['message'] > 0]['message'].tolist() == raw_daily['message'].tolist()
+
+
+def test_day_divides_by_occurrences(df, calendar):
+    week, busiest = helper.normalized_week_activity_map('Overall', df, calendar, 'day')
+    assert week['Monday'] == 1.5
+    assert week['Tuesday'] == 1.5
+    assert week['Wednesday'] == 1.0
+    assert week['Sunday'] == 0
+    monthly = helper.normalized_monthly_timeline('Overall', df, calendar, 'day')
+    assert monthly['message'].tolist() == [round(7 / 9, 3)]
+
+
+def test_hour_divides_by_covered_hours(df, calendar):
+    week, _ = helper.normalized_week_activity_map('Overall', df, calendar, 'hour')
+    assert week['Monday'] == round(3 / 38, 3)
+    assert week['Tuesday'] == round(3 / 35, 3)
+    heatmap, day, period, _ = helper.normalized_activity_heatmap('Overall', df, calendar, 'hour')
+    # Each cell over the two covered occurrences of its weekday and hour
+    assert heatmap.loc['Monday', '10-11'] == 1.5
+    assert heatmap.loc['Tuesday', '9-10'] == 1.0
+    assert heatmap.loc['Tuesday', '10-11'] == 0.5
+    assert (day, period) == ('Monday', '10-11')
+
+
+def test_member_divides_by_active_members(df, calendar):
+    week, _ = helper.normalized_week_activity_map('Overall', df, calendar, 'member')
+    assert week['Monday'] == 0.75
+    assert week['Wednesday'] == 0.5
+    # A single member counts as one member-day on each day of the span
+    user_week, _ = helper.normalized_week_activity_map('Ana', df, calendar, 'member')
+    assert user_week['Monday'] == 1.0
+
+
+def test_empty_user(df, calendar):
+    week, busiest = helper.normalized_week_activity_map('Nobody', df, calendar)
+    assert week.empty and busiest is None
+    assert helper.normalized_daily_timeline('Nobody', df, calendar).empty
+
+
+def test_benchmark_passes_the_calendar(df):
+    chat = benchmark.chat_arguments(df)
+    args = benchmark.call_arguments(helper.normalized_activity_heatmap, df, chat)
+    assert args[2] is chat['calendar'] and args[3] == 'hour'
+    # Defaulted parameters keep the later arguments in place
+    args = benchmark.call_arguments(helper.silence_gaps, df, {'activity': 'cached'})
+    assert args[2:] == [10, 'cached']
+
+
+def test_batch_runs_every_normalization(df):
+    results = batch_analyze.run_analyses(df)
+    for normalization in helper.NORMALIZATIONS:
+        key = f"normalized_week_activity_map[{normalization}]"
+        assert not isinstance(results[key], Exception)
+    assert 'normalized_week_activity_map' not in results
+    document = batch_analyze.to_jsonable(results['normalized_daily_timeline[day]'])
+    assert document['data'][0] == ['2021-01-04T00:00:00.000', 2.0]
+    assert np.isclose(results['normalized_week_activity_map[day]'][0]['Monday'], 1.5)
@@ -0,0 +1,37 @@
+import pandas as pd
+
+import preprocessor
+
+
+def test_parallel_parse_matches_serial(chat_text, chat_df):
+    pd.testing.assert_frame_equal(preprocessor.preprocess_parallel(chat_text, workers=3), chat_df)
+
+
+def test_file_parse_matches_text(chat_file, chat_df, monkeypatch):
+    # Small blocks so the file is cut into many byte ranges
+    monkeypatch.setattr(preprocessor, 'STREAM_BLOCK_BYTES', 16 * 1024)
+    for workers in (1, 3):
+        pd.testing.assert_frame_equal(preprocessor.preprocess_file(chat_file, workers=workers), chat_df)
+
+
+def test_crlf_file_parses_like_text_mode_read(tmp_path, chat_text, chat_df, monkeypatch):
+    monkeypatch.setattr(preprocessor, 'STREAM_BLOCK_BYTES', 16 * 1024)
+    path = tmp_path / 'crlf.txt'
+    path.write_bytes(chat_text.replace('\n', '\r\n').encode('utf-8'))
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == chat_text
+    for workers in (1, 3):
+        pd.testing.assert_frame_equal(preprocessor.preprocess_file(str(path), workers=workers), chat_df)
+
+
+def test_in_memory_text_is_parsed_as_given():
+    # preprocess() does not translate line endings of text it is handed
+    text = "01/02/20, 10:00 - Asha: first line\r\nsecond line\r\n01/02/20, 10:05 - Ravi: hi\r\n"
+    df = preprocessor.preprocess(text)
+    assert df['message'].tolist() == ["first line\r\nsecond line\r\n", "hi\r\n"]
+
+
+def test_quick_parse_leaves_out_sentiment(chat_file, chat_df):
+    df = preprocessor.preprocess_file(chat_file, sentiment=False)
+    pd.testing.assert_frame_equal(df, chat_df[df.columns])
+    assert 'value' not in df
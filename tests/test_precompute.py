@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+import helper
+import precompute
+
+
+def assert_same(expected, actual):
+    if isinstance(expected, tuple):
+        assert isinstance(actual, tuple) and len(expected) == len(actual)
+        for a, b in zip(expected, actual):
+            assert_same(a, b)
+    elif isinstance(expected, dict):
+        assert list(expected) == list(actual)
+        for key in expected:
+            assert_same(expected[key], actual[key])
+    elif isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected, actual)
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(expected, actual)
+    else:
+        assert expected == actual
+
+
+@pytest.fixture(scope='module')
+def warmup(chat_df):
+    warmup = precompute.UserViewWarmup(chat_df)
+    warmup._run()
+    return warmup
+
+
+def test_warmup_covers_every_participant(warmup, chat_df):
+    assert warmup.finished and warmup.error is None
+    assert warmup.users == sorted(set(chat_df['user']) - {'group_notification'})
+
+
+@pytest.mark.parametrize('section', precompute.USER_VIEW_SECTIONS)
+def test_grouped_views_equal_helpers(warmup, chat_df, section):
+    for user in warmup.users:
+        assert_same(getattr(helper, section)(user, chat_df), warmup.get(section, user))
+
+
+def test_unknown_user_matches_empty_helper_result(chat_df):
+    grouped = precompute.GroupedViews(chat_df)
+    for section in precompute.USER_VIEW_SECTIONS:
+        assert_same(getattr(helper, section)('Nobody', chat_df), grouped.view(section, 'Nobody'))
@@ -0,0 +1,61 @@
+import statistics
+from collections import defaultdict
+
+import pandas as pd
+
+import helper
+import preprocessor
+
+CHAT = """01/02/20, 10:00 - Asha: anyone up?
+01/02/20, 10:05 - Ravi: yes
+01/02/20, 10:06 - Ravi: what's up
+01/02/20, 10:10 - Asha: lunch?
+01/02/20, 10:11 - Meera joined using this group's invite link
+01/02/20, 10:20 - Meera: count me in
+01/02/20, 13:00 - Ravi: back
+01/02/20, 13:30 - Asha: ok
+"""
+
+
+def brute_force_pairs(df, gap_minutes=helper.SESSION_GAP_MINUTES):
+    rows = df[df['user'] != 'group_notification'].sort_values('date', kind='stable')
+    latencies = defaultdict(list)
+    previous = None
+    for row in rows.itertuples():
+        if previous is not None and row.user != previous.user:
+            minutes = (row.date - previous.date) / pd.Timedelta(minutes=1)
+            if minutes <= gap_minutes:
+                latencies[(row.user, previous.user)].append(minutes)
+        previous = row
+    return {pair: (len(values), round(statistics.median(values), 2)) for pair, values in latencies.items()}
+
+
+def test_small_chat_replies():
+    pairs = helper.reply_interactions('Overall', preprocessor.preprocess(CHAT))
+    # Ravi -> Asha (5 min), Asha -> Ravi (4), Meera -> Asha across the join
+    # notice (10); "back" follows a 2 h 40 min silence and starts a new session
+    assert pairs.values.tolist() == [
+        ['Asha', 'Ravi', 2, 17.0],
+        ['Meera', 'Asha', 1, 10.0],
+        ['Ravi', 'Asha', 1, 5.0],
+    ]
+
+
+def test_pairs_match_brute_force(chat_df):
+    pairs = helper.reply_interactions('Overall', chat_df)
+    actual = {(u, r): (n, m) for u, r, n, m in pairs.itertuples(index=False)}
+    assert actual == brute_force_pairs(chat_df)
+    assert pairs['replies'].is_monotonic_decreasing
+
+
+def test_degrees_and_user_filter(chat_df):
+    pairs = helper.reply_interactions('Overall', chat_df)
+    degrees = helper.reply_degrees('Overall', chat_df).set_index('user')
+    for user in degrees.index:
+        sent, received = pairs[pairs['user'] == user], pairs[pairs['replied_to'] == user]
+        assert degrees.loc[user].tolist() == [sent['replies'].sum(), received['replies'].sum(),
+                                              len(sent), len(received)]
+    user = degrees.index[0]
+    mine = helper.reply_interactions(user, chat_df)
+    assert ((mine['user'] == user) | (mine['replied_to'] == user)).all()
+    assert len(mine) == ((pairs['user'] == user) | (pairs['replied_to'] == user)).sum()
@@ -0,0 +1,97 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import service
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    # Jobs run on threads and block until the gate opens; payloads echo the body
+    gate = threading.Event()
+
+    def analyze_payload(body, selected_user='Overall', keyword=None):
+        gate.wait(10)
+        return body
+    monkeypatch.setattr(service, 'analyze_payload', analyze_payload)
+    return gate
+
+
+def make_service(workers=1, queue_size=1, cache_size=4):
+    analysis = service.AnalysisService(workers, queue_size, cache_size)
+    analysis.pool.shutdown()
+    analysis.pool = ThreadPoolExecutor(max_workers=workers)
+    return analysis
+
+
+def test_identical_uploads_share_one_job_and_are_cached(gate):
+    analysis = make_service()
+    first = analysis.submit(b'chat')
+    assert analysis.submit(b'chat') is first
+    assert analysis.submit(b'chat', selected_user='Priya') is not first
+    gate.set()
+    assert first.result(5) == b'chat'
+    assert analysis.submit(b'chat').result(0) == b'chat'
+    health = analysis.health()
+    assert (health['computed'], health['deduplicated'], health['cache_hits']) == (2, 1, 1)
+
+
+def test_full_queue_rejects_new_uploads(gate):
+    analysis = make_service(workers=1, queue_size=1)
+    analysis.submit(b'running')
+    analysis.submit(b'queued')
+    with pytest.raises(service.Saturated):
+        analysis.submit(b'rejected')
+    # Duplicates of an in-flight job are never rejected
+    analysis.submit(b'queued')
+    gate.set()
+
+
+def test_abandoned_queued_job_is_cancelled(gate):
+    analysis = make_service(workers=1, queue_size=1)
+    analysis.submit(b'running')
+    queued = analysis.submit(b'queued')
+    analysis.abandon(queued)
+    assert queued.cancelled()
+    health = analysis.health()
+    assert (health['cancelled'], health['inflight']) == (1, 1)
+    # The next identical upload starts a fresh job instead of the cancelled one
+    again = analysis.submit(b'queued')
+    assert again is not queued and not again.cancelled()
+    gate.set()
+    assert again.result(5) == b'queued'
+
+
+def test_job_is_kept_while_another_request_waits(gate):
+    analysis = make_service(workers=1, queue_size=1)
+    analysis.submit(b'running')
+    queued = analysis.submit(b'queued')
+    assert analysis.submit(b'queued') is queued
+    analysis.abandon(queued)
+    assert not queued.cancelled()
+    gate.set()
+    assert queued.result(5) == b'queued'
+
+
+def test_http_503_with_retry_after(gate):
+    analysis = make_service(workers=1, queue_size=0)
+    server = service.make_server(port=0, service=analysis, timeout_s=5, retry_after=7)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        analysis.submit(b'running')
+        with pytest.raises(urllib.error.HTTPError) as rejected:
+            urllib.request.urlopen(urllib.request.Request(url + '/analyze', data=b'other'), timeout=5)
+        assert rejected.value.code == 503 and rejected.value.headers['Retry-After'] == '7'
+        gate.set()
+        with urllib.request.urlopen(url + '/health', timeout=5) as response:
+            assert json.load(response)['rejected'] == 1
+    finally:
+        gate.set()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,78 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import helper
+import sketches
+
+
+@pytest.fixture(scope='module')
+def stream():
+    # Zipf-distributed items in blocks, like words arriving chunk by chunk
+    rng = np.random.default_rng(7)
+    items = [f"w{i}" for i in rng.zipf(1.3, 60000) if i < 20000]
+    return [Counter(items[i:i + 5000]) for i in range(0, len(items), 5000)]
+
+
+def test_space_saving_bounds(stream):
+    sketch = sketches.SpaceSaving(capacity=300)
+    truth = Counter()
+    for block in stream:
+        sketch.update(block)
+        truth.update(block)
+    assert sketch.total == sum(truth.values())
+    assert 0 < sketch.error <= sketch.total / sketch.capacity
+    top = sketch.top(len(truth))
+    for item, estimate, at_least in top.itertuples(index=False):
+        assert at_least <= truth[item] <= estimate <= truth[item] + sketch.error
+    # Every item more frequent than the error bound is kept
+    kept = set(top['item'])
+    assert all(item in kept for item, count in truth.items() if count > sketch.error)
+
+
+def test_count_min_bounds(stream):
+    sketch = sketches.CountMin(width=512, depth=5)
+    truth = Counter()
+    for block in stream:
+        sketch.update(block)
+        truth.update(block)
+    items = list(truth)
+    over = sketch.estimate(items) - np.array([truth[item] for item in items])
+    assert (over >= 0).all()
+    assert np.mean(over > sketch.error) <= sketch.delta
+    assert sketch.top(5)['item'].tolist() == [item for item, _ in truth.most_common(5)]
+
+
+def test_hyperloglog_relative_error():
+    sketch = sketches.HyperLogLog(precision=12)
+    for start in range(0, 50000, 10000):
+        sketch.update([f"item{i}" for i in range(start, start + 10000)])
+    # Re-adding items does not change the estimate
+    before = sketch.estimate()
+    sketch.update([f"item{i}" for i in range(1000)])
+    assert sketch.estimate() == before
+    assert abs(before - 50000) / 50000 < 4 * sketch.relative_error
+    small = sketches.HyperLogLog(precision=12)
+    small.update([f"item{i}" for i in range(100)])
+    assert abs(small.estimate() - 100) < 5
+
+
+def test_histogram_is_exact():
+    values = np.random.default_rng(3).integers(0, 7000, 5000)
+    histogram = sketches.FixedHistogram(sketches.LENGTH_BINS)
+    histogram.update(values[:2500])
+    histogram.update(values[2500:])
+    expected, _ = np.histogram(values, bins=sketches.LENGTH_BINS + [np.inf])
+    assert histogram.counts.tolist() == expected.tolist()
+
+
+def test_chat_sketch_matches_exact_counts(chat_file, chat_df):
+    sketch = sketches.ChatSketch.from_file(chat_file, block_chars=16 * 1024, capacity=200)
+    messages, _, media, links = helper.chat_fetch_stats('Overall', chat_df)
+    assert (sketch.messages, sketch.media, sketch.links) == (messages, media, links)
+    text = chat_df[(chat_df['user'] != 'group_notification') & ~helper._media_mask(chat_df)]
+    truth = helper.count_words(text['message'])
+    bounds = sketch.error_bounds()
+    for item, estimate, at_least in sketch.words.top(50).itertuples(index=False):
+        assert at_least <= truth[item] <= estimate <= truth[item] + bounds['words']
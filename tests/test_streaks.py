@@ -0,0 +1,89 @@
+from itertools import groupby
+
+import pandas as pd
+import pytest
+
+import batch_analyze
+import chat_generator
+import helper
+import preprocessor
+
+
+@pytest.fixture(scope='module')
+def sparse_df():
+    # Few messages over a long span, so streaks and silences vary
+    return preprocessor.preprocess(chat_generator.generate_chat_text(
+        messages=400, participants=5, seed=3, days=500, skewed=True))
+
+
+def runs(active):
+    # (value, first index, length) of each run
+    result, position = [], 0
+    for value, group in groupby(active):
+        length = len(list(group))
+        result.append((value, position, length))
+        position += length
+    return result
+
+
+def brute_force(df, user):
+    messages = df[df['user'] != 'group_notification']
+    days = pd.date_range(df['date'].min().normalize(), df['date'].max().normalize(), freq='D')
+    if user != 'Overall':
+        messages = messages[messages['user'] == user]
+    active_days = set(messages['date'].dt.normalize())
+    active = [day in active_days for day in days]
+    all_runs = runs(active)
+    streaks = [length for value, _, length in all_runs if value]
+    gaps = [(length, first) for value, first, length in all_runs[1:-1] if not value]
+    last_value, _, last_length = all_runs[-1]
+    return {
+        'active_days': sum(active),
+        'longest_streak': max(streaks, default=0),
+        'current_streak': last_length if last_value else 0,
+        'longest_gap': max((length for length, _ in gaps), default=0),
+        'days_since_last': 0 if last_value else last_length,
+    }, days, gaps
+
+
+def test_streaks_match_brute_force(sparse_df):
+    streaks = helper.activity_streaks('Overall', sparse_df).set_index('user')
+    users = sorted(set(sparse_df['user']) - {'group_notification'})
+    assert sorted(streaks.index) == users
+    for user in users:
+        expected, _, _ = brute_force(sparse_df, user)
+        assert streaks.loc[user, list(expected)].tolist() == list(expected.values()), user
+        one = helper.activity_streaks(user, sparse_df)
+        assert one.loc[0, list(expected)].tolist() == list(expected.values()), user
+
+
+def test_silences_match_brute_force(sparse_df):
+    _, days, gaps = brute_force(sparse_df, 'Overall')
+    gaps = sorted(gaps, key=lambda gap: (-gap[0], gap[1]))[:10]
+    silences = helper.silence_gaps('Overall', sparse_df)
+    assert silences['days'].tolist() == [length for length, _ in gaps]
+    assert silences['start'].tolist() == [days[first].date() for _, first in gaps]
+    assert silences['end'].tolist() == [days[first + length - 1].date() for length, first in gaps]
+
+
+def test_gap_distribution_counts_every_gap(sparse_df):
+    users = sorted(set(sparse_df['user']) - {'group_notification'})
+    total = sum(len(brute_force(sparse_df, user)[2]) for user in users)
+    assert helper.gap_distribution('Overall', sparse_df)['gaps'].sum() == total
+
+
+def test_shared_activity_matrix(sparse_df):
+    activity = helper._daily_activity_matrix(sparse_df)
+    user = activity[0][0]
+    pd.testing.assert_frame_equal(helper.activity_streaks(user, sparse_df, activity),
+                                  helper.activity_streaks(user, sparse_df))
+    pd.testing.assert_frame_equal(helper.silence_gaps('Overall', sparse_df, 5, activity),
+                                  helper.silence_gaps('Overall', sparse_df, 5))
+    assert helper.activity_streaks('Nobody', sparse_df, activity).empty
+
+
+def test_batch_passes_the_activity_matrix(sparse_df):
+    results = batch_analyze.run_analyses(sparse_df)
+    pd.testing.assert_frame_equal(results['activity_streaks'], helper.activity_streaks('Overall', sparse_df))
+    pd.testing.assert_frame_equal(results['silence_gaps'], helper.silence_gaps('Overall', sparse_df))
+    pd.testing.assert_frame_equal(results['gap_distribution'], helper.gap_distribution('Overall', sparse_df))
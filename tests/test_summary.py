@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+import helper
+
+
+def test_default_summary_has_every_column(chat_df):
+    summary = helper.user_summary_table(chat_df)
+    assert list(summary.columns[:5]) == ['messages', 'words', 'media', 'links', 'emojis']
+
+
+def test_skipped_scans_leave_other_columns_unchanged(chat_df):
+    full = helper.user_summary_table(chat_df)
+    cheap = helper.user_summary_table(chat_df, scans=())
+    assert 'links' not in cheap and 'emojis' not in cheap
+    pd.testing.assert_frame_equal(full.drop(columns=['links', 'emojis']), cheap)
+
+
+@pytest.mark.parametrize('name, args', [
+    ('chat_most_busy_users', ()),
+    ('emoji_contribution', ()),
+    ('sentiment_percentage', (1,)),
+    ('sentiment_percentage', (-1,)),
+    ('message_length_by_user', ('Overall',)),
+])
+def test_cheap_path_equals_summary_path(chat_df, monkeypatch, name, args):
+    summary = helper.user_summary_table(chat_df)
+    func = getattr(helper, name)
+    if name == 'message_length_by_user':
+        expected, call = func(args[0], chat_df, summary=summary), lambda: func(args[0], chat_df)
+    else:
+        expected, call = func(chat_df, *args, summary=summary), lambda: func(chat_df, *args)
+
+    # No caller without a summary runs URL extraction
+    def no_urls(message):
+        raise AssertionError("URL scan ran")
+    monkeypatch.setattr(helper, '_find_urls', no_urls)
+    actual = call()
+    if isinstance(expected, tuple):
+        for a, b in zip(expected, actual):
+            (pd.testing.assert_series_equal if isinstance(a, pd.Series) else pd.testing.assert_frame_equal)(a, b)
+    else:
+        pd.testing.assert_frame_equal(expected, actual)
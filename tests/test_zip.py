@@ -0,0 +1,59 @@
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+
+import preprocessor
+
+
+def write_zip(path, members):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return str(path)
+
+
+def test_stream_parse_matches_text(chat_text, chat_df):
+    df = preprocessor.preprocess_stream(lambda: io.StringIO(chat_text, newline=''), block_chars=8 * 1024)
+    pd.testing.assert_frame_equal(df, chat_df)
+
+
+def test_crlf_zip_matches_text(tmp_path, chat_text, chat_df):
+    path = write_zip(tmp_path / 'export.zip', {
+        '_chat.txt': chat_text.replace('\n', '\r\n').encode('utf-8'),
+        'IMG-20200105-WA0001.jpg': b'\xff\xd8',
+    })
+    pd.testing.assert_frame_equal(preprocessor.preprocess_zip(path), chat_df)
+    pd.testing.assert_frame_equal(preprocessor.preprocess_path(path), chat_df)
+
+
+def test_android_export_uses_the_largest_text_member(tmp_path, chat_text, chat_df):
+    path = write_zip(tmp_path / 'export.zip', {
+        'notes.txt': b'not a chat',
+        'WhatsApp Chat with Family.txt': chat_text.encode('utf-8'),
+    })
+    pd.testing.assert_frame_equal(preprocessor.preprocess_zip(path), chat_df)
+
+
+def test_invalid_archives_raise_value_error(tmp_path):
+    bad = tmp_path / 'bad.zip'
+    bad.write_bytes(b'not a zip')
+    with pytest.raises(ValueError):
+        preprocessor.preprocess_zip(str(bad))
+    with pytest.raises(ValueError):
+        preprocessor.preprocess_zip(write_zip(tmp_path / 'media.zip', {'IMG-0001.jpg': b'\xff\xd8'}))
+
+
+def test_media_index_reads_kinds_and_dates(tmp_path, chat_text):
+    path = write_zip(tmp_path / 'export.zip', {
+        '_chat.txt': chat_text.encode('utf-8'),
+        'IMG-20200105-WA0001.jpg': b'\xff\xd8' * 10,
+        'PTT-20200210-WA0002.opus': b'\x00' * 10,
+        'report.pdf': b'%PDF',
+    })
+    index = preprocessor.zip_media_index(path)
+    assert index['filename'].tolist() == ['IMG-20200105-WA0001.jpg', 'PTT-20200210-WA0002.opus', 'report.pdf']
+    assert index['kind'].tolist() == ['image', 'voice note', 'document']
+    assert index['date'].iloc[0] == pd.Timestamp('2020-01-05')
+    assert index['size'].iloc[0] == 20